@@ -0,0 +1,137 @@
+"""
+Columnar store of the preprocessed data of a competition.
+
+`preprocess_script()` is run once per competition and its outputs are saved here instead of pickles,
+so they can be opened without deserializing them: the numeric columns are saved as NumPy blocks
+(one 2D array per dtype) and memory mapped when loading, and the rows can be sliced before reading.
+The mapping is copy-on-write, so modifying the loaded data never changes the store.
+
+Layout of a store folder:
+
+- ``{name}/meta.pkl``: the kind, columns, index and blocks of each object.
+- ``{name}/block_{i}.npy``: the columns with the same NumPy dtype, shape (n_columns, n_rows).
+- ``{name}/objects.pkl``: the other columns (e.g. strings, categories) or the whole object if it isn't an array.
+- ``others.pkl``: the other outputs of `preprocess_script()`.
+"""
+
+import os
+import pickle
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NAMES = ("X_train", "X_valid", "y_train", "y_valid", "X_test")
+
+
+def _is_array_dtype(dtype) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def save_frame(obj, path) -> None:
+    """Save a DataFrame, Series or NumPy array into the folder `path`; other objects are pickled."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    meta = {}
+    if isinstance(obj, np.ndarray) and _is_array_dtype(obj.dtype):
+        meta["kind"] = "array"
+        np.save(path / "block_0.npy", obj)
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        meta["kind"] = "frame" if isinstance(obj, pd.DataFrame) else "series"
+        frame = obj if isinstance(obj, pd.DataFrame) else obj.to_frame()
+        meta["columns"] = frame.columns
+        meta["name"] = getattr(obj, "name", None)
+        if isinstance(frame.index, pd.RangeIndex) or not _is_array_dtype(frame.index.dtype):
+            meta["index"] = frame.index
+        else:
+            meta["index"] = None
+            np.save(path / "index.npy", frame.index.to_numpy())
+            meta["index_name"] = frame.index.name
+
+        dtypes = frame.dtypes.tolist()
+        blocks = {}
+        for i, dtype in enumerate(dtypes):
+            if _is_array_dtype(dtype):
+                blocks.setdefault(dtype, []).append(i)
+        meta["blocks"] = []
+        for block_id, positions in enumerate(blocks.values()):
+            np.save(path / f"block_{block_id}.npy", np.ascontiguousarray(frame.iloc[:, positions].to_numpy().T))
+            meta["blocks"].append(positions)
+        object_positions = [i for i, dtype in enumerate(dtypes) if not _is_array_dtype(dtype)]
+        meta["object_positions"] = object_positions
+        if object_positions:
+            with open(path / "objects.pkl", "wb") as f:
+                pickle.dump(frame.iloc[:, object_positions], f)
+    else:
+        meta["kind"] = "object"
+        with open(path / "objects.pkl", "wb") as f:
+            pickle.dump(obj, f)
+    with open(path / "meta.pkl", "wb") as f:
+        pickle.dump(meta, f)
+
+
+def load_frame(path, rows: slice | None = None):
+    """Load the object saved by `save_frame`; only the rows in `rows` are read if it is given."""
+    path = Path(path)
+    with open(path / "meta.pkl", "rb") as f:
+        meta = pickle.load(f)
+    rows = slice(None) if rows is None else rows
+    if meta["kind"] == "array":
+        return np.load(path / "block_0.npy", mmap_mode="c")[rows]
+    if meta["kind"] == "object":
+        with open(path / "objects.pkl", "rb") as f:
+            return pickle.load(f)[rows]
+
+    if meta["index"] is not None:
+        index = meta["index"][rows]
+    else:
+        index = pd.Index(np.load(path / "index.npy", mmap_mode="c")[rows], name=meta["index_name"])
+    columns = meta["columns"]
+    parts = []
+    for block_id, positions in enumerate(meta["blocks"]):
+        values = np.load(path / f"block_{block_id}.npy", mmap_mode="c").T[rows]
+        parts.append(pd.DataFrame(values, index=index, columns=columns[positions], copy=False))
+    if meta["object_positions"]:
+        with open(path / "objects.pkl", "rb") as f:
+            objects = pickle.load(f).iloc[rows]
+        objects.index = index
+        parts.append(objects)
+    if len(parts) == 1:
+        frame = parts[0]
+    elif parts:
+        order = [p for positions in meta["blocks"] for p in positions] + meta["object_positions"]
+        frame = pd.concat(parts, axis=1).iloc[:, np.argsort(order)]
+    else:
+        frame = pd.DataFrame(index=index, columns=columns)
+    if meta["kind"] == "series":
+        return frame.iloc[:, 0].rename(meta["name"])
+    return frame
+
+
+def save_preprocessed(path, X_train, X_valid, y_train, y_valid, X_test, *others) -> None:
+    """Save the outputs of `preprocess_script()`; the store appears at `path` only after it is complete."""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    for name, obj in zip(NAMES, (X_train, X_valid, y_train, y_valid, X_test)):
+        save_frame(obj, tmp_path / name)
+    with open(tmp_path / "others.pkl", "wb") as f:
+        pickle.dump(others, f)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # the store has been saved by another run
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_preprocessed(path) -> tuple:
+    """Load the outputs of `preprocess_script()` in the same order."""
+    path = Path(path)
+    with open(path / "others.pkl", "rb") as f:
+        others = pickle.load(f)
+    return (*(load_frame(path / name) for name in NAMES), *others)
+
+
+def exists(path) -> bool:
+    return (Path(path) / "others.pkl").exists()
@@ -0,0 +1,108 @@
+"""
+Cache of the transformed feature blocks for `train.py`.
+
+A feature block is the output of one `feature/feat*.py` on the train/valid/test sets. It only depends on
+the preprocessing code, the feature code and the input data, so it is keyed by the hash of them and saved
+in the shared data volume. In a new round, only the new feature file is fitted & transformed and the other
+blocks are read back (memory mapped) from the cache.
+"""
+
+import hashlib
+import importlib.util
+import os
+import pickle
+import shutil
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+DIRNAME = Path(__file__).absolute().resolve().parent
+INPUT_PATH = Path(os.environ.get("KG_INPUT_PATH", "/kaggle/input"))
+CACHE_PATH = Path(os.environ.get("KG_FEATURE_CACHE_PATH", INPUT_PATH / ".feature_cache"))
+SPLITS = ("train", "valid", "test")
+
+_data_fingerprint = None
+
+
+def import_module_from_path(module_name, module_path):
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def data_fingerprint() -> str:
+    """The fingerprint of the input data by the path, size and modification time of the files."""
+    global _data_fingerprint
+    if _data_fingerprint is None:
+        md5 = hashlib.md5()
+        for root, dirs, files in os.walk(INPUT_PATH):
+            dirs[:] = sorted(d for d in dirs if Path(root, d) != CACHE_PATH)
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                md5.update(f"{os.path.join(root, name)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        _data_fingerprint = md5.hexdigest()
+    return _data_fingerprint
+
+
+def feature_key(feature_path: Path, preprocess_path: Path = DIRNAME / "fea_share_preprocess.py") -> str:
+    md5 = hashlib.md5()
+    md5.update(Path(preprocess_path).read_bytes())
+    md5.update(b"\0")
+    md5.update(Path(feature_path).read_bytes())
+    md5.update(b"\0")
+    md5.update(data_fingerprint().encode())
+    return md5.hexdigest()
+
+
+def _load(path: Path) -> list:
+    if (path / "train.parquet").exists():
+        return [pd.read_parquet(path / f"{split}.parquet", memory_map=True) for split in SPLITS]
+    return [pickle.load(open(path / f"{split}.pkl", "rb")) for split in SPLITS]
+
+
+def _dump(path: Path, blocks: list) -> None:
+    """write the blocks into a temporary folder and rename it, so readers never see a partial block"""
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.mkdir(parents=True)
+    try:
+        try:
+            for split, block in zip(SPLITS, blocks):
+                block.to_parquet(tmp_path / f"{split}.parquet")
+        except Exception:
+            # e.g. the block has non-string column names, which parquet doesn't support
+            for file in tmp_path.iterdir():
+                file.unlink()
+            for split, block in zip(SPLITS, blocks):
+                pickle.dump(block, open(tmp_path / f"{split}.pkl", "wb"))
+        os.replace(tmp_path, path)
+    except OSError:
+        # another run has saved the same block
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def transform_with_cache(feature_path: Path, X_train: pd.DataFrame, X_valid: pd.DataFrame, X_test: pd.DataFrame):
+    """
+    Fit the feature engineering class in `feature_path` on `X_train` and transform the three sets;
+    the transformed blocks are read from the cache if they were calculated before.
+    """
+    try:
+        path = CACHE_PATH / feature_key(feature_path)
+        if path.exists():
+            return _load(path)
+    except Exception as e:
+        print(f"Feature cache is not available: {e}")
+        path = None
+
+    cls = import_module_from_path(feature_path.stem, feature_path).feature_engineering_cls()
+    cls.fit(X_train)
+    blocks = [cls.transform(X_train), cls.transform(X_valid), cls.transform(X_test)]
+
+    if path is not None and all(isinstance(block, pd.DataFrame) for block in blocks):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _dump(path, blocks)
+        except OSError as e:
+            print(f"Failed to save the feature block into the cache: {e}")
+    return blocks
@@ -0,0 +1,158 @@
+"""
+Train and evaluate the candidate models of `train.py` concurrently.
+
+Each `model/model*.py` is fitted together with its `select*.py` in a forked process, so:
+
+- the processes share the feature matrices of `train.py` copy-on-write instead of pickling them,
+  and `select` can modify its input without a defensive copy;
+- the models run concurrently under a CPU budget, each with `budget // n_workers` threads.
+
+The validation and test predictions of every model are sent back, so `train.py` only picks the best one.
+
+Environment variables:
+
+- ``KG_CPU_BUDGET``: the number of CPUs for training the models (default: all the CPUs).
+- ``KG_MODEL_MAX_WORKERS``: the maximum number of models trained concurrently (default: no limit).
+"""
+
+import importlib.util
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple
+
+import pandas as pd
+
+CPU_BUDGET = int(os.environ.get("KG_CPU_BUDGET") or os.cpu_count() or 1)
+MAX_WORKERS = int(os.environ.get("KG_MODEL_MAX_WORKERS") or 0)
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# the data of the running `run_models`, inherited by the forked processes
+_DATA: tuple | None = None
+
+
+class ModelResult(NamedTuple):
+    name: str
+    y_valid_pred: Any
+    y_test_pred: Any
+    wall_time: float
+
+
+def import_module_from_path(module_name, module_path):
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _limit_threads(n_threads: int) -> None:
+    # the environment variables work for the libraries imported later, e.g. the model code
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+
+
+def _run_model(model_path: Path, copy: bool) -> ModelResult:
+    start = time.perf_counter()
+    X_train, y_train, X_valid, y_valid, X_test = _DATA
+    if copy:
+        X_train, X_valid, X_test = X_train.copy(), X_valid.copy(), X_test.copy()
+    select_path = model_path.with_name(model_path.stem.replace("model", "select") + model_path.suffix)
+    select_m = import_module_from_path(select_path.stem, select_path)
+    m = import_module_from_path(model_path.stem, model_path)
+
+    X_valid_selected = select_m.select(X_valid)
+    model = m.fit(select_m.select(X_train), y_train, X_valid_selected, y_valid)
+    y_valid_pred = m.predict(model, X_valid_selected)
+    y_test_pred = m.predict(model, select_m.select(X_test))
+    return ModelResult(model_path.stem, y_valid_pred, y_test_pred, time.perf_counter() - start)
+
+
+def _worker(conn: multiprocessing.connection.Connection, model_path: Path, n_threads: int) -> None:
+    try:
+        _limit_threads(n_threads)
+        conn.send(("ok", _run_model(model_path, copy=False)))
+    except BaseException:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def _run_in_processes(model_paths: list[Path], n_workers: int, n_threads: int) -> list[ModelResult]:
+    ctx = multiprocessing.get_context("fork")
+    results: dict[int, ModelResult] = {}
+    pending = list(enumerate(model_paths))
+    running: dict[multiprocessing.connection.Connection, tuple] = {}
+    try:
+        while pending or running:
+            while pending and len(running) < n_workers:
+                i, model_path = pending.pop(0)
+                sys.stdout.flush()  # or the forked process prints the buffered output again
+                recv_conn, send_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_worker, args=(send_conn, model_path, n_threads))
+                process.start()
+                send_conn.close()
+                running[recv_conn] = (i, model_path, process)
+            for conn in multiprocessing.connection.wait(list(running)):
+                i, model_path, process = running.pop(conn)
+                try:
+                    status, value = conn.recv()
+                except EOFError:
+                    status, value = "error", "The process is killed (e.g. out of memory)."
+                process.join()
+                if status == "error":
+                    raise RuntimeError(f"Failed to run {model_path.name}:\n{value}")
+                results[i] = value
+    finally:
+        for _, _, process in running.values():
+            process.kill()
+    return [results[i] for i in range(len(model_paths))]
+
+
+def run_models(
+    model_paths: Iterable[Path],
+    X_train: pd.DataFrame,
+    y_train,
+    X_valid: pd.DataFrame,
+    y_valid,
+    X_test: pd.DataFrame,
+) -> list[ModelResult]:
+    """
+    Fit each model on the train set and predict the valid & test sets; the results are in the order of
+    `model_paths` (sorted if it is not a list).
+    """
+    global _DATA
+    model_paths = [Path(p) for p in (model_paths if isinstance(model_paths, list) else sorted(model_paths))]
+    n_workers = max(1, min(len(model_paths), MAX_WORKERS or len(model_paths), CPU_BUDGET))
+    n_threads = max(1, CPU_BUDGET // n_workers)
+    _DATA = (X_train, y_train, X_valid, y_valid, X_test)
+    try:
+        if "fork" in multiprocessing.get_all_start_methods():
+            results = _run_in_processes(model_paths, n_workers, n_threads)
+        else:
+            results = [_run_model(model_path, copy=True) for model_path in model_paths]
+    finally:
+        _DATA = None
+    for result in results:
+        print(f"{result.name} finished in {result.wall_time:.2f}s")
+    return results
+
+
+def save_score(metric_name: str, score: float, results: list[ModelResult], path="submission_score.csv") -> None:
+    """
+    Save the score of the best model; the wall time of each model is saved in the other columns,
+    so the first column is still the score.
+    """
+    score_df = pd.DataFrame({"0": [score]}, index=[metric_name])
+    for result in results:
+        score_df[f"{result.name}_wall_time"] = result.wall_time
+    score_df.to_csv(path)
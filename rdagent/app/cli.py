@@ -12,19 +12,38 @@ load_dotenv(".env")
 # 2) The ".env" argument is necessary to make sure it loads `.env` from the current directory.
 
 import subprocess
+import sys
+from importlib import import_module
 from importlib.resources import path as rpath
+from typing import Any, Callable
 
 import fire
 
-from rdagent.app.data_mining.model import main as med_model
-from rdagent.app.general_model.general_model import (
-    extract_models_and_implement as general_model,
-)
-from rdagent.app.kaggle.loop import main as kaggle_main
-from rdagent.app.qlib_rd_loop.factor import main as fin_factor
-from rdagent.app.qlib_rd_loop.factor_from_report import main as fin_factor_report
-from rdagent.app.qlib_rd_loop.model import main as fin_model
-from rdagent.app.utils.info import collect_info
+# the subcommands are imported when they are called, so a command doesn't wait for importing the
+# dependencies of all the scenarios (e.g. torch, selenium, langchain)
+COMMANDS = {
+    "fin_factor": "rdagent.app.qlib_rd_loop.factor:main",
+    "fin_factor_report": "rdagent.app.qlib_rd_loop.factor_from_report:main",
+    "fin_model": "rdagent.app.qlib_rd_loop.model:main",
+    "med_model": "rdagent.app.data_mining.model:main",
+    "general_model": "rdagent.app.general_model.general_model:extract_models_and_implement",
+    "collect_info": "rdagent.app.utils.info:collect_info",
+    "kaggle": "rdagent.app.kaggle.loop:main",
+}
+
+
+def load_command(name: str) -> Callable:
+    module_name, func_name = COMMANDS[name].split(":")
+    return getattr(import_module(module_name), func_name)
+
+
+def lazy_command(name: str) -> Callable:
+    def command(*args: Any, **kwargs: Any) -> Any:
+        return load_command(name)(*args, **kwargs)
+
+    command.__name__ = command.__qualname__ = name
+    command.__doc__ = f"Run `{COMMANDS[name]}`."
+    return command
 
 
 def ui(port=80, log_dir="", debug=False):
@@ -43,15 +62,7 @@ def ui(port=80, log_dir="", debug=False):
 
 
 def app():
-    fire.Fire(
-        {
-            "fin_factor": fin_factor,
-            "fin_factor_report": fin_factor_report,
-            "fin_model": fin_model,
-            "med_model": med_model,
-            "general_model": general_model,
-            "ui": ui,
-            "collect_info": collect_info,
-            "kaggle": kaggle_main,
-        }
-    )
+    # the called subcommand is loaded for fire to know its arguments, the others stay lazy
+    called = sys.argv[1] if len(sys.argv) > 1 else None
+    commands = {name: load_command(name) if name == called else lazy_command(name) for name in COMMANDS}
+    fire.Fire({**commands, "ui": ui})
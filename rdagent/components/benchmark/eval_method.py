@@ -1,6 +1,8 @@
+import multiprocessing as mp
+import time
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, List, Tuple, Union
 
 import pandas as pd
 from tqdm import tqdm
@@ -16,6 +18,10 @@ from rdagent.components.coder.factor_coder.CoSTEER.evaluators import (
     FactorRowCountEvaluator,
     FactorSingleColumnEvaluator,
 )
+from rdagent.components.coder.factor_coder.CoSTEER.value_comparison import (
+    FactorValueComparison,
+    compare_factor_values,
+)
 from rdagent.components.coder.factor_coder.factor import FactorFBWorkspace
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.developer import Developer
@@ -23,12 +29,26 @@ from rdagent.core.exception import CoderError
 from rdagent.core.experiment import Experiment, Task, Workspace
 from rdagent.core.scenario import Scenario
 from rdagent.core.utils import multiprocessing_wrapper
+from rdagent.log import rdagent_logger as logger
 
 EVAL_RES = Dict[
     str,
     List[Tuple[FactorEvaluator, Union[object, CoderError]]],
 ]
 
+# the evaluators whose results are taken from the values compared in one pass, instead of comparing them again
+COMPARISON_FEEDBACK: Dict[type, Callable[[FactorEvaluator, FactorValueComparison], Tuple[str, object]]] = {
+    FactorRowCountEvaluator: lambda ev, comparison: ev.feedback(comparison.row_ratio),
+    FactorIndexEvaluator: lambda ev, comparison: ev.feedback(comparison.index_similarity),
+    FactorMissingValuesEvaluator: lambda ev, comparison: ev.feedback(
+        comparison.gen_missing_values, comparison.gt_missing_values
+    ),
+    FactorEqualValueCountEvaluator: lambda ev, comparison: ev.feedback(
+        comparison.all_values_equal, comparison.equal_value_ratio
+    ),
+    FactorCorrelationEvaluator: lambda ev, comparison: ev.feedback(*comparison.correlation()),
+}
+
 
 class TestCase:
     def __init__(
@@ -63,6 +83,56 @@ class TestCases:
         return [case.ground_truth for case in self.test_case_l]
 
 
+class FactorValueWorkspace(Workspace):
+    """
+    The result of a workspace executed before, so the evaluators get the factor values without executing the code
+    again; the exception raised by the execution is raised again.
+    """
+
+    def __init__(self, target_task: Task, execution_result: Union[Tuple[str, pd.DataFrame], Exception]) -> None:
+        super().__init__(target_task)
+        self.execution_result = execution_result
+
+    def execute(self, *args, **kwargs) -> Tuple[str, pd.DataFrame]:
+        if isinstance(self.execution_result, Exception):
+            raise self.execution_result
+        return self.execution_result
+
+    def copy(self) -> "FactorValueWorkspace":
+        return self
+
+
+class CaseEvalResult(list):
+    """The results of the evaluators on a case, with the seconds spent on each step in `timing`."""
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.timing: Dict[str, float] = {}
+
+
+def _execute_workspace(workspace: Workspace) -> Union[Tuple[str, pd.DataFrame], Exception]:
+    try:
+        return workspace.execute()
+    except Exception as e:
+        return e
+
+
+# the evaluation and the ground truth values of the running `FactorImplementEval.eval`, inherited by the forked
+# scoring processes copy-on-write
+_SCORING: Union[Tuple["FactorImplementEval", List[FactorValueWorkspace]], None] = None
+
+
+def _score_case(case: Tuple[int, Workspace]) -> Union[CaseEvalResult, Exception]:
+    """score the generated workspace against the `case[0]`-th ground truth; the evaluators are sent back by index"""
+    evaluation, gt_values = _SCORING
+    eval_res = evaluation.eval_case(gt_values[case[0]], case[1])
+    if isinstance(eval_res, CaseEvalResult):
+        indexed_res = CaseEvalResult((evaluation.evaluator_l.index(ev), res) for ev, res in eval_res)
+        indexed_res.timing = eval_res.timing
+        return indexed_res
+    return eval_res
+
+
 class BaseEval:
     """
     The benchmark benchmark evaluation.
@@ -161,6 +231,89 @@ class FactorImplementEval(BaseEval):
         super().__init__(online_evaluator_l, test_cases, method, *args, **kwargs)
         self.test_round = test_round
 
+    def eval_case(
+        self,
+        case_gt: Workspace,
+        case_gen: Workspace,
+    ) -> Union[CaseEvalResult, Exception]:
+        """
+        The same results as `BaseEval.eval_case`, but the generated factor is executed once for all the evaluators,
+        and the values are compared in one pass for the evaluators in `COMPARISON_FEEDBACK`.
+        """
+        eval_res = CaseEvalResult()
+        start = time.perf_counter()
+        try:
+            case_gen.raise_exception = True
+            gen_result = case_gen.execute()
+        except CoderError as e:
+            return e
+        except Exception as e:
+            if not self.catch_eval_except:
+                raise e
+            # every evaluator fails by executing the generated factor
+            gen_result = e
+        eval_res.timing["execution"] = time.perf_counter() - start
+
+        case_gen = FactorValueWorkspace(case_gen.target_task, gen_result)
+        comparison = None
+        if not isinstance(gen_result, Exception) and any(type(ev) in COMPARISON_FEEDBACK for ev in self.evaluator_l):
+            start = time.perf_counter()
+            try:
+                gt_df, gen_df = self.evaluator_l[0]._get_df(case_gt, case_gen)
+                comparison = compare_factor_values(gen_df, gt_df)
+            except Exception:
+                # the evaluators report the exception themselves
+                pass
+            eval_res.timing["comparison"] = time.perf_counter() - start
+
+        for ev in self.evaluator_l:
+            start = time.perf_counter()
+            try:
+                if comparison is not None and type(ev) in COMPARISON_FEEDBACK:
+                    eval_res.append((ev, COMPARISON_FEEDBACK[type(ev)](ev, comparison)))
+                else:
+                    eval_res.append((ev, ev.evaluate(implementation=case_gen, gt_implementation=case_gt)))
+            except CoderError as e:
+                return e
+            except Exception as e:
+                # exception when evaluation
+                if self.catch_eval_except:
+                    eval_res.append((ev, e))
+                else:
+                    raise e
+            eval_res.timing[str(ev)] = time.perf_counter() - start
+        return eval_res
+
+    def score_cases(
+        self, gt_values: List[FactorValueWorkspace], cases: List[Tuple[int, Workspace]]
+    ) -> List[Union[CaseEvalResult, Exception]]:
+        """
+        Score the cases of (index of the ground truth, generated workspace) in a pool of processes forked once;
+        the processes share the ground truth values instead of receiving them with each case.
+        """
+        global _SCORING
+        n = RD_AGENT_SETTINGS.multi_proc_n
+        _SCORING = (self, gt_values)
+        try:
+            if n == 1 or "fork" not in mp.get_all_start_methods():
+                indexed_res_list = [_score_case(case) for case in tqdm(cases, desc="Scoring")]
+            else:
+                with mp.get_context("fork").Pool(processes=n) as pool:
+                    indexed_res_list = list(tqdm(pool.imap(_score_case, cases), total=len(cases), desc="Scoring"))
+                    pool.close()
+                    pool.join()
+        finally:
+            _SCORING = None
+
+        eval_res_list = []
+        for indexed_res in indexed_res_list:
+            if isinstance(indexed_res, CaseEvalResult):
+                eval_res = CaseEvalResult((self.evaluator_l[i], res) for i, res in indexed_res)
+                eval_res.timing = indexed_res.timing
+                indexed_res = eval_res
+            eval_res_list.append(indexed_res)
+        return eval_res_list
+
     def eval(self):
         gen_factor_l_all_rounds = []
         test_cases_all_rounds = []
@@ -183,12 +336,31 @@ class FactorImplementEval(BaseEval):
             gen_factor_l_all_rounds.extend(gen_factor_l.sub_workspace_list)
             test_cases_all_rounds.extend(self.test_cases.ground_truth)
 
-        eval_res_list = multiprocessing_wrapper(
-            [
-                (self.eval_case, (gt_case, gen_factor))
-                for gt_case, gen_factor in zip(test_cases_all_rounds, gen_factor_l_all_rounds)
-            ],
-            n=RD_AGENT_SETTINGS.multi_proc_n,
+        # the ground truth values are computed once for all the rounds
+        start = time.perf_counter()
+        gt_values = [
+            FactorValueWorkspace(gt_case.target_task, gt_result)
+            for gt_case, gt_result in zip(
+                self.test_cases.ground_truth,
+                multiprocessing_wrapper(
+                    [(_execute_workspace, (gt_case,)) for gt_case in self.test_cases.ground_truth],
+                    n=RD_AGENT_SETTINGS.multi_proc_n,
+                ),
+            )
+        ]
+        logger.info(f"Executed {len(gt_values)} ground truth factors in {time.perf_counter() - start:.1f}s.")
+
+        start = time.perf_counter()
+        eval_res_list = self.score_cases(
+            gt_values, [(i % len(gt_values), gen_factor) for i, gen_factor in enumerate(gen_factor_l_all_rounds)]
+        )
+        timing = defaultdict(float)
+        for eval_res in eval_res_list:
+            for step, seconds in getattr(eval_res, "timing", {}).items():
+                timing[step] += seconds
+        logger.info(
+            f"Scored {len(eval_res_list)} cases in {time.perf_counter() - start:.1f}s, the seconds of each step: "
+            + ", ".join(f"{step}: {seconds:.1f}" for step, seconds in timing.items())
         )
 
         for gt_case, eval_res, gen_factor in tqdm(zip(test_cases_all_rounds, eval_res_list, gen_factor_l_all_rounds)):
@@ -217,6 +389,9 @@ class FactorImplementEval(BaseEval):
                         else:
                             feedback, metric = err_or_res
                             val[str(ev_obj)] = metric
+                    # the results saved by the former versions have no timing
+                    for step, seconds in getattr(err_or_res_l, "timing", {}).items():
+                        val[f"time: {step}"] = seconds
                 sum_res[key] = val
 
         return pd.DataFrame(sum_res)
@@ -0,0 +1,168 @@
+"""
+The cache of the execution results of the workspaces (e.g. the factor values of `FactorFBWorkspace`).
+
+- The results are pickled, compressed and saved by their keys (the hash of the code and the inputs) in
+  ``{cache_location}/objects/{key[:2]}/{key}``.
+- ``{cache_location}/index.db`` indexes the entries by their size, creation time, last hit time and hits, so
+  the least recently hit entries are evicted when the cache is over `RD_AGENT_SETTINGS.execution_cache_max_bytes`.
+- A key is locked across the processes while its result is computed, so the concurrent executions of the same
+  code wait for the first one and reuse its result instead of running it again.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Generator, TypeVar
+
+from filelock import FileLock
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+
+T = TypeVar("T")
+# the number of the lock files is bounded; the keys sharing a lock file are rarely computed at the same time
+LOCK_PREFIX_LENGTH = 3
+
+
+class ExecutionCache:
+    def __init__(self, cache_location: str | Path) -> None:
+        self.path = Path(cache_location)
+        self.max_bytes = RD_AGENT_SETTINGS.execution_cache_max_bytes
+        self.compress_level = RD_AGENT_SETTINGS.execution_cache_compress_level
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_pid: int | None = None
+        self.stats = {"hit": 0, "miss": 0, "coalesced": 0, "evicted": 0}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # the connection inherited from the parent process must not be used in a forked child
+        if self._conn is None or self._conn_pid != os.getpid():
+            self.path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path / "index.db", timeout=60, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, size INTEGER, created REAL, last_hit REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_hit ON entries (last_hit)")
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _object_path(self, key: str) -> Path:
+        return self.path / "objects" / key[:2] / key
+
+    @contextmanager
+    def lock(self, key: str) -> Generator[None, None, None]:
+        """Hold the lock of `key` across the processes, e.g. while computing its result."""
+        lock_path = self.path / "locks" / f"{key[:LOCK_PREFIX_LENGTH]}.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(lock_path):
+            yield
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._object_path(key)
+        legacy_path = self.path / f"{key}.pkl"
+        try:
+            value = pickle.loads(zlib.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            if not legacy_path.exists():
+                self.stats["miss"] += 1
+                return default
+            # the uncompressed pickles saved by the former version of the cache are moved into the index
+            value = pickle.loads(legacy_path.read_bytes())
+            self.set(key, value)
+            legacy_path.unlink(missing_ok=True)
+        self.stats["hit"] += 1
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE entries SET last_hit=?, hits=hits+1 WHERE key=?", (time.time(), key))
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level)
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, created, last_hit, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, len(data), now, now),
+            )
+        self.evict()
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        reuse: bool = True,
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        """
+        Get the result of `key`, or compute and cache it; the result is computed once for the concurrent calls.
+
+        reuse: if False, always compute the result (e.g. to raise the exceptions of the execution) and cache it.
+        cacheable: if given, only the results it accepts are cached.
+        """
+        if reuse and (value := self.get(key)) is not None:
+            return value
+        with self.lock(key):
+            if reuse:
+                # the lookup before the lock has been counted; each call is counted once as a hit, miss or coalesced
+                self.stats["miss"] -= 1
+                if (value := self.get(key)) is not None:
+                    # computed by another process or thread while waiting for the lock
+                    self.stats["hit"] -= 1
+                    self.stats["coalesced"] += 1
+                    return value
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+        return value
+
+    def evict(self) -> None:
+        """Remove the least recently hit entries until the cache is not larger than `max_bytes`."""
+        if self.max_bytes is None:
+            return
+        with self._lock, self.conn:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_hit"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(key)
+                total -= size
+            self.conn.executemany("DELETE FROM entries WHERE key=?", [(key,) for key in evicted])
+        for key in evicted:
+            self._object_path(key).unlink(missing_ok=True)
+        self.stats["evicted"] += len(evicted)
+
+    def get_stats(self) -> dict[str, int]:
+        """The statistics of this process and the entries & bytes of the whole cache."""
+        with self._lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {**self.stats, "entries": entries, "bytes": size}
+
+
+_CACHES: dict[Path, ExecutionCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_execution_cache(cache_location: str | Path) -> ExecutionCache:
+    with _CACHES_LOCK:
+        path = Path(cache_location).absolute()
+        if path not in _CACHES:
+            _CACHES[path] = ExecutionCache(path)
+        return _CACHES[path]
@@ -59,7 +59,12 @@ class FactorCoSTEER(Developer[FactorExperiment]):
         self.evolving_version = 2
 
     def load_or_init_knowledge_base(self, former_knowledge_base_path: Path = None, component_init_list: list = []):
-        if former_knowledge_base_path is not None and former_knowledge_base_path.exists():
+        if former_knowledge_base_path is not None and former_knowledge_base_path.is_dir():
+            # saved by `FactorGraphKnowledgeBase.dump_incremental`
+            factor_knowledge_base = FactorGraphKnowledgeBase.load_incremental(former_knowledge_base_path)
+            if self.evolving_version != 2:
+                raise ValueError("The former knowledge base is not compatible with the current version")
+        elif former_knowledge_base_path is not None and former_knowledge_base_path.exists():
             factor_knowledge_base = pickle.load(open(former_knowledge_base_path, "rb"))
             if self.evolving_version == 1 and not isinstance(factor_knowledge_base, FactorKnowledgeBaseV1):
                 raise ValueError("The former knowledge base is not compatible with the current version")
@@ -107,7 +112,13 @@ class FactorCoSTEER(Developer[FactorExperiment]):
 
         # save new knowledge base
         if self.new_knowledge_base_path is not None:
-            pickle.dump(factor_knowledge_base, open(self.new_knowledge_base_path, "wb"))
+            if FACTOR_IMPLEMENT_SETTINGS.incremental_knowledge_base and isinstance(
+                factor_knowledge_base,
+                FactorGraphKnowledgeBase,
+            ):
+                factor_knowledge_base.dump_incremental(self.new_knowledge_base_path)
+            else:
+                pickle.dump(factor_knowledge_base, open(self.new_knowledge_base_path, "wb"))
             logger.info(f"New knowledge base saved to {self.new_knowledge_base_path}")
         exp.sub_workspace_list = factor_experiment.sub_workspace_list
         return exp
@@ -11,6 +11,9 @@ from jinja2 import Environment, StrictUndefined
 from rdagent.components.coder.factor_coder.CoSTEER.evolvable_subjects import (
     FactorEvolvingItem,
 )
+from rdagent.components.coder.factor_coder.CoSTEER.value_comparison import (
+    compare_factor_values,
+)
 from rdagent.components.coder.factor_coder.factor import FactorTask
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.evaluation import Evaluator, Feedback
@@ -250,7 +253,10 @@ class FactorRowCountEvaluator(FactorEvaluator):
                 "The source dataframe is None. Please check the implementation.",
                 False,
             )
-        ratio = len(gen_df) / len(gt_df)
+        return self.feedback(len(gen_df) / len(gt_df))
+
+    @staticmethod
+    def feedback(ratio: float) -> Tuple[str, object]:
         return (
             f"The ratio of rows count in the source dataframe to the ground truth dataframe is {ratio:.2f}. "
             + "Please verify the implementation. "
@@ -273,7 +279,10 @@ class FactorIndexEvaluator(FactorEvaluator):
                 False,
             )
         gen_index_set, gt_index_set = set(gen_df.index), set(gt_df.index)
-        similarity = len(gen_index_set.intersection(gt_index_set)) / len(gen_index_set.union(gt_index_set))
+        return self.feedback(len(gen_index_set.intersection(gt_index_set)) / len(gen_index_set.union(gt_index_set)))
+
+    @staticmethod
+    def feedback(similarity: float) -> Tuple[str, object]:
         return (
             f"The source dataframe and the ground truth dataframe have different index with a similarity of {similarity:.2%}. The similarity is calculated by the number of shared indices divided by the union indices. "
             + "Please check the implementation."
@@ -295,11 +304,15 @@ class FactorMissingValuesEvaluator(FactorEvaluator):
                 "The source dataframe is None. Please check the implementation.",
                 False,
             )
-        if gen_df.isna().sum().sum() == gt_df.isna().sum().sum():
+        return self.feedback(gen_df.isna().sum().sum(), gt_df.isna().sum().sum())
+
+    @staticmethod
+    def feedback(gen_missing_values: int, gt_missing_values: int) -> Tuple[str, object]:
+        if gen_missing_values == gt_missing_values:
             return "Both dataframes have the same missing values.", True
         else:
             return (
-                f"The dataframes do not have the same missing values. The source dataframe has {gen_df.isna().sum().sum()} missing values, while the ground truth dataframe has {gt_df.isna().sum().sum()} missing values. Please check the implementation.",
+                f"The dataframes do not have the same missing values. The source dataframe has {gen_missing_values} missing values, while the ground truth dataframe has {gt_missing_values} missing values. Please check the implementation.",
                 False,
             )
 
@@ -323,7 +336,11 @@ class FactorEqualValueCountEvaluator(FactorEvaluator):
             acc_rate = pos_num / close_values.size
         except:
             close_values = gen_df
-        if close_values.all().iloc[0]:
+        return self.feedback(close_values.all().iloc[0], acc_rate)
+
+    @staticmethod
+    def feedback(all_values_equal: bool, acc_rate: float) -> Tuple[str, object]:
+        if all_values_equal:
             return (
                 "All values in the dataframes are equal within the tolerance of 1e-6.",
                 acc_rate,
@@ -360,7 +377,9 @@ class FactorCorrelationEvaluator(FactorEvaluator):
             .dropna()
             .mean()
         )
+        return self.feedback(ic, ric)
 
+    def feedback(self, ic: float, ric: float) -> Tuple[str, object]:
         if self.hard_check:
             if ic > 0.99 and ric > 0.99:
                 return (
@@ -417,7 +436,37 @@ class FactorValueEvaluator(FactorEvaluator):
             daily_check_result = None
 
         # Check dataframe format
+        comparison = None
         if gt_implementation is not None:
+            gt_df, gen_df = self._get_df(gt_implementation, implementation)
+            comparison = compare_factor_values(gen_df, gt_df)
+        if comparison is not None:
+            # the same checks as the evaluators below, calculated in one pass over the aligned values
+            feedback_str, row_result = FactorRowCountEvaluator.feedback(comparison.row_ratio)
+            conclusions.append(feedback_str)
+
+            feedback_str, index_result = FactorIndexEvaluator.feedback(comparison.index_similarity)
+            conclusions.append(feedback_str)
+
+            feedback_str, output_format_result = FactorMissingValuesEvaluator.feedback(
+                comparison.gen_missing_values, comparison.gt_missing_values
+            )
+            conclusions.append(feedback_str)
+
+            feedback_str, equal_value_ratio_result = FactorEqualValueCountEvaluator.feedback(
+                comparison.all_values_equal, comparison.equal_value_ratio
+            )
+            conclusions.append(feedback_str)
+
+            if index_result > 0.99:
+                feedback_str, high_correlation_result = FactorCorrelationEvaluator(
+                    hard_check=True, scen=self.scen
+                ).feedback(*comparison.correlation())
+            else:
+                high_correlation_result = False
+                feedback_str = "The source dataframe and the ground truth dataframe have different index. Give up comparing the values and correlation because it's useless"
+            conclusions.append(feedback_str)
+        elif gt_implementation is not None:
             feedback_str, row_result = FactorRowCountEvaluator(self.scen).evaluate(implementation, gt_implementation)
             conclusions.append(feedback_str)
 
@@ -19,6 +19,10 @@ from rdagent.components.knowledge_management.graph import (
     UndirectedGraph,
     UndirectedNode,
 )
+from rdagent.components.knowledge_management.storage import (
+    AppendOnlyKnowledgeBaseStorage,
+    TrackedDict,
+)
 from rdagent.core.evolving_framework import (
     EvolvableSubjects,
     EvolvingKnowledgeBase,
@@ -254,6 +258,7 @@ class FactorGraphRAGStrategy(RAGStrategy):
                         self.knowledgebase.working_trace_knowledge.setdefault(target_task_information, []).append(
                             single_knowledge,
                         )  # save to working trace
+                        self.knowledgebase.mark_dirty("working_trace_knowledge", target_task_information)
                         if single_feedback.final_decision == True:
                             self.knowledgebase.success_task_to_knowledge_dict.setdefault(
                                 target_task_information,
@@ -282,6 +287,7 @@ class FactorGraphRAGStrategy(RAGStrategy):
                             ).append(
                                 error_analysis_result,
                             )  # save to working trace error record, for graph update
+                            self.knowledgebase.mark_dirty("working_trace_error_analysis", target_task_information)
 
             self.current_generated_trace_count = len(evolving_trace)
             return None
@@ -445,6 +451,28 @@ class FactorGraphRAGStrategy(RAGStrategy):
         knowledge_sampler: float = 1.0,
     ) -> QueriedKnowledge | None:
         # queried_component_knowledge = FactorQueriedGraphComponentKnowledge()
+        # The embedding similarity of all the queried tasks is calculated at once (one embedding round-trip)
+        knowledge_base_success_task_list = list(self.knowledgebase.success_task_to_knowledge_dict)
+        queried_task_information_list = [
+            target_factor_task.get_task_information()
+            for target_factor_task in evo.sub_tasks
+            if target_factor_task.get_task_information() not in self.knowledgebase.success_task_to_knowledge_dict
+            and target_factor_task.get_task_information()
+            not in factor_implementation_queried_graph_knowledge.failed_task_info_set
+        ]
+        task_to_similarity = (
+            dict(
+                zip(
+                    queried_task_information_list,
+                    calculate_embedding_distance_between_str_list(
+                        queried_task_information_list,
+                        knowledge_base_success_task_list,
+                    ),
+                ),
+            )
+            if queried_task_information_list and knowledge_base_success_task_list
+            else {}
+        )
         for target_factor_task in evo.sub_tasks:
             target_factor_task_information = target_factor_task.get_task_information()
             if (
@@ -513,12 +541,7 @@ class FactorGraphRAGStrategy(RAGStrategy):
                             ].append(target_knowledge)
 
                 # finally add embedding related knowledge
-                knowledge_base_success_task_list = list(self.knowledgebase.success_task_to_knowledge_dict)
-
-                similarity = calculate_embedding_distance_between_str_list(
-                    [target_factor_task_information],
-                    knowledge_base_success_task_list,
-                )[0]
+                similarity = task_to_similarity.get(target_factor_task_information, [])
                 similar_indexes = sorted(
                     range(len(similarity)),
                     key=lambda i: similarity[i],
@@ -577,6 +600,34 @@ class FactorGraphRAGStrategy(RAGStrategy):
 
         return factor_implementation_queried_graph_knowledge
 
+    def _get_last_error_analysis_result(
+        self,
+        target_factor_task_information: str,
+        factor_implementation_queried_graph_knowledge: FactorQueriedGraphKnowledge,
+    ) -> list[UndirectedNode | str]:
+        """
+        Get the error analysis result of the last queried former trace of the task
+        (empty if the task is already finished or has no former trace).
+        """
+        if (
+            target_factor_task_information in self.knowledgebase.success_task_to_knowledge_dict
+            or target_factor_task_information in factor_implementation_queried_graph_knowledge.failed_task_info_set
+        ):
+            return []
+        if (
+            target_factor_task_information in self.knowledgebase.working_trace_error_analysis
+            and len(self.knowledgebase.working_trace_error_analysis[target_factor_task_information]) > 0
+            and len(factor_implementation_queried_graph_knowledge.former_traces[target_factor_task_information]) > 0
+        ):
+            queried_last_trace = factor_implementation_queried_graph_knowledge.former_traces[
+                target_factor_task_information
+            ][-1]
+            target_index = self.knowledgebase.working_trace_knowledge[target_factor_task_information].index(
+                queried_last_trace,
+            )
+            return self.knowledgebase.working_trace_error_analysis[target_factor_task_information][target_index]
+        return []
+
     def error_query(
         self,
         evo: EvolvableSubjects,
@@ -585,6 +636,27 @@ class FactorGraphRAGStrategy(RAGStrategy):
         knowledge_sampler: float = 1.0,
     ) -> QueriedKnowledge | None:
         # queried_error_knowledge = FactorQueriedGraphErrorKnowledge()
+        # The error contents of all the tasks are matched to the error nodes at once (one embedding round-trip)
+        task_to_last_error_analysis_result = {
+            target_factor_task.get_task_information(): self._get_last_error_analysis_result(
+                target_factor_task.get_task_information(),
+                factor_implementation_queried_graph_knowledge,
+            )
+            for target_factor_task in evo.sub_tasks
+        }
+        error_content_list = list(
+            {
+                error_node: None
+                for last_error_analysis_result in task_to_last_error_analysis_result.values()
+                for error_node in last_error_analysis_result
+                if not isinstance(error_node, UndirectedNode)
+            },
+        )
+        error_content_to_node = (
+            dict(zip(error_content_list, self.knowledgebase.graph_get_nodes_by_content(error_content_list)))
+            if error_content_list
+            else {}
+        )
         for task_index, target_factor_task in enumerate(evo.sub_tasks):
             target_factor_task_information = target_factor_task.get_task_information()
             factor_implementation_queried_graph_knowledge.error_with_success_task[target_factor_task_information] = {}
@@ -599,28 +671,14 @@ class FactorGraphRAGStrategy(RAGStrategy):
                 factor_implementation_queried_graph_knowledge.error_with_success_task[
                     target_factor_task_information
                 ] = []
-                if (
-                    target_factor_task_information in self.knowledgebase.working_trace_error_analysis
-                    and len(self.knowledgebase.working_trace_error_analysis[target_factor_task_information]) > 0
-                    and len(factor_implementation_queried_graph_knowledge.former_traces[target_factor_task_information])
-                    > 0
-                ):
-                    queried_last_trace = factor_implementation_queried_graph_knowledge.former_traces[
-                        target_factor_task_information
-                    ][-1]
-                    target_index = self.knowledgebase.working_trace_knowledge[target_factor_task_information].index(
-                        queried_last_trace,
-                    )
-                    last_knowledge_error_analysis_result = self.knowledgebase.working_trace_error_analysis[
-                        target_factor_task_information
-                    ][target_index]
-                else:
-                    last_knowledge_error_analysis_result = []
+                last_knowledge_error_analysis_result = task_to_last_error_analysis_result[
+                    target_factor_task_information
+                ]
 
                 error_nodes = []
                 for error_node in last_knowledge_error_analysis_result:
                     if not isinstance(error_node, UndirectedNode):
-                        error_node = self.knowledgebase.graph_get_node_by_content(content=error_node)
+                        error_node = error_content_to_node[error_node]
                         if error_node is None:
                             continue
                     error_nodes.append(error_node)
@@ -713,6 +771,16 @@ class FactorGraphRAGStrategy(RAGStrategy):
 
 
 class FactorGraphKnowledgeBase(EvolvingKnowledgeBase):
+    # the dicts saved incrementally together with the graph by `dump_incremental`, a value changed in place must be
+    # reported by `mark_dirty`
+    INCREMENTAL_ATTRS = (
+        "working_trace_knowledge",
+        "working_trace_error_analysis",
+        "success_task_to_knowledge_dict",
+        "node_to_implementation_knowledge_dict",
+        "task_to_component_nodes",
+    )
+
     def __init__(self, init_component_list=None, path: str | Path = None) -> None:
         """
         Load knowledge, offer brief information of knowledge and common handle interfaces
@@ -727,19 +795,48 @@ class FactorGraphKnowledgeBase(EvolvingKnowledgeBase):
                 self.graph.add_nodes(node=node, neighbors=[])
 
         # A dict containing all working trace until they fail or succeed
-        self.working_trace_knowledge = {}
+        self.working_trace_knowledge = TrackedDict()
 
         # A dict containing error analysis each step aligned with working trace
-        self.working_trace_error_analysis = {}
+        self.working_trace_error_analysis = TrackedDict()
 
         # Add already success task
-        self.success_task_to_knowledge_dict = {}
+        self.success_task_to_knowledge_dict = TrackedDict()
 
         # key:node_id(for task trace and success implement), value:knowledge instance(aka 'FactorKnowledge')
-        self.node_to_implementation_knowledge_dict = {}
+        self.node_to_implementation_knowledge_dict = TrackedDict()
 
         # store the task description to component nodes
-        self.task_to_component_nodes = {}
+        self.task_to_component_nodes = TrackedDict()
+
+    @classmethod
+    def load_incremental(cls, path: str | Path) -> FactorGraphKnowledgeBase:
+        """Load the knowledge base saved by `dump_incremental`."""
+        knowledge_base = cls.__new__(cls)
+        EvolvingKnowledgeBase.__init__(knowledge_base, path=None)
+        knowledge_base.storage = AppendOnlyKnowledgeBaseStorage(path, attrs=cls.INCREMENTAL_ATTRS)
+        knowledge_base.storage.load(knowledge_base)
+        logger.info(f"Knowledge Graph loaded, size={knowledge_base.graph.size()}")
+        return knowledge_base
+
+    def dump_incremental(self, path: str | Path) -> None:
+        """Append the changes since the last save to the storage in directory `path`."""
+        storage = getattr(self, "storage", None)
+        if storage is None or storage.path != Path(path):
+            storage = self.storage = AppendOnlyKnowledgeBaseStorage(path, attrs=self.INCREMENTAL_ATTRS)
+        storage.save(self)
+
+    def __getstate__(self) -> dict:
+        # the storage is bound to a directory and is not part of the knowledge
+        state = self.__dict__.copy()
+        state.pop("storage", None)
+        return state
+
+    def mark_dirty(self, attr: str, key: str) -> None:
+        """Report that `getattr(self, attr)[key]` is changed in place, so it is saved by `dump_incremental`."""
+        target = getattr(self, attr)
+        if isinstance(target, TrackedDict):  # the knowledge base pickled before the dicts are tracked
+            target.mark_dirty(key)
 
     def get_all_nodes_by_label(self, label: str) -> list[UndirectedNode]:
         return self.graph.get_all_nodes_by_label(label)
@@ -776,6 +873,7 @@ class FactorGraphKnowledgeBase(EvolvingKnowledgeBase):
                             success_task_error_analysis_record[index][node_index] = new_error_node
                         else:
                             success_task_error_analysis_record[index][node_index] = queried_node
+                        self.mark_dirty("working_trace_error_analysis", success_task_info)
                 neighbor_nodes.extend(success_task_error_analysis_record[index])
                 self.graph.add_nodes(node=trace_node, neighbors=neighbor_nodes)
             else:
@@ -792,6 +890,9 @@ class FactorGraphKnowledgeBase(EvolvingKnowledgeBase):
     def graph_get_node_by_content(self, content: str) -> UndirectedNode:
         return self.graph.get_node_by_content(content=content)
 
+    def graph_get_nodes_by_content(self, contents: list[str]) -> list[UndirectedNode | None]:
+        return self.graph.get_nodes_by_content(contents=contents)
+
     def graph_query_by_content(
         self,
         content: Union[str, list[str]],
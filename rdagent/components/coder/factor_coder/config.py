@@ -20,6 +20,11 @@ class FactorImplementSettings(BaseSettings):
     data_folder_debug: str = "git_ignore_folder/factor_implementation_source_data_debug"
     """Path to the folder containing partial financial data (for debugging)"""
 
+    source_data_format: Literal["hdf", "feather"] = "hdf"
+    """Format of the source data and the factor values: "hdf" (`daily_pv.h5`, `result.h5`) or "feather"
+    (`daily_pv.feather`, `result.feather`; the Arrow IPC format which can be memory mapped, requires pyarrow).
+    The feather copies of the source data are saved when the data folders are generated"""
+
     cache_location: str = "git_ignore_folder/factor_implementation_execution_cache"
     """Path to the cache location"""
 
@@ -58,8 +63,25 @@ class FactorImplementSettings(BaseSettings):
     new_knowledge_base_path: Union[str, None] = None
     """Path to the new knowledge base"""
 
+    incremental_knowledge_base: bool = False
+    """Save the new knowledge base as an append-only directory which only appends the changes of each save,
+    instead of pickling the whole knowledge base every time"""
+
     python_bin: str = "python"
     """Path to the Python binary"""
 
+    execution_backend: Literal["subprocess", "worker_pool"] = "subprocess"
+    """Run each factor in a new `python_bin` process ("subprocess") or in the warm workers ("worker_pool")"""
+
+    execution_worker_num: Union[int, None] = None
+    """The max number of workers of each process running the factors; by default the CPUs are shared by the
+    `RD_AGENT_SETTINGS.multi_proc_n` processes"""
+
+    execution_worker_max_tasks: int = 50
+    """Restart a worker after running this number of factors"""
+
+    execution_worker_max_memory: int = 8192
+    """Restart a worker when its memory is over this size (MB)"""
+
 
 FACTOR_IMPLEMENT_SETTINGS = FactorImplementSettings()
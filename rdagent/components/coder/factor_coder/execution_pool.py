@@ -0,0 +1,141 @@
+"""
+Run the factor scripts in warm worker processes instead of starting a new interpreter for each execution.
+
+A worker (see `execution_worker.py`) has pandas & numpy imported and keeps the source data read by the former
+scripts in memory, so an execution only pays for the factor code itself. The workers are recycled after
+`FACTOR_CODER_EXECUTION_WORKER_MAX_TASKS` executions or when their memory grows over
+`FACTOR_CODER_EXECUTION_WORKER_MAX_MEMORY` MB; a worker which times out or changes the modules shared by the
+scripts (e.g. monkeypatches pandas) is killed.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import select
+import shlex
+import subprocess
+import threading
+from pathlib import Path
+
+from rdagent.components.coder.factor_coder.config import FACTOR_IMPLEMENT_SETTINGS
+from rdagent.components.coder.factor_coder.execution_worker import read_message, write_message
+from rdagent.core.conf import RD_AGENT_SETTINGS
+
+WORKER_SCRIPT = Path(__file__).parent / "execution_worker.py"
+
+
+class ExecutionWorker:
+    def __init__(self, python_bin: str) -> None:
+        self.process = subprocess.Popen(
+            [*shlex.split(python_bin), str(WORKER_SCRIPT)], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self.n_tasks = 0
+        self.rss = 0
+        self.dirty = False
+
+    def run(self, script: Path, cwd: Path, timeout: float | None) -> tuple[int, bytes]:
+        """run the script; raise `subprocess.TimeoutExpired` and leave the worker to be killed if it times out"""
+        self.n_tasks += 1
+        write_message(self.process.stdin, {"script": str(Path(script).absolute()), "cwd": str(Path(cwd).absolute())})
+        if not select.select([self.process.stdout], [], [], timeout)[0]:
+            raise subprocess.TimeoutExpired(str(script), timeout)
+        response = read_message(self.process.stdout)
+        if response is None:
+            returncode = self.process.wait()
+            return returncode or 1, f"The execution worker exited unexpectedly with code {returncode}.".encode()
+        self.rss = response["rss"]
+        self.dirty = response["dirty"]
+        return response["returncode"], response["output"]
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self) -> None:
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class FactorExecutionPool:
+    def __init__(self, python_bin: str, max_workers: int, max_tasks: int, max_memory: int) -> None:
+        self.python_bin = python_bin
+        self.max_tasks = max_tasks
+        self.max_memory = max_memory
+        self.idle: list[ExecutionWorker] = []
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(max_workers)
+
+    def run(self, script: Path, cwd: Path, timeout: float | None = None) -> tuple[int, bytes]:
+        """Run the script like `python <script>` in `cwd` and return the return code and the output."""
+        with self.slots:
+            with self.lock:
+                worker = self.idle.pop() if self.idle else None
+            if worker is None:
+                worker = ExecutionWorker(self.python_bin)
+            try:
+                result = worker.run(script, cwd, timeout)
+            except BaseException:
+                worker.close()
+                raise
+            if (
+                not worker.alive()
+                or worker.dirty
+                or worker.n_tasks >= self.max_tasks
+                or worker.rss > self.max_memory * 1024**2
+            ):
+                worker.close()
+            else:
+                with self.lock:
+                    self.idle.append(worker)
+            return result
+
+    def close(self) -> None:
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.close()
+
+
+_POOL: tuple[int, FactorExecutionPool] | None = None  # (pid, pool), the workers belong to the process creating them
+_POOL_LOCK = threading.Lock()
+
+
+def get_execution_pool() -> FactorExecutionPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL[0] != os.getpid():
+            max_workers = FACTOR_IMPLEMENT_SETTINGS.execution_worker_num or max(
+                1, (os.cpu_count() or 1) // max(1, RD_AGENT_SETTINGS.multi_proc_n)
+            )
+            pool = FactorExecutionPool(
+                FACTOR_IMPLEMENT_SETTINGS.python_bin,
+                max_workers,
+                FACTOR_IMPLEMENT_SETTINGS.execution_worker_max_tasks,
+                FACTOR_IMPLEMENT_SETTINGS.execution_worker_max_memory,
+            )
+            atexit.register(pool.close)
+            _POOL = (os.getpid(), pool)
+        return _POOL[1]
+
+
+def execute_factor_script(script: Path, cwd: Path, timeout: float | None) -> None:
+    """
+    Run the factor script in `cwd` by the backend in `FACTOR_IMPLEMENT_SETTINGS.execution_backend`.
+    It raises the same exceptions as `subprocess.check_output`: `subprocess.CalledProcessError` with the
+    output (stdout & stderr) if the script fails and `subprocess.TimeoutExpired`.
+    """
+    if FACTOR_IMPLEMENT_SETTINGS.execution_backend == "worker_pool" and os.name == "posix":
+        returncode, output = get_execution_pool().run(script, cwd, timeout)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, str(script), output=output)
+    else:
+        subprocess.check_output(
+            f"{FACTOR_IMPLEMENT_SETTINGS.python_bin} {script}",
+            shell=True,
+            cwd=cwd,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+        )
@@ -0,0 +1,226 @@
+"""
+A long-lived worker process running the factor scripts for `FactorExecutionPool`.
+
+It only depends on the standard library (pandas & numpy are preloaded if they are available), so it can be
+started by any `FACTOR_CODER_PYTHON_BIN`. The worker reads the requests from stdin and writes the responses
+into its original stdout, both are pickles prefixed by their length:
+
+- request: ``{"script": <path>, "cwd": <path>}``
+- response: ``{"returncode": <int>, "output": <bytes>, "rss": <bytes of memory>, "dirty": <bool>}``
+
+Each script is run like `python <script>` in `cwd`: its own namespace as ``__main__``, the folder of the
+script in `sys.path`, the output of the file descriptors 1 & 2 (including the output of the C extensions)
+captured together, and the modules imported from `cwd` are removed afterwards, so the next script imports
+its own `factor.py`.
+
+A script also starts from the global state of a new interpreter: the pandas options, the warning filters and
+the environment variables are restored and the random generators are reseeded before it runs. The other changes
+of the shared modules (e.g. a monkeypatched `pd.DataFrame` method) can't be undone, so the response is marked
+"dirty" and the worker is recycled.
+"""
+
+import os
+import pickle
+import runpy
+import struct
+import sys
+import tempfile
+import traceback
+import warnings
+from collections import OrderedDict
+
+HEADER = struct.Struct("<Q")
+MAX_CACHED_SOURCE_DATA = 4
+
+
+def read_message(f):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    return pickle.loads(f.read(HEADER.unpack(header)[0]))
+
+
+def write_message(f, obj) -> None:
+    data = pickle.dumps(obj, protocol=4)
+    f.write(HEADER.pack(len(data)) + data)
+    f.flush()
+
+
+def memory_usage() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        # the peak memory in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cache_source_data(pd) -> None:
+    """
+    Keep the source data (e.g. `daily_pv.h5`, `daily_pv.feather`) read by the scripts in memory. A script gets
+    a copy of the cached data, so it can modify the data freely.
+    """
+    cache = OrderedDict()
+
+    def cached(read):
+        def cached_read(path, *args, **kwargs):
+            if not isinstance(path, (str, os.PathLike)) or not os.path.isfile(path):
+                return read(path, *args, **kwargs)
+            real_path = os.path.realpath(path)
+            stat = os.stat(real_path)
+            key = repr((read.__name__, real_path, stat.st_size, stat.st_mtime_ns, args, sorted(kwargs.items())))
+            if key not in cache:
+                cache[key] = read(path, *args, **kwargs)
+                while len(cache) > MAX_CACHED_SOURCE_DATA:
+                    cache.popitem(last=False)
+            cache.move_to_end(key)
+            return cache[key].copy()
+
+        return cached_read
+
+    pd.read_hdf = cached(pd.read_hdf)
+    pd.read_feather = cached(pd.read_feather)
+
+
+def watched_objects() -> list:
+    """the modules & classes shared by the scripts, whose attributes are checked after each script"""
+    import builtins
+    import random
+
+    objects = [builtins, random]
+    for name in ("numpy", "numpy.random", "pandas"):
+        if name in sys.modules:
+            objects.append(sys.modules[name])
+    if "pandas" in sys.modules:
+        pd = sys.modules["pandas"]
+        objects.extend([pd.DataFrame, pd.Series, pd.Index])
+    return objects
+
+
+def attributes(obj) -> dict:
+    # the submodules are bound to their packages when they are imported, which is not a change of the state
+    return {k: id(v) for k, v in vars(obj).items() if not isinstance(v, type(sys))}
+
+
+class GlobalState:
+    """The global state of the worker before the first script."""
+
+    def __init__(self) -> None:
+        self.environ = dict(os.environ)
+        self.warning_filters = list(warnings.filters)
+        self.pandas_options = {}
+        if "pandas" in sys.modules:
+            from pandas._config import config
+
+            self.pandas_options = {
+                key: config.get_option(key)
+                for key in config._registered_options
+                if key not in config._deprecated_options
+            }
+        self.objects = [(obj, attributes(obj)) for obj in watched_objects()]
+
+    def reset(self) -> None:
+        """restore the state which the former script may change and reseed the random generators"""
+        import random
+
+        if dict(os.environ) != self.environ:
+            os.environ.clear()
+            os.environ.update(self.environ)
+        if warnings.filters != self.warning_filters:
+            warnings.filters[:] = self.warning_filters
+            # invalidate the `__warningregistry__` of the modules, like `warnings.catch_warnings`
+            getattr(warnings, "_filters_mutated", lambda: None)()
+        if self.pandas_options:
+            from pandas._config import config
+
+            for key, value in self.pandas_options.items():
+                current = config.get_option(key)
+                if current is not value and current != value:
+                    config.set_option(key, value)
+        random.seed()
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+
+    def changed(self) -> bool:
+        """whether the script has changed the shared modules & classes"""
+        return any(attributes(obj) != attrs for obj, attrs in self.objects)
+
+
+def run_script(script: str, cwd: str) -> int:
+    old_cwd, old_path, old_argv, old_modules = os.getcwd(), list(sys.path), sys.argv, set(sys.modules)
+    os.chdir(cwd)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # hide the frames of the worker & runpy before the script, like the traceback of `python <script>`
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for name in set(sys.modules) - old_modules:
+            module_file = getattr(sys.modules[name], "__file__", None) or ""
+            if os.path.abspath(module_file).startswith(os.path.abspath(cwd) + os.sep):
+                del sys.modules[name]
+        os.chdir(old_cwd)
+        sys.path[:] = old_path
+        sys.argv = old_argv
+
+
+def execute(script: str, cwd: str) -> tuple[int, bytes]:
+    with tempfile.TemporaryFile() as output:
+        saved_fds = os.dup(1), os.dup(2)
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        try:
+            returncode = run_script(script, cwd)
+        finally:
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            os.close(saved_fds[0])
+            os.close(saved_fds[1])
+        output.seek(0)
+        return returncode, output.read()
+
+
+def main() -> None:
+    # the modules next to the worker (e.g. rdagent's `factor.py`) must not shadow the modules of the scripts
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    requests = sys.stdin.buffer
+    responses = os.fdopen(os.dup(1), "wb")
+    # the output of the scripts never goes into the responses
+    os.dup2(2, 1)
+    try:
+        import numpy  # noqa: F401
+        import pandas as pd
+
+        cache_source_data(pd)
+    except ImportError:
+        pass
+
+    state = GlobalState()
+    while (request := read_message(requests)) is not None:
+        state.reset()
+        returncode, output = execute(request["script"], request["cwd"])
+        write_message(
+            responses,
+            {"returncode": returncode, "output": output, "rss": memory_usage(), "dirty": state.changed()},
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import pickle
 import subprocess
 import uuid
 from pathlib import Path
@@ -10,12 +9,16 @@ import pandas as pd
 from filelock import FileLock
 
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
+from rdagent.components.coder.execution_cache import get_execution_cache
 from rdagent.components.coder.factor_coder.config import FACTOR_IMPLEMENT_SETTINGS
+from rdagent.components.coder.factor_coder.execution_pool import execute_factor_script
 from rdagent.core.exception import CodeFormatError, CustomRuntimeError, NoOutputError
 from rdagent.core.experiment import Experiment, FBWorkspace, Task
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import md5_hash
 
+RESULT_FILE_NAMES = {"hdf": "result.h5", "feather": "result.feather"}
+
 
 class FactorTask(Task):
     # TODO:  generalized the attributes into the Task
@@ -98,7 +101,7 @@ class FactorFBWorkspace(FBWorkspace):
         if call_factor_py is True:
             4. execute the code
         else:
-            4. generate a script from template to import the factor.py dump get the factor value to result.h5
+            4. generate a script from template to import the factor.py dump get the factor value to result.h5 (or result.feather)
         5. read the factor value from the output file in the workspace path folder
         returns the execution feedback as a string and the factor value as a pandas dataframe
 
@@ -111,18 +114,24 @@ class FactorFBWorkspace(FBWorkspace):
                 raise CodeFormatError(self.FB_CODE_NOT_SET)
             else:
                 return self.FB_CODE_NOT_SET, None
-        with FileLock(self.workspace_path / "execution.lock"):
-            if FACTOR_IMPLEMENT_SETTINGS.enable_execution_cache:
-                # NOTE: cache the result for the same code and same data type
-                target_file_name = md5_hash(data_type + self.code_dict["factor.py"])
-                cache_file_path = Path(FACTOR_IMPLEMENT_SETTINGS.cache_location) / f"{target_file_name}.pkl"
-                Path(FACTOR_IMPLEMENT_SETTINGS.cache_location).mkdir(exist_ok=True, parents=True)
-                if cache_file_path.exists() and not self.raise_exception:
-                    cached_res = pickle.load(open(cache_file_path, "rb"))
-                    if store_result and cached_res[1] is not None:
-                        self.executed_factor_value_dataframe = cached_res[1]
-                    return cached_res
+        if not FACTOR_IMPLEMENT_SETTINGS.enable_execution_cache:
+            return self._execute(store_result, data_type)
+        # NOTE: cache the result for the same code and same data type; the concurrent executions of the same code
+        # wait for the first one and reuse its result
+        execution_feedback, executed_factor_value_dataframe = get_execution_cache(
+            FACTOR_IMPLEMENT_SETTINGS.cache_location
+        ).get_or_compute(
+            md5_hash(data_type + self.code_dict["factor.py"]),
+            lambda: self._execute(store_result, data_type),
+            reuse=not self.raise_exception,
+            cacheable=lambda res: res[0] != self.FB_FROM_CACHE,
+        )
+        if store_result and executed_factor_value_dataframe is not None:
+            self.executed_factor_value_dataframe = executed_factor_value_dataframe
+        return execution_feedback, executed_factor_value_dataframe
 
+    def _execute(self, store_result: bool, data_type: str) -> Tuple[str, pd.DataFrame]:
+        with FileLock(self.workspace_path / "execution.lock"):
             if self.executed_factor_value_dataframe is not None:
                 return self.FB_FROM_CACHE, self.executed_factor_value_dataframe
 
@@ -155,11 +164,9 @@ class FactorFBWorkspace(FBWorkspace):
                 execution_code_path.write_text((Path(__file__).parent / "factor_execution_template.txt").read_text())
 
             try:
-                subprocess.check_output(
-                    f"{FACTOR_IMPLEMENT_SETTINGS.python_bin} {execution_code_path}",
-                    shell=True,
+                execute_factor_script(
+                    execution_code_path,
                     cwd=self.workspace_path,
-                    stderr=subprocess.STDOUT,
                     timeout=FACTOR_IMPLEMENT_SETTINGS.file_based_execution_timeout,
                 )
                 execution_success = True
@@ -182,13 +189,18 @@ class FactorFBWorkspace(FBWorkspace):
                 if self.raise_exception:
                     raise CustomRuntimeError(execution_feedback)
 
-            workspace_output_file_path = self.workspace_path / "result.h5"
+            # the template of the kaggle factors (version 2) always saves the values in hdf
+            result_format = FACTOR_IMPLEMENT_SETTINGS.source_data_format if self.target_task.version == 1 else "hdf"
+            workspace_output_file_path = self.workspace_path / RESULT_FILE_NAMES[result_format]
             if workspace_output_file_path.exists() and execution_success:
                 try:
-                    executed_factor_value_dataframe = pd.read_hdf(workspace_output_file_path)
+                    if result_format == "feather":
+                        executed_factor_value_dataframe = pd.read_feather(workspace_output_file_path)
+                    else:
+                        executed_factor_value_dataframe = pd.read_hdf(workspace_output_file_path)
                     execution_feedback += self.FB_OUTPUT_FILE_FOUND
                 except Exception as e:
-                    execution_feedback += f"Error found when reading hdf file: {e}"[:1000]
+                    execution_feedback += f"Error found when reading {result_format} file: {e}"[:1000]
                     executed_factor_value_dataframe = None
             else:
                 execution_feedback += self.FB_OUTPUT_FILE_NOT_FOUND
@@ -199,11 +211,6 @@ class FactorFBWorkspace(FBWorkspace):
             if store_result and executed_factor_value_dataframe is not None:
                 self.executed_factor_value_dataframe = executed_factor_value_dataframe
 
-        if FACTOR_IMPLEMENT_SETTINGS.enable_execution_cache:
-            pickle.dump(
-                (execution_feedback, executed_factor_value_dataframe),
-                open(cache_file_path, "wb"),
-            )
         return execution_feedback, executed_factor_value_dataframe
 
     def __str__(self) -> str:
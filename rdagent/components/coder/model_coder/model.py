@@ -1,9 +1,9 @@
-import pickle
 import site
 import traceback
 from pathlib import Path
 from typing import Dict, Optional
 
+from rdagent.components.coder.execution_cache import get_execution_cache
 from rdagent.components.coder.model_coder.conf import MODEL_IMPL_SETTINGS
 from rdagent.core.experiment import Experiment, FBWorkspace, Task
 from rdagent.oai.llm_utils import md5_hash
@@ -83,21 +83,47 @@ class ModelFBWorkspace(FBWorkspace):
         super().execute()
         try:
             if MODEL_IMPL_SETTINGS.enable_execution_cache:
-                # NOTE: cache the result for the same code
+                # NOTE: cache the result for the same code; the concurrent executions of the same code wait for the
+                # first one and reuse its result
                 target_file_name = f"{batch_size}_{num_features}_{num_timesteps}_{input_value}_{param_init_value}"
                 for code_file_name in sorted(list(self.code_dict.keys())):
                     target_file_name = f"{target_file_name}_{self.code_dict[code_file_name]}"
-                target_file_name = md5_hash(target_file_name)
-                cache_file_path = Path(MODEL_IMPL_SETTINGS.cache_location) / f"{target_file_name}.pkl"
-                Path(MODEL_IMPL_SETTINGS.cache_location).mkdir(exist_ok=True, parents=True)
-                if cache_file_path.exists():
-                    return pickle.load(open(cache_file_path, "rb"))
+                execution_feedback_str, execution_model_output = get_execution_cache(
+                    MODEL_IMPL_SETTINGS.cache_location
+                ).get_or_compute(
+                    md5_hash(target_file_name),
+                    lambda: self._run(
+                        batch_size, num_features, num_timesteps, num_edges, input_value, param_init_value
+                    ),
+                )
+            else:
+                execution_feedback_str, execution_model_output = self._run(
+                    batch_size, num_features, num_timesteps, num_edges, input_value, param_init_value
+                )
+        except Exception as e:
+            execution_feedback_str = f"Execution error: {e}\nTraceback: {traceback.format_exc()}"
+            execution_model_output = None
 
-            qtde = QTDockerEnv() if self.target_task.version == 1 else KGDockerEnv()
-            qtde.prepare()
+        if len(execution_feedback_str) > 2000:
+            execution_feedback_str = (
+                execution_feedback_str[:1000] + "....hidden long error message...." + execution_feedback_str[-1000:]
+            )
+        return execution_feedback_str, execution_model_output
 
-            if self.target_task.version == 1:
-                dump_code = f"""
+    def _run(
+        self,
+        batch_size: int,
+        num_features: int,
+        num_timesteps: int,
+        num_edges: int,
+        input_value: float,
+        param_init_value: float,
+    ) -> tuple:
+        qtde = QTDockerEnv() if self.target_task.version == 1 else KGDockerEnv()
+        qtde.prepare()
+
+        if self.target_task.version == 1:
+            dump_code = f"""
 MODEL_TYPE = "{self.target_task.model_type}"
 BATCH_SIZE = {batch_size}
 NUM_FEATURES = {num_features}
@@ -107,34 +133,19 @@ INPUT_VALUE = {input_value}
 PARAM_INIT_VALUE = {param_init_value}
 {(Path(__file__).parent / 'model_execute_template_v1.txt').read_text()}
 """
-            elif self.target_task.version == 2:
-                dump_code = (Path(__file__).parent / "model_execute_template_v2.txt").read_text()
-
-            log, results = qtde.dump_python_code_run_and_get_results(
-                code=dump_code,
-                dump_file_names=["execution_feedback_str.pkl", "execution_model_output.pkl"],
-                local_path=str(self.workspace_path),
-                env={},
-                code_dump_file_py_name="model_test",
-            )
-            if results is None:
-                raise RuntimeError(f"Error in running the model code: {log}")
-            [execution_feedback_str, execution_model_output] = results
-
-            if MODEL_IMPL_SETTINGS.enable_execution_cache:
-                pickle.dump(
-                    (execution_feedback_str, execution_model_output),
-                    open(cache_file_path, "wb"),
-                )
-
-        except Exception as e:
-            execution_feedback_str = f"Execution error: {e}\nTraceback: {traceback.format_exc()}"
-            execution_model_output = None
-
-        if len(execution_feedback_str) > 2000:
-            execution_feedback_str = (
-                execution_feedback_str[:1000] + "....hidden long error message...." + execution_feedback_str[-1000:]
-            )
+        elif self.target_task.version == 2:
+            dump_code = (Path(__file__).parent / "model_execute_template_v2.txt").read_text()
+
+        log, results = qtde.dump_python_code_run_and_get_results(
+            code=dump_code,
+            dump_file_names=["execution_feedback_str.pkl", "execution_model_output.pkl"],
+            local_path=str(self.workspace_path),
+            env={},
+            code_dump_file_py_name="model_test",
+        )
+        if results is None:
+            raise RuntimeError(f"Error in running the model code: {log}")
+        execution_feedback_str, execution_model_output = results
         return execution_feedback_str, execution_model_output
 
 
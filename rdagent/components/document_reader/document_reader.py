@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import io
+import os
+import uuid
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -15,6 +18,8 @@ if TYPE_CHECKING:
     from langchain_core.documents import Document
 
 from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.utils import multiprocessing_wrapper
+from rdagent.log import rdagent_logger as logger
 
 
 def load_documents_by_langchain(path: str) -> list:
@@ -60,8 +65,83 @@ def process_documents_by_langchain(docs: list[Document]) -> dict[str, str]:
     return content_dict
 
 
+# (resolved path, size, mtime) -> md5 of the file, so a report is only hashed once for all its cached derivatives
+_FILE_DIGESTS: dict[tuple[str, int, int], str] = {}
+
+
+def _file_digest(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _FILE_DIGESTS:
+        md5 = hashlib.md5()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                md5.update(chunk)
+        _FILE_DIGESTS[key] = md5.hexdigest()
+    return _FILE_DIGESTS[key]
+
+
+def _cache_path(path: Path, suffix: str) -> Path | None:
+    """the path of the cached `suffix` of the document, None if the cache is off or the document is not a file"""
+    if not RD_AGENT_SETTINGS.use_document_cache or not path.is_file():
+        return None
+    return Path(RD_AGENT_SETTINGS.document_cache_path) / f"{_file_digest(path)}{suffix}"
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _extract_pdf_text(path: str) -> str | None:
+    """the text of all the pages of the PDF, None if it has no pages"""
+    docs = PyPDFLoader(path).load()
+    return "".join(doc.page_content for doc in docs) if docs else None
+
+
+def load_pdf_text(path: str | Path) -> str | None:
+    """
+    Load the text of a PDF file. The text is cached by the hash of the file in
+    `RD_AGENT_SETTINGS.document_cache_path`, so a report is only parsed once.
+    """
+    path = Path(path)
+    cache_path = _cache_path(path, ".txt")
+    if cache_path is not None and cache_path.exists():
+        return cache_path.read_text(encoding="utf-8")
+    text = _extract_pdf_text(str(path))
+    if cache_path is not None and text is not None:
+        _atomic_write(cache_path, text.encode("utf-8"))
+    return text
+
+
+def _load_pdf_text_silently(path: str) -> str | None:
+    try:
+        return load_pdf_text(path)
+    except Exception as e:
+        logger.warning(f"Failed to load {path}: {e}")
+        return None
+
+
 def load_and_process_pdfs_by_langchain(path: str) -> dict[str, str]:
-    return process_documents_by_langchain(load_documents_by_langchain(path))
+    """
+    Load the text of the PDF file or all the PDF files in the folder; the keys are the absolute paths.
+
+    The texts are cached (see `load_pdf_text`), and the files of a folder which are not in the cache are parsed by
+    `RD_AGENT_SETTINGS.multi_proc_n` processes.
+    """
+    if not Path(path).exists():
+        # e.g. the URL of a PDF file
+        return process_documents_by_langchain(load_documents_by_langchain(path))
+    if not Path(path).is_dir():
+        file = str(Path(path).resolve())
+        text = load_pdf_text(file)
+        return {} if text is None else {file: text}
+    # the same files as `PyPDFDirectoryLoader`, the broken files are skipped
+    files = sorted(str(p.resolve()) for p in Path(path).glob("**/[!.]*.pdf") if p.is_file())
+    texts = multiprocessing_wrapper([(_load_pdf_text_silently, (f,)) for f in files], n=RD_AGENT_SETTINGS.multi_proc_n)
+    return {f: text for f, text in zip(files, texts) if text is not None}
 
 
 def load_and_process_one_pdf_by_azure_document_intelligence(
@@ -110,6 +190,10 @@ def load_and_process_pdfs_by_azure_document_intelligence(path: Path) -> dict[str
 
 
 def extract_first_page_screenshot_from_pdf(pdf_path: str) -> Image:
+    cache_path = _cache_path(Path(pdf_path), ".png")
+    if cache_path is not None and cache_path.exists():
+        return Image.open(cache_path).convert("RGB")
+
     if not Path(pdf_path).exists():
         doc = fitz.open(stream=io.BytesIO(requests.get(pdf_path).content), filetype="pdf")
     else:
@@ -118,4 +202,8 @@ def extract_first_page_screenshot_from_pdf(pdf_path: str) -> Image:
     pix = page.get_pixmap()
     image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
 
+    if cache_path is not None:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        _atomic_write(cache_path, buffer.getvalue())
     return image
@@ -8,7 +8,7 @@ from typing import Any, NoReturn
 
 from rdagent.components.knowledge_management.vector_base import (
     KnowledgeMetaData,
-    PDVectorBase,
+    NPVectorBase,
     VectorBase,
     cosine,
 )
@@ -55,8 +55,66 @@ class Graph(KnowledgeBase):
 
     def __init__(self, path: str | Path | None = None) -> None:
         self.nodes = {}
+        self._reset_index()
+        # The changes since the last incremental save, None means the changes are not recorded.
+        # (see `rdagent.components.knowledge_management.storage`)
+        self._journal: list[tuple] | None = None
         super().__init__(path=path)
 
+    def _reset_index(self) -> None:
+        # (content, label) -> {node_id: node} and label -> {node_id: node}, both keep the insertion order of nodes
+        self._content_label_index: dict[tuple[str, str], dict[str, Node]] = {}
+        self._label_index: dict[str, dict[str, Node]] = {}
+        # node_id -> insertion sequence, to keep the order of `self.nodes` when merging several labels
+        self._node_order: dict[str, int] = {}
+        self._node_order_counter = 0
+
+    def _rebuild_index(self) -> None:
+        self._reset_index()
+        for node in self.nodes.values():
+            self._index_node(node)
+
+    def _index_node(self, node: Node) -> None:
+        self._content_label_index.setdefault((node.content, node.label), {})[node.id] = node
+        self._label_index.setdefault(node.label, {})[node.id] = node
+        if node.id not in self._node_order:
+            self._node_order[node.id] = self._node_order_counter
+            self._node_order_counter += 1
+
+    def _unindex_node(self, node: Node) -> None:
+        for index, key in ((self._content_label_index, (node.content, node.label)), (self._label_index, node.label)):
+            index.get(key, {}).pop(node.id, None)
+            if key in index and not index[key]:
+                del index[key]
+        self._node_order.pop(node.id, None)
+
+    def load(self) -> None:
+        super().load()
+        # the graph may be pickled before the indexes are introduced, so they are always rebuilt after loading.
+        self._rebuild_index()
+        self._journal = None
+
+    def enable_journal(self) -> None:
+        """Start recording the added/removed nodes and the added edges."""
+        self._journal = []
+
+    def pop_journal(self) -> list[tuple] | None:
+        """Return the changes recorded since the last call and start a new record."""
+        journal = self._journal
+        if journal is not None:
+            self._journal = []
+        return journal
+
+    def _record(self, *change: Any) -> None:
+        self._version = getattr(self, "_version", 0) + 1
+        if getattr(self, "_journal", None) is not None:
+            self._journal.append(change)
+
+    @property
+    def snapshot_version(self) -> int:
+        """changed whenever a node or an edge is added or removed (see `rdagent.utils.snapshot`)"""
+        return getattr(self, "_version", 0)
+
     def size(self) -> int:
         return len(self.nodes)
 
@@ -66,17 +124,36 @@ class Graph(KnowledgeBase):
     def add_node(self, **kwargs: Any) -> NoReturn:
         raise NotImplementedError
 
+    def _register_node(self, node: Node) -> None:
+        """put the node into `self.nodes` and keep the indexes consistent"""
+        if node.id in self.nodes:
+            self._unindex_node(self.nodes[node.id])
+        self.nodes[node.id] = node
+        self._index_node(node)
+        self._record("node", node)
+
+    def remove_node(self, node_id: str) -> Node | None:
+        node = self.nodes.pop(node_id, None)
+        if node is not None:
+            self._unindex_node(node)
+            self._record("remove", node_id)
+        return node
+
     def get_all_nodes(self) -> list[Node]:
         return list(self.nodes.values())
 
+    def get_all_nodes_by_label(self, label: str) -> list[Node]:
+        return list(self._label_index.get(label, {}).values())
+
     def get_all_nodes_by_label_list(self, label_list: list[str]) -> list[Node]:
-        return [node for node in self.nodes.values() if node.label in label_list]
+        nodes = [node for label in dict.fromkeys(label_list) for node in self._label_index.get(label, {}).values()]
+        if len(label_list) > 1:
+            nodes.sort(key=lambda node: self._node_order[node.id])
+        return nodes
 
     def find_node(self, content: str, label: str) -> Node | None:
-        for node in self.nodes.values():
-            if node.content == content and node.label == label:
-                return node
-        return None
+        nodes = self._content_label_index.get((content, label))
+        return next(iter(nodes.values())) if nodes else None
 
     @staticmethod
     def batch_embedding(nodes: list[Node]) -> list[Node]:
@@ -104,7 +181,7 @@ class UndirectedGraph(Graph):
     """
 
     def __init__(self, path: str | Path | None = None) -> None:
-        self.vector_base: VectorBase = PDVectorBase()
+        self.vector_base: VectorBase = NPVectorBase()
         super().__init__(path=path)
 
     def __str__(self) -> str:
@@ -131,8 +208,8 @@ class UndirectedGraph(Graph):
         """
         if self.get_node(node.id):
             node = self.get_node(node.id)
-        elif self.find_node(content=node.content, label=node.label):
-            node = self.find_node(content=node.content, label=node.label)
+        elif (same_node := self.find_node(content=node.content, label=node.label)) is not None:
+            node = same_node
         else:
             # same_node = self.semantic_search(node=node.content, similarity_threshold=same_node_threshold, topk_k=1)
             # if len(same_node):
@@ -140,13 +217,13 @@ class UndirectedGraph(Graph):
             # else:
             node.create_embedding()
             self.vector_base.add(document=node)
-            self.nodes.update({node.id: node})
+            self._register_node(node)
 
         if neighbor is not None:
             if self.get_node(neighbor.id):
                 neighbor = self.get_node(neighbor.id)
-            elif self.find_node(content=neighbor.content, label=node.label):
-                neighbor = self.find_node(content=neighbor.content, label=node.label)
+            elif (same_neighbor := self.find_node(content=neighbor.content, label=node.label)) is not None:
+                neighbor = same_neighbor
             else:
                 # same_node = self.semantic_search(node=neighbor.content,
                 #                                  similarity_threshold=same_node_threshold, topk_k=1)
@@ -155,9 +232,10 @@ class UndirectedGraph(Graph):
                 # else:
                 neighbor.create_embedding()
                 self.vector_base.add(document=neighbor)
-                self.nodes.update({neighbor.id: neighbor})
+                self._register_node(neighbor)
 
             node.add_neighbor(neighbor)
+            self._record("edge", node.id, neighbor.id)
 
     def add_nodes(self, node: UndirectedNode, neighbors: list[UndirectedNode]) -> None:
         if not neighbors:
@@ -187,6 +265,15 @@ class UndirectedGraph(Graph):
             return match[0]
         return None
 
+    def get_nodes_by_content(self, contents: list[str]) -> list[UndirectedNode | None]:
+        """
+        The batched version of `get_node_by_content`; all the contents are searched with one embedding request.
+        """
+        return [
+            match[0] if match else None
+            for match in self.batch_semantic_search(nodes=contents, similarity_threshold=0.999, topk_k=1)
+        ]
+
     def get_nodes_within_steps(
         self,
         start_node: UndirectedNode,
@@ -292,11 +379,53 @@ class UndirectedGraph(Graph):
             topk_k=topk_k,
             similarity_threshold=similarity_threshold,
         )
-        return [self.get_node(doc.id) for doc in docs]
+        return [self.get_node(doc.id) for doc in docs if doc.id in self.nodes]
+
+    def batch_semantic_search(
+        self,
+        nodes: list[UndirectedNode | str],
+        similarity_threshold: float = 0.0,
+        topk_k: int = 5,
+    ) -> list[list[UndirectedNode]]:
+        """
+        semantic search several nodes at once; the result of each node is the same as `semantic_search`.
+        The contents are embedded in one request and searched together by the vector base.
+
+        Parameters
+        ----------
+        nodes
+        similarity_threshold
+        topk_k
+
+        Returns
+        -------
+        the similar nodes of each input node
+        """
+        contents = [node if isinstance(node, str) else node.content for node in nodes]
+        results = self.vector_base.batch_search(
+            contents=contents,
+            topk_k=topk_k,
+            similarity_threshold=similarity_threshold,
+        )
+        return [[self.get_node(doc.id) for doc in docs if doc.id in self.nodes] for docs, _ in results]
+
+    def remove_node(self, node_id: str) -> UndirectedNode | None:
+        """
+        Remove the node, its edges and its embedding in the vector base.
+        """
+        node = super().remove_node(node_id)
+        if node is not None:
+            self.vector_base.remove(node_id)
+            for neighbor in list(node.neighbors):
+                node.remove_neighbor(neighbor)
+        return node
 
     def clear(self) -> None:
+        for node_id in list(self.nodes):
+            self._record("remove", node_id)
         self.nodes.clear()
-        self.vector_base: VectorBase = PDVectorBase()
+        self._reset_index()
+        self.vector_base: VectorBase = NPVectorBase()
 
     def query_by_node(
         self,
@@ -381,13 +510,12 @@ class UndirectedGraph(Graph):
             content = [content]
 
         res_list = []
-        for query in content:
-            similar_nodes = self.semantic_search(
-                content=query,
-                topk_k=topk_k,
-                similarity_threshold=similarity_threshold,
-            )
-
+        similar_nodes_list = self.batch_semantic_search(
+            nodes=content,
+            topk_k=topk_k,
+            similarity_threshold=similarity_threshold,
+        )
+        for similar_nodes in similar_nodes_list:
             connected_nodes = []
             for node in similar_nodes:
                 graph_query_node_res = self.query_by_node(
@@ -0,0 +1,390 @@
+"""
+Append-only persistence for knowledge bases which hold an `UndirectedGraph`.
+
+Pickling the whole knowledge base on every save rewrites all the nodes, their embeddings and the
+dicts of knowledge again and again, so the cost of a save grows with the size of the knowledge
+base instead of the size of the changes. The storage here writes a full copy once and then only
+appends what changed since the last save; the changes are recorded where they happen (the journal
+of the graph and the dirty keys of `TrackedDict`), so a save doesn't visit the unchanged knowledge.
+
+Layout of the storage directory:
+
+- ``CURRENT``: the generation in use, it is replaced atomically after a compaction.
+- ``log.{generation}.pkl``: a sequence of batches, one per save. A batch is a pickled header followed by the
+  pickled values of the changed keys, so the values can be read one by one when they are accessed.
+- ``embeddings.{generation}.f32``: the node embeddings as raw float32 rows, memory mapped when loading and
+  searched in place by the vector base of the graph.
+
+A batch which is not completely written (e.g. the process is killed while saving) is dropped
+together with everything after it when loading.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+from collections.abc import Iterator, MutableMapping
+from pathlib import Path
+from typing import Any, Sequence
+
+import dill as pickle  # type: ignore[import-untyped]
+import numpy as np
+
+from rdagent.components.knowledge_management.graph import UndirectedGraph, UndirectedNode
+from rdagent.log import rdagent_logger as logger
+
+
+class _NodeRefPickler(pickle.Pickler):
+    """Pickle the nodes registered in the graph as references to their ids."""
+
+    def __init__(self, file: io.BytesIO, graph: UndirectedGraph) -> None:
+        super().__init__(file)
+        self.graph = graph
+
+    def persistent_id(self, obj: Any) -> str | None:
+        if isinstance(obj, UndirectedNode) and self.graph.nodes.get(obj.id) is obj:
+            return obj.id
+        return None
+
+
+class _NodeRefUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, nodes: dict[str, UndirectedNode]) -> None:
+        super().__init__(file)
+        self.nodes = nodes
+
+    def persistent_load(self, pid: str) -> UndirectedNode:
+        return self.nodes[pid]
+
+
+class _LazyValue:
+    """A value in the log which is unpickled when it is accessed for the first time."""
+
+    def __init__(self, log_file: Path, offset: int, size: int, nodes: dict[str, UndirectedNode]) -> None:
+        self.log_file = log_file
+        self.offset = offset
+        self.size = size
+        self.nodes = nodes
+
+    def load(self) -> Any:
+        with self.log_file.open("rb") as f:
+            f.seek(self.offset)
+            return _NodeRefUnpickler(io.BytesIO(f.read(self.size)), self.nodes).load()
+
+
+class TrackedDict(MutableMapping):
+    """
+    A dict which records the keys set or deleted since the last save of `AppendOnlyKnowledgeBaseStorage`.
+
+    A value changed in place (e.g. a list appended) is not seen by the dict, the owner reports it by `mark_dirty`.
+    The values loaded by the storage are only unpickled when they are accessed.
+    """
+
+    def __init__(self, data: dict | None = None) -> None:
+        self._data: dict[Any, Any] = dict(data or {})
+        self._dirty: dict[Any, None] = {}
+        self._version = 0
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._data[key]
+        if isinstance(value, _LazyValue):
+            value = self._data[key] = value.load()
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self.mark_dirty(key)
+
+    def __delitem__(self, key: Any) -> None:
+        del self._data[key]
+        self.mark_dirty(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def __reduce__(self) -> tuple:
+        return type(self), (dict(self.items()),)
+
+    def mark_dirty(self, key: Any) -> None:
+        self._dirty[key] = None
+        self._version += 1
+
+    @property
+    def snapshot_version(self) -> int:
+        """changed whenever a key is set, deleted or marked dirty (see `rdagent.utils.snapshot`)"""
+        return self._version
+
+    def pop_dirty(self) -> list:
+        dirty, self._dirty = list(self._dirty), {}
+        return dirty
+
+    def is_loaded(self, key: Any) -> bool:
+        return not isinstance(self._data[key], _LazyValue)
+
+
+class AppendOnlyKnowledgeBaseStorage:
+    """
+    Save `knowledge_base.<graph_attr>` and the dict attributes `attrs` of a knowledge base incrementally.
+
+    - The graph changes come from the journal of the graph (see `Graph.enable_journal`).
+    - The dict attributes are kept as `TrackedDict`s (a plain dict is replaced by one at the first save), and only
+      the values of their dirty keys are pickled and appended.
+    - `load` replays the log without unpickling the values, each value is read from its offset in the log when it
+      is accessed.
+    - The log is rewritten (compacted) when more than `compact_ratio` of its records are overwritten.
+    """
+
+    COMPACT_MIN_RECORDS = 1000
+
+    def __init__(
+        self,
+        path: str | Path,
+        attrs: Sequence[str] = (),
+        graph_attr: str = "graph",
+        compact_ratio: float = 0.5,
+    ) -> None:
+        self.path = Path(path)
+        self.attrs = list(attrs)
+        self.graph_attr = graph_attr
+        self.compact_ratio = compact_ratio
+
+        self.generation = 0
+        self.dim: int | None = None
+        self.n_records = 0
+        self.graph: UndirectedGraph | None = None
+        # attr -> the dict whose dirty keys are saved
+        self._tracked: dict[str, TrackedDict] = {}
+
+    # paths
+    def _current_file(self) -> Path:
+        return self.path / "CURRENT"
+
+    def _log_file(self, generation: int) -> Path:
+        return self.path / f"log.{generation}.pkl"
+
+    def _embedding_file(self, generation: int) -> Path:
+        return self.path / f"embeddings.{generation}.f32"
+
+    def exists(self) -> bool:
+        return self._current_file().exists()
+
+    # save
+    def _dumps(self, obj: Any) -> bytes:
+        buffer = io.BytesIO()
+        _NodeRefPickler(buffer, self.graph).dump(obj)
+        return buffer.getvalue()
+
+    def _attr_changes(self, knowledge_base: Any) -> list[tuple] | None:
+        """the changes of the dirty keys, None if a dict is replaced and its changes are unknown"""
+        if any(getattr(knowledge_base, attr) is not self._tracked.get(attr) for attr in self.attrs):
+            return None
+        changes = []
+        for attr, current in self._tracked.items():
+            for key in current.pop_dirty():
+                changes.append(("set", attr, key, current[key]) if key in current else ("delete", attr, key))
+        return changes
+
+    def _track(self, knowledge_base: Any) -> list[tuple]:
+        """track the dict attributes from now on and return all their items as changes"""
+        changes = []
+        self._tracked = {}
+        for attr in self.attrs:
+            current = getattr(knowledge_base, attr)
+            if not isinstance(current, TrackedDict):
+                current = TrackedDict(current)
+                setattr(knowledge_base, attr, current)
+            current.pop_dirty()
+            self._tracked[attr] = current
+            changes.extend(("set", attr, key, value) for key, value in current.items())
+        return changes
+
+    def _append_embeddings(self, nodes: list[UndirectedNode], generation: int) -> dict[str, int]:
+        """append the embeddings of `nodes` and return the rows of them"""
+        nodes = [node for node in nodes if node.embedding is not None]
+        if not nodes:
+            return {}
+        embeddings = np.asarray([node.embedding for node in nodes], dtype=np.float32)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        path = self._embedding_file(generation)
+        start = path.stat().st_size // (4 * self.dim) if path.exists() else 0
+        with path.open("ab") as f:
+            f.write(embeddings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return {node.id: start + i for i, node in enumerate(nodes)}
+
+    def _write_batch(self, graph_changes: list[tuple], attr_changes: list[tuple], generation: int) -> None:
+        added = {change[1].id: change[1] for change in graph_changes if change[0] == "node"}
+        rows = self._append_embeddings(list(added.values()), generation)
+        graph_records = []
+        for change in graph_changes:
+            if change[0] == "node":
+                node = change[1]
+                graph_records.append(("node", type(node), node.id, node.content, node.label, rows.get(node.id, -1)))
+            else:
+                graph_records.append(change)
+        blobs = [self._dumps(change[3]) if change[0] == "set" else b"" for change in attr_changes]
+        header = {
+            "dim": self.dim,
+            "graph": graph_records,
+            "attrs": [(change[0], change[1], change[2], len(blob)) for change, blob in zip(attr_changes, blobs)],
+        }
+        with self._log_file(generation).open("ab") as f:
+            f.write(pickle.dumps(header) + b"".join(blobs))
+            f.flush()
+            os.fsync(f.fileno())
+        self.n_records += len(graph_records) + len(attr_changes)
+
+    def _live_records(self) -> int:
+        n_edges = sum(len(node.neighbors) for node in self.graph.nodes.values()) // 2
+        return len(self.graph.nodes) + n_edges + sum(len(d) for d in self._tracked.values())
+
+    def compact(self, knowledge_base: Any) -> None:
+        """Write the whole knowledge base into a new generation and drop the old one."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        old_generation, generation = self.generation, self.generation + 1 if self.exists() else 0
+        for file in (self._log_file(generation), self._embedding_file(generation)):
+            file.unlink(missing_ok=True)
+
+        self.graph = getattr(knowledge_base, self.graph_attr)
+        graph_changes: list[tuple] = [("node", node) for node in self.graph.nodes.values()]
+        for node in self.graph.nodes.values():
+            graph_changes.extend(
+                ("edge", node.id, neighbor.id)
+                for neighbor in node.neighbors
+                if neighbor.id in self.graph.nodes and node.id < neighbor.id
+            )
+        self.n_records = 0
+        # the values not accessed yet are read from the old log before it is removed
+        self._write_batch(graph_changes, self._track(knowledge_base), generation)
+
+        tmp_file = self.path / "CURRENT.tmp"
+        tmp_file.write_text(str(generation))
+        os.replace(tmp_file, self._current_file())
+        self.generation = generation
+        if old_generation != generation:
+            for file in (self._log_file(old_generation), self._embedding_file(old_generation)):
+                with contextlib.suppress(OSError):  # the memory mapped file may not be removable on Windows
+                    file.unlink(missing_ok=True)
+        self.graph.enable_journal()
+
+    def save(self, knowledge_base: Any) -> None:
+        graph = getattr(knowledge_base, self.graph_attr)
+        attr_changes = self._attr_changes(knowledge_base)
+        if not self.exists() or graph is not self.graph or graph._journal is None or attr_changes is None:
+            # the changes are unknown, so a full copy is needed
+            self.compact(knowledge_base)
+            return
+        graph_changes = graph.pop_journal()
+        if graph_changes or attr_changes:
+            self._write_batch(graph_changes, attr_changes, self.generation)
+        if (
+            self.n_records > self.COMPACT_MIN_RECORDS
+            and (self.n_records - self._live_records()) > self.compact_ratio * self.n_records
+        ):
+            self.compact(knowledge_base)
+
+    # load
+    def _read_batches(self) -> list[tuple[dict, int]]:
+        """the headers of the complete batches and the offsets of their values in the log"""
+        batches = []
+        log_file = self._log_file(self.generation)
+        size = log_file.stat().st_size
+        good_size = 0
+        with log_file.open("rb") as f:
+            while good_size < size:
+                try:
+                    header = pickle.load(f)
+                except Exception:  # noqa: BLE001
+                    break
+                end = f.tell() + sum(record[3] for record in header["attrs"])
+                if end > size:
+                    break
+                batches.append((header, f.tell()))
+                f.seek(end)
+                good_size = end
+        if good_size < size:
+            logger.warning(f"Dropping the incomplete tail of the knowledge base log {log_file}.")
+            os.truncate(log_file, good_size)
+        return batches
+
+    def _load_embeddings(self) -> np.ndarray | None:
+        path = self._embedding_file(self.generation)
+        if self.dim is None or not path.exists():
+            return None
+        n_rows = path.stat().st_size // (4 * self.dim)
+        if path.stat().st_size != n_rows * 4 * self.dim:
+            os.truncate(path, n_rows * 4 * self.dim)  # drop the partially written row
+        if n_rows == 0:
+            return None
+        # a plain ndarray view, so the rows are pickled as arrays instead of memory maps
+        return np.memmap(path, dtype=np.float32, mode="r", shape=(n_rows, self.dim)).view(np.ndarray)
+
+    def load(self, knowledge_base: Any) -> None:
+        """
+        Rebuild the graph and the dict attributes of `knowledge_base` from the storage.
+        The values of the dicts are unpickled when they are accessed.
+        """
+        self.generation = int(self._current_file().read_text().strip())
+        log_file = self._log_file(self.generation)
+        batches = self._read_batches()
+        self.dim = next((header["dim"] for header, _ in batches if header["dim"] is not None), None)
+        embeddings = self._load_embeddings()
+
+        graph = UndirectedGraph()
+        node_rows: dict[str, int] = {}
+        nodes = graph.nodes
+        # the values may refer to the nodes removed later
+        all_nodes: dict[str, UndirectedNode] = {}
+        self._tracked = {attr: TrackedDict() for attr in self.attrs}
+        self.n_records = 0
+        for header, offset in batches:
+            for record in header["graph"]:
+                if record[0] == "node":
+                    _, node_cls, node_id, content, label, row = record
+                    node = nodes.get(node_id) or node_cls(content=content, label=label)
+                    node.id, node.content, node.label = node_id, content, label
+                    node.embedding = embeddings[row] if row >= 0 else None
+                    if row >= 0:
+                        node_rows[node_id] = row
+                    else:
+                        node_rows.pop(node_id, None)
+                    graph._register_node(node)
+                    all_nodes[node_id] = node
+                elif record[0] == "remove":
+                    graph.remove_node(record[1])
+                    node_rows.pop(record[1], None)
+                elif record[0] == "edge" and record[1] in nodes and record[2] in nodes:
+                    nodes[record[1]].add_neighbor(nodes[record[2]])
+            for op, attr, key, size in header["attrs"]:
+                target = self._tracked[attr]._data
+                if op == "set":
+                    target[key] = _LazyValue(log_file, offset, size, all_nodes)
+                else:
+                    target.pop(key, None)
+                offset += size
+            self.n_records += len(header["graph"]) + len(header["attrs"])
+
+        if embeddings is not None:
+            # the vector base searches the memory-mapped embeddings, the rows of the removed or replaced nodes are
+            # skipped
+            rows: list[dict | None] = [None] * len(embeddings)
+            for node_id, row in node_rows.items():
+                node = nodes[node_id]
+                rows[row] = {"id": node.id, "label": node.label, "content": node.content, "trunk": node.content}
+            graph.vector_base.attach(embeddings, rows)
+        setattr(knowledge_base, self.graph_attr, graph)
+        for attr, tracked in self._tracked.items():
+            setattr(knowledge_base, attr, tracked)
+        self.graph = graph
+        graph.enable_journal()
@@ -1,7 +1,9 @@
+import pickle
 import uuid
 from pathlib import Path
 from typing import List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from scipy.spatial.distance import cosine
 
@@ -87,6 +89,12 @@ class VectorBase(KnowledgeBase):
         """
         pass
 
+    def remove(self, ids: Union[str, List[str]]):
+        """
+        remove the documents (and their trunks) of the ids, so they are not searched any more
+        """
+        pass
+
     def search(self, content: str, topk_k: int = 5, similarity_threshold: float = 0) -> List[Document]:
         """
         search vector_df by node
@@ -102,6 +110,18 @@ class VectorBase(KnowledgeBase):
         """
         pass
 
+    def batch_search(
+        self,
+        contents: List[str],
+        topk_k: int = 5,
+        similarity_threshold: float = 0,
+    ) -> List[Tuple[List[Document], List]]:
+        """
+        search several contents; the result of each content is the same as `search`.
+        This default implementation searches them one by one.
+        """
+        return [self.search(content, topk_k=topk_k, similarity_threshold=similarity_threshold) for content in contents]
+
 
 class PDVectorBase(VectorBase):
     """
@@ -155,6 +175,10 @@ class PDVectorBase(VectorBase):
             for doc in document:
                 self.add(document=doc)
 
+    def remove(self, ids: Union[str, List[str]]):
+        ids = [ids] if isinstance(ids, str) else ids
+        self.vector_df = self.vector_df[~self.vector_df["id"].isin(ids)].reset_index(drop=True)
+
     def search(self, content: str, topk_k: int = 5, similarity_threshold: float = 0) -> Tuple[List[Document], List]:
         """
         search vector by node
@@ -181,3 +205,329 @@ class PDVectorBase(VectorBase):
         for _, similar_docs in most_similar_docs.iterrows():
             docs.append(Document().from_dict(similar_docs.to_dict()))
         return docs, searched_similarities.to_list()
+
+
+class NPVectorBase(VectorBase):
+    """
+    Implement of VectorBase using a contiguous NumPy matrix.
+
+    - The embeddings are stored as rows of a float32 matrix whose capacity grows geometrically, together with the
+      inverse of their L2 norms, so appending is amortized O(1) and the cosine similarity of all the rows is one
+      matrix-vector product scaled by the inverse norms.
+    - Top-k selection uses `np.argpartition` instead of sorting all the similarities.
+    - `batch_search` embeds all the queries in one request and searches them with one matrix product.
+    - `remove` marks the rows of the documents as removed, so they are skipped by the searches; the matrix is
+      compacted when more than half of its rows are removed.
+    - When `approximate_min_size` is set and the base grows beyond it, an inverted file (IVF) index is built:
+      the rows are clustered by spherical k-means and a search only scans the rows in the `nprobe` clusters
+      nearest to the query. It trades a little recall for speed on very large graphs.
+    - `dump` saves the metadata with pickle and the matrix with `np.save` beside it (`<path>.npy`);
+      `load` memory-maps the matrix instead of reading it into memory.
+    - `attach` searches an existing matrix (e.g. the memory-mapped embeddings of a knowledge base storage) in place.
+
+    Like PDVectorBase, each document takes one row for its content and one row for each of its trunks.
+    """
+
+    MIN_CAPACITY = 64
+    KMEANS_ITERATIONS = 10
+    NORM_CHUNK_ROWS = 65536
+
+    def __init__(
+        self,
+        path: Union[str, Path] = None,
+        approximate_min_size: int | None = None,
+        nprobe: int = 8,
+    ):
+        self.approximate_min_size = approximate_min_size
+        self.nprobe = nprobe
+        self._reset()
+        super().__init__(path)
+
+    def _reset(self) -> None:
+        self.dim: int | None = None
+        self.size = 0
+        self.matrix = np.zeros((0, 0), dtype=np.float32)  # the embeddings, only `[: self.size]` is valid
+        self.inv_norms = np.zeros(0, dtype=np.float32)  # 1 / the L2 norm of each row, 0 for the zero vectors
+        self.removed = np.zeros(0, dtype=bool)  # the rows of the removed documents
+        self.n_removed = 0
+        self.rows: list[dict] = []  # the metadata (id, label, content, trunk) of each row
+        self.id_rows: dict[str, list[int]] = {}  # the rows of each document id
+        self._clear_ivf()
+
+    def _clear_ivf(self) -> None:
+        self.centroids: np.ndarray | None = None
+        self.ivf_lists: list[np.ndarray] = []  # the rows of each cluster when the index is built
+        self.ivf_appended_lists: list[list[int]] = []  # the rows of each cluster added after the index is built
+        self.ivf_built_size = 0
+
+    def shape(self):
+        return self.size, self.dim
+
+    def _reserve(self, n: int) -> None:
+        required = self.size + n
+        if required <= self.matrix.shape[0] and self.matrix.flags.writeable:
+            return
+        capacity = max(self.MIN_CAPACITY, self.matrix.shape[0])
+        while capacity < required:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[: self.size] = self.matrix[: self.size]
+        inv_norms = np.zeros(capacity, dtype=np.float32)
+        inv_norms[: self.size] = self.inv_norms[: self.size]
+        removed = np.zeros(capacity, dtype=bool)
+        removed[: self.size] = self.removed[: self.size]
+        self.matrix, self.inv_norms, self.removed = matrix, inv_norms, removed
+
+    @classmethod
+    def _inverse_norms(cls, embeddings: np.ndarray) -> np.ndarray:
+        # by chunks, so a memory-mapped matrix is not read into memory at once
+        norms = np.empty(len(embeddings), dtype=np.float32)
+        for start in range(0, len(embeddings), cls.NORM_CHUNK_ROWS):
+            norms[start : start + cls.NORM_CHUNK_ROWS] = np.linalg.norm(
+                embeddings[start : start + cls.NORM_CHUNK_ROWS], axis=1
+            )
+        # zero vectors get 0, so their similarity to any query is 0 (the same as never being selected).
+        with np.errstate(divide="ignore"):
+            return np.where(norms > 0, 1 / norms, 0).astype(np.float32)
+
+    def _normalized(self, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        return self.matrix[rows] * self.inv_norms[rows, None]
+
+    def _append_rows(self, rows: List[dict], embeddings: List) -> None:
+        if not rows:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(rows), -1)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._reserve(len(rows))
+        new_rows = slice(self.size, self.size + len(rows))
+        self.matrix[new_rows] = embeddings
+        self.inv_norms[new_rows] = self._inverse_norms(embeddings)
+        self.removed[new_rows] = False
+        if self.centroids is not None:
+            for row, cluster in enumerate(
+                np.argmax(self._normalized(new_rows) @ self.centroids.T, axis=1), start=self.size
+            ):
+                self.ivf_appended_lists[cluster].append(row)
+        for row, meta in enumerate(rows, start=self.size):
+            self.id_rows.setdefault(meta["id"], []).append(row)
+        self.rows.extend(rows)
+        self.size += len(rows)
+        if self.approximate_min_size is not None and self.size >= max(
+            self.approximate_min_size, 2 * self.ivf_built_size
+        ):
+            self.build_ivf()
+
+    def add(self, document: Union[Document, List[Document]]):
+        """
+        add new node to the matrix
+        Parameters
+        ----------
+        document
+
+        Returns
+        -------
+
+        """
+        documents = [document] if isinstance(document, Document) else document
+        rows, embeddings = [], []
+        for doc in documents:
+            if doc.embedding is None:
+                doc.create_embedding()
+            rows.append({"id": doc.id, "label": doc.label, "content": doc.content, "trunk": doc.content})
+            embeddings.append(doc.embedding)
+            for trunk, embedding in zip(doc.trunks, doc.trunks_embedding):
+                rows.append({"id": doc.id, "label": doc.label, "content": doc.content, "trunk": trunk})
+                embeddings.append(embedding)
+        self._append_rows(rows, embeddings)
+
+    def attach(self, matrix: np.ndarray, rows: List[Union[dict, None]]) -> None:
+        """
+        Replace the content by `matrix` without copying it; `rows[i]` is the metadata (id, label, content, trunk)
+        of `matrix[i]`, None for the rows which are not searched (e.g. the old embeddings of the removed nodes).
+        Like a loaded base, a read-only matrix is copied into a writable buffer on the next `add`.
+        """
+        self._reset()
+        if not len(matrix):
+            return
+        self.dim, self.size, self.matrix = matrix.shape[1], len(matrix), matrix
+        self.inv_norms = self._inverse_norms(matrix)
+        self.removed = np.fromiter((meta is None for meta in rows), dtype=bool, count=len(rows))
+        self.n_removed = int(self.removed.sum())
+        self.rows = list(rows)
+        for row, meta in enumerate(rows):
+            if meta is not None:
+                self.id_rows.setdefault(meta["id"], []).append(row)
+        if self.approximate_min_size is not None and self.size >= self.approximate_min_size:
+            self.build_ivf()
+
+    def remove(self, ids: Union[str, List[str]]):
+        ids = [ids] if isinstance(ids, str) else ids
+        rows = [row for doc_id in ids for row in self.id_rows.pop(doc_id, [])]
+        if not rows:
+            return
+        self.removed[rows] = True
+        self.n_removed += len(rows)
+        if self.n_removed > self.size // 2:
+            self._compact()
+
+    def _compact(self) -> None:
+        """drop the removed rows from the matrix"""
+        kept = np.flatnonzero(~self.removed[: self.size])
+        self.matrix, self.inv_norms = self.matrix[kept], self.inv_norms[kept]
+        self.removed = np.zeros(len(kept), dtype=bool)
+        self.n_removed = 0
+        self.rows = [self.rows[row] for row in kept]
+        self.id_rows = {}
+        for row, meta in enumerate(self.rows):
+            self.id_rows.setdefault(meta["id"], []).append(row)
+        self.size = len(kept)
+        approximate = self.centroids is not None
+        self._clear_ivf()
+        if approximate and self.size:
+            self.build_ivf()
+
+    def build_ivf(self) -> None:
+        """
+        (Re)build the inverted file index by spherical k-means over the current rows.
+        It is called automatically when the base reaches `approximate_min_size` and each time its size doubles.
+        """
+        data = self._normalized(slice(0, self.size))
+        n_list = max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(self.size, size=n_list, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, data)
+            sum_norms = np.linalg.norm(sums, axis=1)
+            non_empty = sum_norms > 0
+            centroids[non_empty] = sums[non_empty] / sum_norms[non_empty, None]
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self.centroids = centroids
+        self.ivf_lists = np.split(order, np.searchsorted(assignment[order], np.arange(1, n_list)))
+        self.ivf_appended_lists = [[] for _ in range(n_list)]
+        self.ivf_built_size = self.size
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray | None:
+        """Return the rows to scan for each query, None means all the rows."""
+        if self.centroids is None or self.nprobe >= self.centroids.shape[0]:
+            return None
+        probe_lists = np.argpartition(-(self.centroids @ query), self.nprobe - 1)[: self.nprobe]
+        return np.concatenate(
+            [self.ivf_lists[i] for i in probe_lists]
+            + [np.asarray(self.ivf_appended_lists[i], dtype=np.int64) for i in probe_lists],
+        )
+
+    def _row_to_document(self, row: int) -> Document:
+        return Document().from_dict(
+            {**self.rows[row], "embedding": self.matrix[row].tolist()},
+        )
+
+    def search_by_embedding(
+        self,
+        embeddings: List,
+        topk_k: int = 5,
+        similarity_threshold: float = 0,
+    ) -> List[Tuple[List[Document], List]]:
+        """
+        search the nearest rows of several query embeddings at once
+
+        Returns
+        -------
+            (documents, similarities) for each query embedding; similarities are in descending order.
+        """
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if not self.size or queries.size == 0:
+            return [([], []) for _ in range(len(embeddings))]
+        queries = queries.reshape(len(embeddings), -1)
+        queries = queries * self._inverse_norms(queries)[:, None]
+        data = self.matrix[: self.size]
+        similarity_matrix = (
+            None if self.centroids is not None else (data @ queries.T) * self.inv_norms[: self.size, None]
+        )
+
+        results = []
+        for i, query in enumerate(queries):
+            if similarity_matrix is not None:
+                rows, similarities = np.arange(self.size), similarity_matrix[:, i]
+            else:
+                rows = self._candidate_rows(query)
+                rows = np.arange(self.size) if rows is None else rows
+                similarities = (data[rows] @ query) * self.inv_norms[rows]
+            selected = np.flatnonzero((similarities > similarity_threshold) & ~self.removed[rows])
+            if len(selected) > topk_k:
+                selected = selected[np.argpartition(-similarities[selected], topk_k - 1)[:topk_k]]
+            selected = selected[np.argsort(-similarities[selected], kind="stable")]
+            results.append(
+                (
+                    [self._row_to_document(row) for row in rows[selected]],
+                    similarities[selected].astype(float).tolist(),
+                ),
+            )
+        return results
+
+    def search(self, content: str, topk_k: int = 5, similarity_threshold: float = 0) -> Tuple[List[Document], List]:
+        """
+        search vector by node
+        Parameters
+        ----------
+        similarity_threshold
+        content
+        topk_k: return topk_k nearest vector
+
+        Returns
+        -------
+
+        """
+        if not self.size:
+            return [], []
+        document = Document(content=content)
+        document.create_embedding()
+        return self.search_by_embedding([document.embedding], topk_k, similarity_threshold)[0]
+
+    def batch_search(
+        self,
+        contents: List[str],
+        topk_k: int = 5,
+        similarity_threshold: float = 0,
+    ) -> List[Tuple[List[Document], List]]:
+        """
+        search several contents with one matrix product; the contents are embedded together
+        """
+        if not self.size or not contents:
+            return [([], []) for _ in contents]
+        # openai create embedding API input's max length is 16
+        size = 16
+        embeddings = []
+        for i in range(0, len(contents), size):
+            embeddings.extend(APIBackend().create_embedding(input_content=contents[i : i + size]))
+        return self.search_by_embedding(embeddings, topk_k, similarity_threshold)
+
+    def _matrix_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".npy")
+
+    def load(self) -> None:
+        if self.path is not None and self.path.exists():
+            with self.path.open("rb") as f:
+                state = pickle.load(f)
+            self.__dict__.update(state)
+            if self.size:
+                # The matrix is memory-mapped (read only); it is copied into a writable buffer on the next `add`.
+                self.matrix = np.load(self._matrix_path(), mmap_mode="r")
+            else:
+                self.matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def dump(self) -> None:
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            state = {k: v for k, v in self.__dict__.items() if k not in ("path", "matrix")}
+            state["inv_norms"] = self.inv_norms[: self.size]
+            state["removed"] = self.removed[: self.size]
+            with self.path.open("wb") as f:
+                pickle.dump(state, f)
+            np.save(self._matrix_path(), np.ascontiguousarray(self.matrix[: self.size]))
+        else:
+            logger.warning("VectorBase path is not set, dump failed.")
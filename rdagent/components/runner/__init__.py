@@ -1,6 +1,9 @@
+import contextvars
 import pickle
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 from rdagent.components.runner.conf import RUNNER_SETTINGS
 from rdagent.core.developer import Developer
@@ -31,3 +34,24 @@ class CachedRunner(Developer[ASpecificExp]):
         task_info_key = self.get_cache_key(exp)
         cache_path = Path(RUNNER_SETTINGS.cache_path) / f"{task_info_key}.pkl"
         pickle.dump(result, open(cache_path, "wb"))
+
+    def develop_async(self, exp: ASpecificExp) -> "Future[ASpecificExp]":
+        """
+        Develop the experiment in a new thread.
+        The heavy docker runs of the concurrent developments are limited by the scheduler of the scenario.
+        """
+        future: Future[ASpecificExp] = Future()
+
+        def _develop() -> None:
+            try:
+                future.set_result(self.develop(exp))
+            except BaseException as e:  # noqa: BLE001
+                future.set_exception(e)
+
+        threading.Thread(target=contextvars.copy_context().run, args=(_develop,), daemon=True).start()
+        return future
+
+    def develop_batch(self, exps: List[ASpecificExp]) -> List[ASpecificExp]:
+        """Develop the experiments concurrently and wait for all of them."""
+        futures = [self.develop_async(exp) for exp in exps]
+        return [future.result() for future in futures]
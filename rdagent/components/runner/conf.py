@@ -12,5 +12,8 @@ class RunnerSettings(BaseSettings):
     cache_result: bool = True  # whether to cache the result of the docker execution
     cache_path: str = str(Path.cwd() / "runner_cache/")  # the path to store the cache
 
+    backtest_max_workers: int | None = None  # the max number of concurrent backtests, None to decide by the budgets
+    backtest_cpus_per_worker: int = 8  # the CPU budget of each concurrent backtest
+
 
 RUNNER_SETTINGS = RunnerSettings()
@@ -15,6 +15,8 @@ class RDAgentSettings(BaseSettings):
     # TODO: (xiao) think it can be a separate config.
     log_trace_path: str | None = None
     log_llm_chat_content: bool = True
+    log_max_open_files: int = 64  # the max number of log files kept open
+    log_flush_interval: float = 1.0  # seconds between writing the buffered log messages; <= 0 writes immediately
 
     use_azure: bool = False
     use_azure_token_provider: bool = False
@@ -26,9 +28,18 @@ class RDAgentSettings(BaseSettings):
     dump_embedding_cache: bool = False
     use_embedding_cache: bool = False
     prompt_cache_path: str = str(Path.cwd() / "prompt_cache.db")
+    prompt_cache_batch_size: int = 16  # the number of buffered cache writes committed together
+    prompt_cache_flush_interval: float = 5.0  # seconds before the buffered cache writes are committed
+    prompt_cache_max_entries: int | None = None  # the max entries of chat/embedding cache, None means no eviction
+    prompt_cache_memory_limit: int = 256 * 1024**2  # bytes of the in-memory tier in front of the prompt cache
     session_cache_folder_location: str = str(Path.cwd() / "session_cache_folder/")
     max_past_message_include: int = 10
 
+    # async LLM request configs (the limits are applied to each model separately)
+    llm_max_concurrency: int = 8
+    llm_rpm_limit: int | None = None  # requests per minute, None means no limit
+    llm_tpm_limit: int | None = None  # tokens per minute, None means no limit
+
     # Chat configs
     openai_api_key: str = ""  # TODO: simplify the key design.
     chat_openai_api_key: str = ""
@@ -96,11 +107,28 @@ class RDAgentSettings(BaseSettings):
     max_output_duplicate_factor_group: int = 20
     max_kmeans_group_number: int = 40
 
+    # document reader conf
+    use_document_cache: bool = True  # cache the text & screenshot of the PDF files by their hash
+    document_cache_path: str = str(Path.cwd() / "git_ignore_folder" / "document_cache")
+
     # workspace conf
     workspace_path: Path = Path.cwd() / "git_ignore_folder" / "RD-Agent_workspace"
+    # the execution cache of the workspaces, see components/coder/execution_cache.py
+    execution_cache_max_bytes: int | None = 8 * 1024**3  # evict the least recently hit results over it
+    execution_cache_compress_level: int = 1  # zlib level of the cached results
 
     # multi processing conf
     multi_proc_n: int = 1
 
+    # workflow session conf
+    # save the shared objects of the snapshots once into the `objects` folder of the session, see utils/snapshot.py;
+    # the snapshot files then need that folder
+    session_snapshot_incremental: bool = False
+    # write the snapshots in a background thread; the last snapshot is lost if the process crashes
+    session_snapshot_async: bool = False
+    session_snapshot_compress_level: int = 3  # zlib level of the snapshots
+    # the max number of loops in flight; > 1 runs the next loops while the former ones are running the experiments
+    workflow_max_inflight_loops: int = 1
+
 
 RD_AGENT_SETTINGS = RDAgentSettings()
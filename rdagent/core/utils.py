@@ -102,4 +102,9 @@ def multiprocessing_wrapper(func_calls: list[tuple[Callable, tuple]], n: int) ->
         return [f(*args) for f, args in func_calls]
     with mp.Pool(processes=n) as pool:
         results = [pool.apply_async(f, args) for f, args in func_calls]
-        return [result.get() for result in results]
+        outputs = [result.get() for result in results]
+        # Let the workers exit gracefully instead of being terminated,
+        # so their exit hooks (e.g. committing the buffered prompt cache) are run.
+        pool.close()
+        pool.join()
+        return outputs
@@ -1,28 +1,144 @@
+import atexit
+import json
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from functools import partial
 from logging import LogRecord
 from multiprocessing import Pipe
 from multiprocessing.connection import Connection
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Generator, Union
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Generator, Union
 
 from loguru import logger
 
 if TYPE_CHECKING:
-    from loguru import Record
+    from loguru import Message, Record
 
 from psutil import Process
 
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.utils import SingletonBaseClass
 
-from .storage import FileStorage
+from .storage import FileStorage, index_entry
 from .utils import LogColors, get_caller_info
 
 
+# the tag is kept in the context, so the threads (e.g. the pipelined loops) have their own tags
+_TAG: ContextVar[str] = ContextVar("rdagent_log_tag", default="")
+
+
+class LogFileSinks:
+    """
+    A loguru sink which writes each record into the file in `record["extra"]["rdagent_log_file"]` and its
+    entry (with the offset in the file) into the index in `record["extra"]["rdagent_index"]` if it is given.
+
+    Adding and removing a file sink for every message is expensive (e.g. the streamed LLM response is logged
+    chunk by chunk), so the files are kept open and the writes are batched:
+
+    - at most `max_open` files are open, the least recently used one is closed when opening another one;
+    - the messages are buffered and written every `flush_interval` seconds by a background thread, when the
+      buffer of a file is large, before forking and at exit. The buffered messages of a file are written by
+      one `write`, so the files shared by the processes never have a message split by others.
+    """
+
+    max_buffer_size = 1 << 16
+
+    def __init__(self, max_open: int, flush_interval: float) -> None:
+        self.max_open = max_open
+        self.flush_interval = flush_interval
+        self.files: OrderedDict[Path, BinaryIO] = OrderedDict()
+        # the messages and their index (the index file and the entry without the offset)
+        self.buffers: dict[Path, list[tuple[bytes, tuple[Path, dict] | None]]] = {}
+        self.buffer_sizes: dict[Path, int] = {}
+        self.lock = threading.Lock()
+        self.flusher: threading.Thread | None = None
+
+    def write(self, message: "Message") -> None:
+        record = message.record
+        path = record["extra"]["rdagent_log_file"]
+        data = message.encode("utf-8")
+        index = record["extra"].get("rdagent_index")
+        if index is not None:
+            index_path, fields = index
+            entry = index_entry(
+                level=record["level"].name,
+                caller=f"{record['name']}:{record['function']}:{record['line']}",
+                timestamp=record["time"],
+                file=path.relative_to(index_path.parent),
+                **fields,
+            )
+            index = (index_path, entry)
+        with self.lock:
+            self.buffers.setdefault(path, []).append((data, index))
+            self.buffer_sizes[path] = self.buffer_sizes.get(path, 0) + len(data)
+            if self.buffer_sizes[path] >= self.max_buffer_size or self.flush_interval <= 0:
+                self._flush_file(path)
+        if self.flusher is None and self.flush_interval > 0:
+            self.flusher = threading.Thread(target=self._flush_periodically, name="log_flusher", daemon=True)
+            self.flusher.start()
+
+    def _open(self, path: Path) -> BinaryIO:
+        f = self.files.get(path)
+        if f is not None:
+            self.files.move_to_end(path)
+            return f
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = self.files[path] = path.open("ab", buffering=0)
+        while len(self.files) > self.max_open:
+            self.files.popitem(last=False)[1].close()
+        return f
+
+    def _flush_file(self, path: Path) -> None:
+        messages = self.buffers.pop(path, [])
+        self.buffer_sizes.pop(path, None)
+        data = b"".join(m for m, _ in messages)
+        if not data:
+            return
+        f = self._open(path)
+        f.write(data)
+        # the file is opened in the append mode, so the position is the end of the written data
+        offset = f.tell() - len(data)
+        index_lines: dict[Path, list[str]] = {}
+        for m, index in messages:
+            if index is not None:
+                index_path, entry = index
+                index_lines.setdefault(index_path, []).append(json.dumps({**entry, "offset": offset}) + "\n")
+            offset += len(m)
+        # the index is written after the messages, so the readers never see an entry before its message
+        for index_path, lines in index_lines.items():
+            self._open(index_path).write("".join(lines).encode("utf-8"))
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            for path in list(self.buffers):
+                self._flush_file(path)
+
+    def close(self) -> None:
+        self.flush()
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
+
+    def reset_in_child(self) -> None:
+        """the forked process starts without the files, buffers (flushed before forking) and the flusher thread"""
+        self.files = OrderedDict()
+        self.buffers = {}
+        self.buffer_sizes = {}
+        self.lock = threading.Lock()
+        self.flusher = None
+
+
 class RDAgentLog(SingletonBaseClass):
     """
     The files are organized based on the tag & PID
@@ -53,7 +169,13 @@ class RDAgentLog(SingletonBaseClass):
     #   logger = PipeLog()
     #   logger.info("<code>")
     #   feedback = logger.get_reps()
-    _tag: str = ""
+
+    _sinks: LogFileSinks | None = None
+    _pid_chain: tuple[int, str] | None = None  # (pid, pid chain) of the current process
+
+    @property
+    def _tag(self) -> str:
+        return _TAG.get()
 
     def __init__(self, log_trace_path: Union[str, None] = RD_AGENT_SETTINGS.log_trace_path) -> None:
         if log_trace_path is None:
@@ -67,6 +189,29 @@ class RDAgentLog(SingletonBaseClass):
         self.storage = FileStorage(self.log_trace_path)
 
         self.main_pid = os.getpid()
+        self._setup_sinks()
+
+    @classmethod
+    def _setup_sinks(cls) -> None:
+        if cls._sinks is not None:
+            return
+        cls._sinks = LogFileSinks(RD_AGENT_SETTINGS.log_max_open_files, RD_AGENT_SETTINGS.log_flush_interval)
+        # the raw messages (e.g. the streamed LLM response) are printed without the time, level and so on
+        logger.remove()
+        logger.add(sys.stderr, filter=lambda r: not r["extra"].get("rdagent_raw", False))
+        logger.add(sys.stderr, format=lambda r: "{message}", filter=lambda r: r["extra"].get("rdagent_raw", False))
+        logger.add(
+            cls._sinks.write,
+            format=lambda r: cls.file_format(r, raw=r["extra"].get("rdagent_raw", False)),
+            filter=lambda r: "rdagent_log_file" in r["extra"],
+        )
+        atexit.register(cls._sinks.close)
+        os.register_at_fork(before=cls._sinks.flush, after_in_child=cls._sinks.reset_in_child)
+
+    def flush(self) -> None:
+        """Flush the buffered messages into the files, e.g. before reading them."""
+        if self._sinks is not None:
+            self._sinks.flush()
 
     def set_trace_path(self, log_trace_path: str | Path) -> None:
         self.log_trace_path = Path(log_trace_path)
@@ -79,12 +224,11 @@ class RDAgentLog(SingletonBaseClass):
         if self._tag != "":
             tag = "." + tag
 
-        # TODO: It may result in error in mutithreading or co-routine
-        self._tag = self._tag + tag
+        token = _TAG.set(self._tag + tag)
         try:
             yield
         finally:
-            self._tag = self._tag[: -len(tag)]
+            _TAG.reset(token)
 
     def get_pids(self) -> str:
         """
@@ -92,6 +236,8 @@ class RDAgentLog(SingletonBaseClass):
         Split by '-'.
         """
         pid = os.getpid()
+        if self._pid_chain is not None and self._pid_chain[0] == pid:
+            return self._pid_chain[1]
         process = Process(pid)
         pid_chain = f"{pid}"
         while process.pid != self.main_pid:
@@ -99,68 +245,40 @@ class RDAgentLog(SingletonBaseClass):
             parent_process = Process(parent_pid)
             pid_chain = f"{parent_pid}-{pid_chain}"
             process = parent_process
+        # the chain never changes in a process, the process of the cache is checked for the forked processes
+        RDAgentLog._pid_chain = (pid, pid_chain)
         return pid_chain
 
-    def file_format(self, record: "Record", raw: bool = False) -> str:
+    @staticmethod
+    def file_format(record: "Record", raw: bool = False) -> str:
         # FIXME: the formmat is tightly coupled with the message reading in storage.
         record["message"] = LogColors.remove_ansi_codes(record["message"])
         if raw:
             return "{message}"
         return "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}\n"
 
+    def _log(self, level: str, msg: str, tag: str, raw: bool = False, **index_fields: Any) -> None:
+        caller_info = get_caller_info(level=3)
+        tag = f"{self._tag}.{tag}".strip(".")
+        pid = self.get_pids()
+        log_file = self.log_trace_path / f"{tag}.{pid}".strip(".").replace(".", "/") / "common_logs.log"
+        # the raw messages (e.g. the chunks of a streamed response) are a part of the former message in the index
+        index = None if raw else (self.storage.index_path, {"tag": tag, "pid": pid, **index_fields})
+        logger.patch(lambda r: r.update(caller_info)).bind(
+            rdagent_log_file=log_file, rdagent_raw=raw, rdagent_index=index
+        ).log(level, msg)
+
     def log_object(self, obj: object, *, tag: str = "") -> None:
         # TODO: I think we can merge the log_object function with other normal log methods to make the interface simpler.
-        caller_info = get_caller_info()
-        tag = f"{self._tag}.{tag}.{self.get_pids()}".strip(".")
-
-        logp = self.storage.log(obj, name=tag, save_type="pkl")
-
-        file_handler_id = logger.add(
-            self.log_trace_path / tag.replace(".", "/") / "common_logs.log", format=self.file_format
-        )
-        logger.patch(lambda r: r.update(caller_info)).info(f"Logging object in {Path(logp).absolute()}")
-        logger.remove(file_handler_id)
+        logp = self.storage.log(obj, name=f"{self._tag}.{tag}.{self.get_pids()}".strip("."), save_type="pkl")
+        obj_file = Path(logp).relative_to(self.log_trace_path).as_posix()
+        self._log("INFO", f"Logging object in {Path(logp).absolute()}", tag, obj=obj_file)
 
     def info(self, msg: str, *, tag: str = "", raw: bool = False) -> None:
-        # TODO: too much duplicated. due to we have no logger with stream context;
-        caller_info = get_caller_info()
-        if raw:
-            logger.remove()
-            logger.add(sys.stderr, format=lambda r: "{message}")
-
-        tag = f"{self._tag}.{tag}.{self.get_pids()}".strip(".")
-        log_file_path = self.log_trace_path / tag.replace(".", "/") / "common_logs.log"
-        if raw:
-            file_handler_id = logger.add(log_file_path, format=partial(self.file_format, raw=True))
-        else:
-            file_handler_id = logger.add(log_file_path, format=self.file_format)
-
-        logger.patch(lambda r: r.update(caller_info)).info(msg)
-        logger.remove(file_handler_id)
-
-        if raw:
-            logger.remove()
-            logger.add(sys.stderr)
+        self._log("INFO", msg, tag, raw=raw)
 
     def warning(self, msg: str, *, tag: str = "") -> None:
-        # TODO: reuse code
-        # _log(self, msg: str, *, tag: str = "", level=Literal["warning", "error", ..]) -> None:
-        # getattr(logger.patch(lambda r: r.update(caller_info)), level)(msg)
-        caller_info = get_caller_info()
-
-        tag = f"{self._tag}.{tag}.{self.get_pids()}".strip(".")
-        file_handler_id = logger.add(
-            self.log_trace_path / tag.replace(".", "/") / "common_logs.log", format=self.file_format
-        )
-        logger.patch(lambda r: r.update(caller_info)).warning(msg)
-        logger.remove(file_handler_id)
+        self._log("WARNING", msg, tag)
 
     def error(self, msg: str, *, tag: str = "") -> None:
-        caller_info = get_caller_info()
-
-        tag = f"{self._tag}.{tag}.{self.get_pids()}".strip(".")
-        file_handler_id = logger.add(
-            self.log_trace_path / tag.replace(".", "/") / "common_logs.log", format=self.file_format
-        )
-        logger.patch(lambda r: r.update(caller_info)).error(msg)
-        logger.remove(file_handler_id)
+        self._log("ERROR", msg, tag)
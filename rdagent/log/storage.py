@@ -1,6 +1,8 @@
 import json
+import os
 import pickle
 import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Generator, Literal, Union, cast
@@ -10,16 +12,47 @@ from .base import Message, Storage
 LOG_LEVEL = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
 
+INDEX_NAME = "index.jsonl"
+
+
+def index_entry(tag: str, pid: str, level: str, caller: str, timestamp: datetime, file: Path, **kwargs: Any) -> dict:
+    """
+    An entry of the message index; `file` is relative to the storage folder.
+    The entries of the messages in the `.log` files also have the `offset` of the message in the file.
+    """
+    return {
+        "time": timestamp.astimezone(timezone.utc).isoformat(),
+        "tag": tag,
+        "pid": pid,
+        "level": level,
+        "caller": caller,
+        "file": file.as_posix(),
+        **kwargs,
+    }
+
+
 class FileStorage(Storage):
     """
     The info are logginged to the file systems
 
-    TODO: describe the storage format
+    - ``{tag}/{pid}/common_logs.log``: the text messages, each starts with the header of `log_pattern`.
+    - ``{tag}/{pid}/{timestamp}.pkl``: the objects.
+    - ``index.jsonl``: one JSON line per message, appended when the message is written (see `index_entry`),
+      so the readers find the messages without scanning & parsing all the files.
+      The messages of a `.log` file are indexed by their offsets; a message ends at the next offset in the file.
+      The entries of the "Logging object in" messages have `obj` (the path of the pickle) and are only
+      used to split the messages.
     """
 
     def __init__(self, path: str | Path = "./log/") -> None:
         self.path = Path(path)
         self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / INDEX_NAME
+
+    def _append_index(self, entries: list[dict]) -> None:
+        # a single write in the append mode, so the lines of the processes are never mixed
+        with self.index_path.open("a") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
 
     def log(
         self,
@@ -52,6 +85,8 @@ class FileStorage(Storage):
             path = path.with_suffix(".pkl")
             with path.open("wb") as f:
                 pickle.dump(obj, f)
+            tag, _, pid = name.rpartition(".")
+            self._append_index([index_entry(tag, pid, "INFO", "", timestamp, path.relative_to(self.path))])
             return path
         elif save_type == "text":
             obj = str(obj)
@@ -65,7 +100,138 @@ class FileStorage(Storage):
         r"(?P<caller>.+:.+:\d+) - "
     )
 
-    def iter_msg(self, watch: bool = False) -> Generator[Message, None, None]:
+    def iter_msg(
+        self,
+        watch: bool = False,
+        tag: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        poll_interval: float = 1.0,
+    ) -> Generator[Message, None, None]:
+        """
+        Iterate the messages in the order of time.
+
+        Parameters
+        ----------
+        watch : bool
+            keep waiting for the new messages (every `poll_interval` seconds) after the existing ones are yielded
+        tag : str | None
+            only the messages with the tag or its sub tags (e.g. "a" matches "a" and "a.b")
+        start, end : datetime | None
+            only the messages in the time range [start, end]
+
+        Only the content of the yielded messages is read (and unpickled).
+        """
+
+        def selected(m_tag: str, timestamp: datetime) -> bool:
+            return (
+                (tag is None or m_tag == tag or m_tag.startswith(f"{tag}."))
+                and (start is None or timestamp >= start)
+                and (end is None or timestamp <= end)
+            )
+
+        if not self.index_path.exists():
+            # the storage is written before the index is introduced
+            for m in self._scan_msg():
+                if selected(m.tag, m.timestamp):
+                    yield m
+            if not watch:
+                return
+
+        read_pos = 0
+        # watch mode: the last message of each `.log` file, which ends at the offset of the next message in the
+        # file, and the next message may be indexed by a later poll
+        tails: dict[str, dict] = {}
+        while True:
+            entries, read_pos = self._read_index(read_pos)
+            if watch:
+                entries = self._bound_tails(entries, tails)
+            entries = [e for e in entries if "obj" not in e and selected(e["tag"], e["time"])]
+            entries.sort(key=lambda e: e["time"])
+            for e in entries:
+                yield self._load_msg(e)
+            if not watch:
+                return
+            if not entries:
+                time.sleep(poll_interval)
+
+    @staticmethod
+    def _bound_tails(entries: list[dict], tails: dict[str, dict]) -> list[dict]:
+        """
+        Hold back the last entry of each `.log` file in `entries` into `tails` and return the entries to read.
+        A held entry is released when the next entry of its file bounds it, or after a whole poll without new
+        entries of its file (the message is read until the next message header then).
+        """
+        first_offsets: dict[str, int] = {}
+        for e in entries:
+            if "offset" in e:
+                first_offsets[e["file"]] = min(e["offset"], first_offsets.get(e["file"], e["offset"]))
+        ready = []
+        for file, e in list(tails.items()):
+            if file in first_offsets:
+                e["end"] = first_offsets[file]
+            elif not e.pop("held", False):
+                e["held"] = True
+                continue
+            ready.append(tails.pop(file))
+        for e in entries:
+            if "offset" in e and e["end"] is None:
+                tails[e["file"]] = e
+            else:
+                ready.append(e)
+        return ready
+
+    def _read_index(self, pos: int = 0) -> tuple[list[dict], int]:
+        """
+        Read the index entries after the position `pos` of the index file and return the position to read the
+        next entries from. The `end` of the entries in the `.log` files is filled by the next offset in the file.
+        """
+        if not self.index_path.exists():
+            return [], pos
+        with self.index_path.open("rb") as f:
+            f.seek(pos)
+            data = f.read()
+        # the last line may be partially written
+        data = data[: data.rfind(b"\n") + 1]
+        entries = [json.loads(line) for line in data.splitlines() if line]
+        by_file: dict[str, list[dict]] = {}
+        for e in entries:
+            e["time"] = datetime.fromisoformat(e["time"])
+            if "offset" in e:
+                by_file.setdefault(e["file"], []).append(e)
+        for file_entries in by_file.values():
+            file_entries.sort(key=lambda e: e["offset"])
+            for e, next_e in zip(file_entries, file_entries[1:] + [None]):
+                e["end"] = None if next_e is None else next_e["offset"]
+        return entries, pos + len(data)
+
+    def _load_msg(self, entry: dict) -> Message:
+        path = self.path / entry["file"]
+        if "offset" in entry:
+            with path.open("rb") as f:
+                f.seek(entry["offset"])
+                data = f.read() if entry["end"] is None else f.read(entry["end"] - entry["offset"])
+            text = data.decode("utf-8", errors="replace")
+            match = self.log_pattern.match(text)
+            body_start = match.end() if match else 0
+            if entry["end"] is None and (next_match := self.log_pattern.search(text, body_start)) is not None:
+                # the messages written after the index is read are not part of the last message of the file
+                text = text[: next_match.start()]
+            content: object = text[body_start:].strip()
+        else:
+            with path.open("rb") as f:
+                content = pickle.load(f)
+        return Message(
+            tag=entry["tag"],
+            level=entry["level"],
+            timestamp=entry["time"],
+            caller=entry["caller"],
+            pid_trace=entry["pid"],
+            content=content,
+        )
+
+    def _scan_msg(self) -> list[Message]:
+        """read all the messages by scanning the files, for the storages without the index"""
         msg_l = []
         for file in self.path.glob("**/*.log"):
             tag = ".".join(str(file.relative_to(self.path)).replace("/", ".").split(".")[:-3])
@@ -113,36 +279,63 @@ class FileStorage(Storage):
             msg_l.append(m)
 
         msg_l.sort(key=lambda x: x.timestamp)
-        for m in msg_l:
-            yield m
+        return msg_l
 
     def truncate(self, time: datetime) -> None:
-        # any message later than `time` will be removed
+        """
+        Remove the messages later than `time`, e.g. the messages after the snapshot of a resumed session.
+
+        The messages of a `.log` file are in the order of time, so the file is cut at the offset of its first
+        message later than `time`; the files without such messages are not touched.
+        """
+        if not self.index_path.exists():
+            self._truncate_by_scan(time)
+            return
+        with self.index_path.open("rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        kept_lines = []
+        cut_offsets: dict[str, int] = {}
+        removed_objs: set[str] = set()
+        for line in lines:
+            if not line.endswith(b"\n"):
+                continue  # partially written
+            e = json.loads(line)
+            if datetime.fromisoformat(e["time"]) <= time:
+                kept_lines.append(line)
+                continue
+            if "offset" in e:
+                cut_offsets[e["file"]] = min(e["offset"], cut_offsets.get(e["file"], e["offset"]))
+            if "obj" in e or "offset" not in e:
+                # the pickles are removed together with their messages, or on their own if the message is missing
+                removed_objs.add(e.get("obj", e["file"]))
+        if len(kept_lines) == len(lines):
+            return
+
+        for file, offset in cut_offsets.items():
+            if (self.path / file).exists():
+                os.truncate(self.path / file, offset)
+        for file in removed_objs:
+            (self.path / file).unlink(missing_ok=True)
+        tmp_path = self.index_path.with_name(f"{INDEX_NAME}.tmp")
+        tmp_path.write_bytes(b"".join(kept_lines))
+        os.replace(tmp_path, self.index_path)
+
+    def _truncate_by_scan(self, time: datetime) -> None:
+        """truncate the storages without the index by parsing the files"""
         for file in self.path.glob("**/*.log"):
-            with file.open("r") as f:
-                content = f.read()
-
-            new_content = ""
-
-            matches, next_matches = self.log_pattern.finditer(content), self.log_pattern.finditer(content)
-
-            next_match = next(next_matches, None)
-            for match in matches:
-                next_match = next(next_matches, None)
-                timestamp_str = match.group("timestamp")
-                timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
-
-                log_start = match.start()
-                log_end = next_match.start() if next_match else len(content)
-                msg = content[match.end() : log_end].strip()
+            with file.open("rb") as f:
+                content = f.read().decode("utf-8", errors="replace")
 
+            for match in self.log_pattern.finditer(content):
+                timestamp = datetime.strptime(match.group("timestamp"), "%Y-%m-%d %H:%M:%S.%f").replace(
+                    tzinfo=timezone.utc
+                )
                 if timestamp > time:
-                    if "Logging object in" in msg:
-                        absolute_p = msg.split("Logging object in ")[1]
-                        p = Path(absolute_p)
-                        p.unlink()
-                    continue
+                    # the messages are in the order of time, so the rest of the file is removed
+                    os.truncate(file, len(content[: match.start()].encode("utf-8")))
+                    break
 
-                new_content += content[log_start:log_end]
-            with file.open("w") as f:
-                f.write(new_content)
+        for file in self.path.glob("**/*.pkl"):
+            timestamp = datetime.strptime(file.stem, "%Y-%m-%d_%H-%M-%S-%f").replace(tzinfo=timezone.utc)
+            if timestamp > time:
+                file.unlink()
@@ -63,14 +63,17 @@ class CallerInfo(TypedDict):
     name: Optional[str]
 
 
-def get_caller_info() -> CallerInfo:
-    # Get the current stack information
-    stack = inspect.stack()
-    # The second element is usually the caller's information
-    caller_info = stack[2]
-    frame = caller_info[0]
+def get_caller_info(level: int = 2) -> CallerInfo:
+    """
+    Get the information of the caller; `level` is the depth of the caller in the stack
+    (0 is this function, the default 2 is the caller of the function calling this one).
+    """
+    # only walk the frames instead of `inspect.stack()`, which reads the source code of every frame in the stack
+    frame = inspect.currentframe()
+    for _ in range(level):
+        frame = frame.f_back
     info: CallerInfo = {
-        "line": caller_info.lineno,
+        "line": frame.f_lineno,
         "name": frame.f_globals["__name__"],  # Get the module name from the frame's globals
         "function": frame.f_code.co_name,  # Get the caller's function name
     }
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import hashlib
 import json
 import multiprocessing
+import multiprocessing.util
 import os
 import re
 import sqlite3
 import ssl
+import sys
+import threading
 import time
 import urllib.request
 import uuid
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from copy import deepcopy
 from pathlib import Path
 from typing import Any, Optional
@@ -84,87 +92,248 @@ class ConvManager:
         # TODO: reseve line breaks to make it more convient to edit file directly.
 
 
+class MemoryLRUCache:
+    """
+    A process-local LRU cache bounded by the (approximate) bytes of its values.
+    It is the first tier in front of the persistent `SQliteLazyCache`.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, str | bytes):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.miss += 1
+                return None
+            self._data.move_to_end(key)
+            self.hit += 1
+            return self._data[key][0]
+
+    def put(self, key: Any, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self.current_bytes -= self._data.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> dict[str, int]:
+        return {"hit": self.hit, "miss": self.miss, "items": len(self._data), "bytes": self.current_bytes}
+
+
 class SQliteLazyCache(SingletonBaseClass):
+    """
+    The persistent cache of chat responses, embeddings and session messages.
+
+    It is safe to be shared by multiple processes (e.g. the workers forked by `multiprocessing_wrapper`):
+    - The database is in WAL mode, so readers never block the writer.
+    - Each process (and each forked child) lazily opens its own connection.
+    - Writes of chat responses and embeddings are buffered in memory and committed together in one transaction,
+      so the write lock of the database is only held for a short time.
+      Buffered writes are committed when `prompt_cache_batch_size` writes are pending, when the oldest one is older
+      than `prompt_cache_flush_interval` seconds, or when the process exits.
+    - Embeddings are stored as float32 blobs instead of json text.
+    - Chat responses and embeddings are evicted in least-recently-used order when `prompt_cache_max_entries` is set.
+    - A process-local `MemoryLRUCache` of `prompt_cache_memory_limit` bytes is put in front of the database,
+      so repeated lookups skip the query and the decoding.
+    """
+
+    CACHE_TABLES = ("chat_cache", "embedding_cache")
+
     def __init__(self, cache_location: str) -> None:
+        # NOTE: `SingletonBaseClass` calls `__init__` every time the instance is retrieved,
+        # so we only initialize it once to keep the connection, the write buffer and the statistics.
+        if getattr(self, "cache_location", None) is not None:
+            return
         super().__init__()
         self.cache_location = cache_location
-        db_file_exist = Path(cache_location).exists()
-        # TODO: sqlite3 does not support multiprocessing.
-        self.conn = sqlite3.connect(cache_location, timeout=20)
-        self.c = self.conn.cursor()
-        if not db_file_exist:
-            self.c.execute(
-                """
-                CREATE TABLE chat_cache (
-                    md5_key TEXT PRIMARY KEY,
-                    chat TEXT
-                )
-                """,
-            )
-            self.c.execute(
-                """
-                CREATE TABLE embedding_cache (
-                    md5_key TEXT PRIMARY KEY,
-                    embedding TEXT
+        self.batch_size = max(RD_AGENT_SETTINGS.prompt_cache_batch_size, 1)
+        self.flush_interval = RD_AGENT_SETTINGS.prompt_cache_flush_interval
+        self.max_entries = RD_AGENT_SETTINGS.prompt_cache_max_entries
+
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_pid: int | None = None
+        # table -> md5_key -> value; the values are already encoded for sqlite
+        self._pending: dict[str, dict[str, str | bytes]] = {table: {} for table in self.CACHE_TABLES}
+        self._pending_since: float | None = None
+        # table -> md5_keys read since the last flush; only tracked when eviction is enabled
+        self._touched: dict[str, set[str]] = {table: set() for table in self.CACHE_TABLES}
+        self.stats = {"chat_hit": 0, "chat_miss": 0, "embedding_hit": 0, "embedding_miss": 0}
+        self.memory_cache = MemoryLRUCache(max_bytes=RD_AGENT_SETTINGS.prompt_cache_memory_limit)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            # The connection inherited from the parent process must not be used in a forked child.
+            # The writes buffered by the parent are left to the parent.
+            self._conn = self._connect()
+            self._conn_pid = pid
+            self._pending = {table: {} for table in self.CACHE_TABLES}
+            self._pending_since = None
+            self._touched = {table: set() for table in self.CACHE_TABLES}
+            # `multiprocessing.util.Finalize` is run at exit in both the main process and the (gracefully exited)
+            # child processes, while `atexit` is not run in the forked children.
+            multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.cache_location, timeout=20, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS chat_cache (md5_key TEXT PRIMARY KEY, chat TEXT, last_access REAL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache (md5_key TEXT PRIMARY KEY, embedding BLOB, last_access REAL)",
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS message_cache (conversation_id TEXT PRIMARY KEY, message TEXT)")
+        for table in self.CACHE_TABLES:
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            if "last_access" not in columns:
+                # cache files created by the former version of the cache have no access time.
+                try:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN last_access REAL DEFAULT 0")
+                except sqlite3.OperationalError:
+                    pass  # the column is added by another process at the same time
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        conn.commit()
+        return conn
+
+    def _get(self, table: str, column: str, md5_key: str) -> Any:
+        with self._lock:
+            conn = self.conn
+            if md5_key in self._pending[table]:
+                return self._pending[table][md5_key]
+            result = conn.execute(f"SELECT {column} FROM {table} WHERE md5_key=?", (md5_key,)).fetchone()  # noqa: S608
+            if result is not None and self.max_entries is not None:
+                self._touched[table].add(md5_key)
+            return None if result is None else result[0]
+
+    def _set(self, table: str, items: dict[str, str | bytes]) -> None:
+        with self._lock:
+            _ = self.conn  # make sure the buffer belongs to the current process
+            self._pending[table].update(items)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            if (
+                sum(len(pending) for pending in self._pending.values()) >= self.batch_size
+                or time.monotonic() - self._pending_since >= self.flush_interval
+            ):
+                self.flush()
+
+    def flush(self) -> None:
+        """Commit the buffered writes and access times in one transaction and evict the stale entries."""
+        with self._lock:
+            if self._conn is None or self._conn_pid != os.getpid():
+                return
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chat_cache (md5_key, chat, last_access) VALUES (?, ?, ?)",
+                    [(k, v, now) for k, v in self._pending["chat_cache"].items()],
                 )
-                """,
-            )
-            self.c.execute(
-                """
-                CREATE TABLE message_cache (
-                    conversation_id TEXT PRIMARY KEY,
-                    message TEXT
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (md5_key, embedding, last_access) VALUES (?, ?, ?)",
+                    [(k, v, now) for k, v in self._pending["embedding_cache"].items()],
                 )
-                """,
-            )
-            self.conn.commit()
+                for table in self.CACHE_TABLES:
+                    self._conn.executemany(
+                        f"UPDATE {table} SET last_access=? WHERE md5_key=?",  # noqa: S608
+                        [(now, k) for k in self._touched[table]],
+                    )
+                    if self.max_entries is not None:
+                        self._conn.execute(
+                            f"DELETE FROM {table} WHERE md5_key IN "  # noqa: S608
+                            f"(SELECT md5_key FROM {table} ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                            (self.max_entries,),
+                        )
+            self._pending = {table: {} for table in self.CACHE_TABLES}
+            self._pending_since = None
+            self._touched = {table: set() for table in self.CACHE_TABLES}
 
     def chat_get(self, key: str) -> str | None:
         md5_key = md5_hash(key)
-        self.c.execute("SELECT chat FROM chat_cache WHERE md5_key=?", (md5_key,))
-        result = self.c.fetchone()
+        result = self.memory_cache.get(("chat", md5_key))
         if result is None:
-            return None
-        return result[0]
+            result = self._get("chat_cache", "chat", md5_key)
+            if result is not None:
+                self.memory_cache.put(("chat", md5_key), result)
+        self.stats["chat_miss" if result is None else "chat_hit"] += 1
+        return result
 
     def embedding_get(self, key: str) -> list | dict | str | None:
         md5_key = md5_hash(key)
-        self.c.execute("SELECT embedding FROM embedding_cache WHERE md5_key=?", (md5_key,))
-        result = self.c.fetchone()
+        result = self.memory_cache.get(("embedding", md5_key))
         if result is None:
-            return None
-        return json.loads(result[0])
+            encoded = self._get("embedding_cache", "embedding", md5_key)
+            if encoded is not None:
+                # embeddings dumped by the former version of the cache are json text.
+                result = np.asarray(
+                    json.loads(encoded) if isinstance(encoded, str) else np.frombuffer(encoded, dtype=np.float32),
+                    dtype=np.float32,
+                )
+                self.memory_cache.put(("embedding", md5_key), result)
+        self.stats["embedding_miss" if result is None else "embedding_hit"] += 1
+        return None if result is None else result.tolist()
 
     def chat_set(self, key: str, value: str) -> None:
         md5_key = md5_hash(key)
-        self.c.execute(
-            "INSERT OR REPLACE INTO chat_cache (md5_key, chat) VALUES (?, ?)",
-            (md5_key, value),
-        )
-        self.conn.commit()
+        self.memory_cache.put(("chat", md5_key), value)
+        self._set("chat_cache", {md5_key: value})
 
     def embedding_set(self, content_to_embedding_dict: dict) -> None:
+        items = {}
         for key, value in content_to_embedding_dict.items():
             md5_key = md5_hash(key)
-            self.c.execute(
-                "INSERT OR REPLACE INTO embedding_cache (md5_key, embedding) VALUES (?, ?)",
-                (md5_key, json.dumps(value)),
-            )
-        self.conn.commit()
+            embedding = np.asarray(value, dtype=np.float32)
+            self.memory_cache.put(("embedding", md5_key), embedding)
+            items[md5_key] = embedding.tobytes()
+        self._set("embedding_cache", items)
 
     def message_get(self, conversation_id: str) -> list[str]:
-        self.c.execute("SELECT message FROM message_cache WHERE conversation_id=?", (conversation_id,))
-        result = self.c.fetchone()
+        with self._lock:
+            result = self.conn.execute(
+                "SELECT message FROM message_cache WHERE conversation_id=?",
+                (conversation_id,),
+            ).fetchone()
         if result is None:
             return []
         return json.loads(result[0])
 
     def message_set(self, conversation_id: str, message_value: list[str]) -> None:
-        self.c.execute(
-            "INSERT OR REPLACE INTO message_cache (conversation_id, message) VALUES (?, ?)",
-            (conversation_id, json.dumps(message_value)),
-        )
-        self.conn.commit()
+        # The session messages are not a cache, so they are written through.
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO message_cache (conversation_id, message) VALUES (?, ?)",
+                (conversation_id, json.dumps(message_value)),
+            )
+
+    def get_stats(self) -> dict[str, int]:
+        """The hits are counted over both tiers; `memory_*` are the statistics of the in-memory tier."""
+        return {**self.stats, **{f"memory_{k}": v for k, v in self.memory_cache.get_stats().items()}}
 
 
 class SessionChatHistoryCache(SingletonBaseClass):
@@ -179,6 +348,85 @@ class SessionChatHistoryCache(SingletonBaseClass):
         self.cache.message_set(conversation_id, message_value)
 
 
+class LLMRequestLimiter:
+    """
+    Process-wide limiter for the asynchronous API of APIBackend.
+
+    One instance is shared by all the requests to the same model (see `get_request_limiter`).
+    It bounds the number of in-flight requests and keeps the requests/tokens sent in the
+    last minute under the configured budget.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, model: str, max_concurrency: int, rpm_limit: int | None, tpm_limit: int | None) -> None:
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        # asyncio primitives are bound to the event loop where they are used, so we keep one semaphore per loop.
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._history: deque[tuple[float, int]] = deque()  # (send time, tokens) of requests in the window
+        self._history_tokens = 0
+        self._lock = threading.Lock()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    def _try_reserve(self, tokens: int) -> float:
+        """
+        Reserve the budget for a request.
+
+        Returns
+        -------
+        float
+            0 if the budget is reserved, otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._history and now - self._history[0][0] >= self.WINDOW_SECONDS:
+                self._history_tokens -= self._history.popleft()[1]
+            if self._history:
+                wait_seconds = self.WINDOW_SECONDS - (now - self._history[0][0])
+                if self.rpm_limit is not None and len(self._history) >= self.rpm_limit:
+                    return wait_seconds
+                # A single request larger than the budget is still sent when the window is empty.
+                if self.tpm_limit is not None and self._history_tokens + tokens > self.tpm_limit:
+                    return wait_seconds
+            self._history.append((now, tokens))
+            self._history_tokens += tokens
+            return 0.0
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0) -> AsyncIterator[None]:
+        async with self._get_semaphore():
+            while (wait_seconds := self._try_reserve(tokens)) > 0:
+                await asyncio.sleep(wait_seconds)
+            yield
+
+
+_REQUEST_LIMITERS: dict[tuple, LLMRequestLimiter] = {}
+_REQUEST_LIMITERS_LOCK = threading.Lock()
+
+
+def get_request_limiter(model: str) -> LLMRequestLimiter:
+    key = (
+        model,
+        RD_AGENT_SETTINGS.llm_max_concurrency,
+        RD_AGENT_SETTINGS.llm_rpm_limit,
+        RD_AGENT_SETTINGS.llm_tpm_limit,
+    )
+    with _REQUEST_LIMITERS_LOCK:
+        if key not in _REQUEST_LIMITERS:
+            _REQUEST_LIMITERS[key] = LLMRequestLimiter(*key)
+        return _REQUEST_LIMITERS[key]
+
+
 class ChatSession:
     def __init__(self, api_backend: Any, conversation_id: str | None = None, system_prompt: str | None = None) -> None:
         self.conversation_id = str(uuid.uuid4()) if conversation_id is None else conversation_id
@@ -332,40 +580,26 @@ class APIBackend:
                 self.cfg.embedding_azure_api_version if embedding_api_version is None else embedding_api_version
             )
 
-            if self.use_azure:
-                if self.use_azure_token_provider:
-                    dac_kwargs = {}
-                    if self.managed_identity_client_id is not None:
-                        dac_kwargs["managed_identity_client_id"] = self.managed_identity_client_id
-                    credential = DefaultAzureCredential(**dac_kwargs)
-                    token_provider = get_bearer_token_provider(
-                        credential,
-                        "https://cognitiveservices.azure.com/.default",
-                    )
-                    self.chat_client = openai.AzureOpenAI(
-                        azure_ad_token_provider=token_provider,
-                        api_version=self.chat_api_version,
-                        azure_endpoint=self.chat_api_base,
-                    )
-                    self.embedding_client = openai.AzureOpenAI(
-                        azure_ad_token_provider=token_provider,
-                        api_version=self.embedding_api_version,
-                        azure_endpoint=self.embedding_api_base,
-                    )
-                else:
-                    self.chat_client = openai.AzureOpenAI(
-                        api_key=self.chat_api_key,
-                        api_version=self.chat_api_version,
-                        azure_endpoint=self.chat_api_base,
-                    )
-                    self.embedding_client = openai.AzureOpenAI(
-                        api_key=self.embedding_api_key,
-                        api_version=self.embedding_api_version,
-                        azure_endpoint=self.embedding_api_base,
-                    )
-            else:
-                self.chat_client = openai.OpenAI(api_key=self.chat_api_key)
-                self.embedding_client = openai.OpenAI(api_key=self.embedding_api_key)
+            self.azure_token_provider = None
+            if self.use_azure and self.use_azure_token_provider:
+                dac_kwargs = {}
+                if self.managed_identity_client_id is not None:
+                    dac_kwargs["managed_identity_client_id"] = self.managed_identity_client_id
+                credential = DefaultAzureCredential(**dac_kwargs)
+                self.azure_token_provider = get_bearer_token_provider(
+                    credential,
+                    "https://cognitiveservices.azure.com/.default",
+                )
+            self.chat_client, self.embedding_client = self._build_clients(asynchronous=False)
+
+        # async clients are created lazily for each event loop (see `_get_async_clients`)
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[Any, Any]] = (
+            weakref.WeakKeyDictionary()
+        )
+        # the number of running async requests in each event loop, the clients are closed after the last one
+        self._async_client_users: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int] = (
+            weakref.WeakKeyDictionary()
+        )
 
         self.dump_chat_cache = self.cfg.dump_chat_cache if dump_chat_cache is None else dump_chat_cache
         self.use_chat_cache = self.cfg.use_chat_cache if use_chat_cache is None else use_chat_cache
@@ -382,6 +616,59 @@ class APIBackend:
         self.use_gcr_endpoint = self.cfg.use_gcr_endpoint
         self.retry_wait_seconds = self.cfg.retry_wait_seconds
 
+    def _build_clients(self, *, asynchronous: bool) -> tuple[Any, Any]:
+        """Build the (chat client, embedding client) pair of the openai SDK."""
+        if self.use_azure:
+            azure_client_cls = openai.AsyncAzureOpenAI if asynchronous else openai.AzureOpenAI
+            if self.use_azure_token_provider:
+                auth_kwargs = {"azure_ad_token_provider": self.azure_token_provider}
+                chat_auth_kwargs, embedding_auth_kwargs = auth_kwargs, auth_kwargs
+            else:
+                chat_auth_kwargs = {"api_key": self.chat_api_key}
+                embedding_auth_kwargs = {"api_key": self.embedding_api_key}
+            chat_client = azure_client_cls(
+                **chat_auth_kwargs,
+                api_version=self.chat_api_version,
+                azure_endpoint=self.chat_api_base,
+            )
+            embedding_client = azure_client_cls(
+                **embedding_auth_kwargs,
+                api_version=self.embedding_api_version,
+                azure_endpoint=self.embedding_api_base,
+            )
+        else:
+            client_cls = openai.AsyncOpenAI if asynchronous else openai.OpenAI
+            chat_client = client_cls(api_key=self.chat_api_key)
+            embedding_client = client_cls(api_key=self.embedding_api_key)
+        return chat_client, embedding_client
+
+    def _get_async_clients(self) -> tuple[Any, Any]:
+        """
+        The async clients hold connection pools bound to the running event loop.
+        So all the requests of this backend in the same loop share one pair of clients.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = self._build_clients(asynchronous=True)
+        return self._async_clients[loop]
+
+    async def aclose_async_clients(self) -> None:
+        """Close the async clients of the running event loop and release their connections."""
+        for client in self._async_clients.pop(asyncio.get_running_loop(), ()):
+            await client.close()
+
+    @asynccontextmanager
+    async def _async_clients_scope(self) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        self._async_client_users[loop] = self._async_client_users.get(loop, 0) + 1
+        try:
+            yield
+        finally:
+            self._async_client_users[loop] -= 1
+            if self._async_client_users[loop] == 0:
+                del self._async_client_users[loop]
+                await self.aclose_async_clients()
+
     def build_chat_session(
         self,
         conversation_id: str | None = None,
@@ -466,6 +753,75 @@ class APIBackend:
             return resp[0]
         return resp
 
+    async def acreate_chat_completion(
+        self,
+        user_prompt: str,
+        system_prompt: str | None = None,
+        former_messages: list | None = None,
+        chat_cache_prefix: str = "",
+        *,
+        shrink_multiple_break: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        """
+        The asynchronous version of `build_messages_and_create_chat_completion`.
+        The number of in-flight requests and the request/token rate of each model are bounded by
+        `llm_max_concurrency`, `llm_rpm_limit` and `llm_tpm_limit`.
+        """
+        if former_messages is None:
+            former_messages = []
+        messages = self.build_messages(
+            user_prompt,
+            system_prompt,
+            former_messages,
+            shrink_multiple_break=shrink_multiple_break,
+        )
+        async with self._async_clients_scope():
+            return await self._atry_create_chat_completion_or_embedding(
+                messages=messages,
+                chat_completion=True,
+                chat_cache_prefix=chat_cache_prefix,
+                **kwargs,
+            )
+
+    async def acreate_embedding(self, input_content: str | list[str], **kwargs: Any) -> list[Any] | Any:
+        """The asynchronous version of `create_embedding`."""
+        input_content_list = [input_content] if isinstance(input_content, str) else input_content
+        async with self._async_clients_scope():
+            resp = await self._atry_create_chat_completion_or_embedding(
+                input_content_list=input_content_list,
+                embedding=True,
+                **kwargs,
+            )
+        if isinstance(input_content, str):
+            return resp[0]
+        return resp
+
+    async def abatch_chat(
+        self,
+        user_prompts: list[str],
+        system_prompt: str | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """
+        Send the user prompts concurrently and return the responses in the same order.
+        `kwargs` are passed to `acreate_chat_completion` for every prompt.
+        The async clients of the event loop are shared by the prompts and closed when the last of them finishes.
+        """
+        async with self._async_clients_scope():
+            return list(
+                await asyncio.gather(
+                    *[
+                        self.acreate_chat_completion(user_prompt, system_prompt, **kwargs)
+                        for user_prompt in user_prompts
+                    ],
+                ),
+            )
+
+    def batch_chat(self, user_prompts: list[str], system_prompt: str | None = None, **kwargs: Any) -> list[str]:
+        """The blocking entrance of `abatch_chat` for the synchronous workflow code."""
+        return asyncio.run(self.abatch_chat(user_prompts, system_prompt, **kwargs))
+
     def _create_chat_completion_auto_continue(self, messages: list, **kwargs: dict) -> str:
         """
         Call the chat completion function and automatically continue the conversation if the finish_reason is length.
@@ -486,6 +842,26 @@ class APIBackend:
             return response + new_response
         return response
 
+    async def _acreate_chat_completion_auto_continue(self, messages: list, **kwargs: Any) -> str:
+        """The asynchronous version of `_create_chat_completion_auto_continue`."""
+        response, finish_reason = await self._acreate_chat_completion_inner_function(messages=messages, **kwargs)
+
+        if finish_reason == "length":
+            new_message = deepcopy(messages)
+            new_message.append({"role": "assistant", "content": response})
+            new_message.append(
+                {
+                    "role": "user",
+                    "content": "continue the former output with no overlap",
+                },
+            )
+            new_response, finish_reason = await self._acreate_chat_completion_inner_function(
+                messages=new_message,
+                **kwargs,
+            )
+            return response + new_response
+        return response
+
     def _try_create_chat_completion_or_embedding(
         self,
         max_retry: int = 10,
@@ -518,9 +894,46 @@ class APIBackend:
         error_message = f"Failed to create chat completion after {max_retry} retries."
         raise RuntimeError(error_message)
 
-    def _create_embedding_inner_function(
-        self, input_content_list: list[str], **kwargs: Any
-    ) -> list[Any]:  # noqa: ARG002
+    async def _atry_create_chat_completion_or_embedding(
+        self,
+        max_retry: int = 10,
+        *,
+        chat_completion: bool = False,
+        embedding: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """The asynchronous version of `_try_create_chat_completion_or_embedding` with the same retry semantics."""
+        assert not (chat_completion and embedding), "chat_completion and embedding cannot be True at the same time"
+        max_retry = self.cfg.max_retry if self.cfg.max_retry is not None else max_retry
+        for i in range(max_retry):
+            try:
+                if embedding:
+                    return await self._acreate_embedding_inner_function(**kwargs)
+                if chat_completion:
+                    return await self._acreate_chat_completion_auto_continue(**kwargs)
+            except openai.BadRequestError as e:  # noqa: PERF203
+                logger.warning(e)
+                logger.warning(f"Retrying {i+1}th time...")
+                if "'messages' must contain the word 'json' in some form" in e.message:
+                    kwargs["add_json_in_prompt"] = True
+                elif embedding and "maximum context length" in e.message:
+                    kwargs["input_content_list"] = [
+                        content[: len(content) // 2] for content in kwargs.get("input_content_list", [])
+                    ]
+            except Exception as e:  # noqa: BLE001
+                logger.warning(e)
+                logger.warning(f"Retrying {i+1}th time...")
+                await asyncio.sleep(self.retry_wait_seconds)
+        error_message = f"Failed to create chat completion after {max_retry} retries."
+        raise RuntimeError(error_message)
+
+    def _get_embedding_cache(self, input_content_list: list[str]) -> tuple[dict, list[str]]:
+        """
+        Returns
+        -------
+        tuple[dict, list[str]]
+            the embeddings found in the cache and the contents which are not cached.
+        """
         content_to_embedding_dict = {}
         filtered_input_content_list = []
         if self.use_embedding_cache:
@@ -532,6 +945,12 @@ class APIBackend:
                     filtered_input_content_list.append(content)
         else:
             filtered_input_content_list = input_content_list
+        return content_to_embedding_dict, filtered_input_content_list
+
+    def _create_embedding_inner_function(
+        self, input_content_list: list[str], **kwargs: Any
+    ) -> list[Any]:  # noqa: ARG002
+        content_to_embedding_dict, filtered_input_content_list = self._get_embedding_cache(input_content_list)
 
         if len(filtered_input_content_list) > 0:
             if self.use_azure:
@@ -551,6 +970,29 @@ class APIBackend:
                 self.cache.embedding_set(content_to_embedding_dict)
         return [content_to_embedding_dict[content] for content in input_content_list]
 
+    async def _acreate_embedding_inner_function(
+        self, input_content_list: list[str], **kwargs: Any
+    ) -> list[Any]:  # noqa: ARG002
+        content_to_embedding_dict, filtered_input_content_list = self._get_embedding_cache(input_content_list)
+
+        if len(filtered_input_content_list) > 0:
+            tokens = (
+                sum(len(self.encoder.encode(content)) for content in filtered_input_content_list)
+                if self.encoder is not None
+                else 0
+            )
+            async with get_request_limiter(self.embedding_model).limit(tokens=tokens):
+                response = await self._get_async_clients()[1].embeddings.create(
+                    model=self.embedding_model,
+                    input=filtered_input_content_list,
+                )
+            for index, data in enumerate(response.data):
+                content_to_embedding_dict[filtered_input_content_list[index]] = data.embedding
+
+            if self.dump_embedding_cache:
+                self.cache.embedding_set(content_to_embedding_dict)
+        return [content_to_embedding_dict[content] for content in input_content_list]
+
     def _build_log_messages(self, messages: list[dict]) -> str:
         log_messages = ""
         for m in messages:
@@ -562,6 +1004,51 @@ class APIBackend:
             )
         return log_messages
 
+    def _build_chat_cache_key(self, messages: list[dict], chat_cache_prefix: str, seed: int | None) -> str:
+        input_content_json = json.dumps(messages)
+        return (
+            chat_cache_prefix + input_content_json + f"<seed={seed}/>"
+        )  # FIXME this is a hack to make sure the cache represents the round index
+
+    def _get_chat_cache(self, input_content_json: str) -> str | None:
+        if not self.use_chat_cache:
+            return None
+        cache_result = self.cache.chat_get(input_content_json)
+        if cache_result is not None and self.cfg.log_llm_chat_content:
+            logger.info(f"{LogColors.CYAN}Response:{cache_result}{LogColors.END}", tag="llm_messages")
+        return cache_result
+
+    def _build_chat_completion_kwargs(
+        self,
+        messages: list[dict],
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        frequency_penalty: float | None = None,
+        presence_penalty: float | None = None,
+        *,
+        json_mode: bool = False,
+        add_json_in_prompt: bool = False,
+    ) -> dict[str, Any]:
+        """build the arguments of `chat.completions.create` for the openai SDK"""
+        kwargs = dict(
+            model=self.chat_model,
+            messages=messages,
+            max_tokens=self.cfg.chat_max_tokens if max_tokens is None else max_tokens,
+            temperature=self.cfg.chat_temperature if temperature is None else temperature,
+            stream=self.chat_stream,
+            seed=self.chat_seed,
+            frequency_penalty=self.cfg.chat_frequency_penalty if frequency_penalty is None else frequency_penalty,
+            presence_penalty=self.cfg.chat_presence_penalty if presence_penalty is None else presence_penalty,
+        )
+        if json_mode:
+            if add_json_in_prompt:
+                for message in messages[::-1]:
+                    message["content"] = message["content"] + "\nPlease respond in json format."
+                    if message["role"] == "system":
+                        break
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
     def _create_chat_completion_inner_function(  # noqa: C901, PLR0912, PLR0915
         self,
         messages: list[dict],
@@ -585,25 +1072,15 @@ class APIBackend:
         if self.cfg.log_llm_chat_content:
             logger.info(self._build_log_messages(messages), tag="llm_messages")
         # TODO: fail to use loguru adaptor due to stream response
-        input_content_json = json.dumps(messages)
-        input_content_json = (
-            chat_cache_prefix + input_content_json + f"<seed={seed}/>"
-        )  # FIXME this is a hack to make sure the cache represents the round index
-        if self.use_chat_cache:
-            cache_result = self.cache.chat_get(input_content_json)
-            if cache_result is not None:
-                if self.cfg.log_llm_chat_content:
-                    logger.info(f"{LogColors.CYAN}Response:{cache_result}{LogColors.END}", tag="llm_messages")
-                return cache_result, None
+        input_content_json = self._build_chat_cache_key(messages, chat_cache_prefix, seed)
+        cache_result = self._get_chat_cache(input_content_json)
+        if cache_result is not None:
+            return cache_result, None
 
         if temperature is None:
             temperature = self.cfg.chat_temperature
         if max_tokens is None:
             max_tokens = self.cfg.chat_max_tokens
-        if frequency_penalty is None:
-            frequency_penalty = self.cfg.chat_frequency_penalty
-        if presence_penalty is None:
-            presence_penalty = self.cfg.chat_presence_penalty
 
         finish_reason = None
         if self.use_llama2:
@@ -638,23 +1115,15 @@ class APIBackend:
             if self.cfg.log_llm_chat_content:
                 logger.info(f"{LogColors.CYAN}Response:{resp}{LogColors.END}", tag="llm_messages")
         else:
-            kwargs = dict(
-                model=self.chat_model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=self.chat_stream,
-                seed=self.chat_seed,
-                frequency_penalty=frequency_penalty,
-                presence_penalty=presence_penalty,
+            kwargs = self._build_chat_completion_kwargs(
+                messages,
+                temperature,
+                max_tokens,
+                frequency_penalty,
+                presence_penalty,
+                json_mode=json_mode,
+                add_json_in_prompt=add_json_in_prompt,
             )
-            if json_mode:
-                if add_json_in_prompt:
-                    for message in messages[::-1]:
-                        message["content"] = message["content"] + "\nPlease respond in json format."
-                        if message["role"] == "system":
-                            break
-                kwargs["response_format"] = {"type": "json_object"}
             response = self.chat_client.chat.completions.create(**kwargs)
 
             if self.chat_stream:
@@ -689,6 +1158,78 @@ class APIBackend:
             self.cache.chat_set(input_content_json, resp)
         return resp, finish_reason
 
+    async def _acreate_chat_completion_inner_function(
+        self,
+        messages: list[dict],
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        chat_cache_prefix: str = "",
+        frequency_penalty: float | None = None,
+        presence_penalty: float | None = None,
+        *,
+        json_mode: bool = False,
+        add_json_in_prompt: bool = False,
+        seed: Optional[int] = None,
+    ) -> tuple[str, str | None]:
+        """
+        The asynchronous version of `_create_chat_completion_inner_function`.
+
+        The streamed response is logged once it is complete;
+        otherwise the chunks of concurrent requests would be interleaved in the log.
+        """
+        if self.use_llama2 or self.use_gcr_endpoint:
+            # These backends have no asynchronous client, so the blocking call is moved to a worker thread.
+            return await asyncio.to_thread(
+                self._create_chat_completion_inner_function,
+                messages,
+                temperature,
+                max_tokens,
+                chat_cache_prefix,
+                frequency_penalty,
+                presence_penalty,
+                json_mode=json_mode,
+                add_json_in_prompt=add_json_in_prompt,
+                seed=seed,
+            )
+
+        if self.cfg.log_llm_chat_content:
+            logger.info(self._build_log_messages(messages), tag="llm_messages")
+        input_content_json = self._build_chat_cache_key(messages, chat_cache_prefix, seed)
+        cache_result = self._get_chat_cache(input_content_json)
+        if cache_result is not None:
+            return cache_result, None
+
+        kwargs = self._build_chat_completion_kwargs(
+            messages,
+            temperature,
+            max_tokens,
+            frequency_penalty,
+            presence_penalty,
+            json_mode=json_mode,
+            add_json_in_prompt=add_json_in_prompt,
+        )
+        finish_reason = None
+        tokens = self.calculate_token_from_messages(messages) + kwargs["max_tokens"]
+        async with get_request_limiter(self.chat_model).limit(tokens=tokens):
+            response = await self._get_async_clients()[0].chat.completions.create(**kwargs)
+            if self.chat_stream:
+                resp = ""
+                async for chunk in response:
+                    if len(chunk.choices) > 0 and chunk.choices[0].delta.content is not None:
+                        resp += chunk.choices[0].delta.content
+                    if len(chunk.choices) > 0 and chunk.choices[0].finish_reason is not None:
+                        finish_reason = chunk.choices[0].finish_reason
+            else:
+                resp = response.choices[0].message.content
+                finish_reason = response.choices[0].finish_reason
+        if self.cfg.log_llm_chat_content:
+            logger.info(f"{LogColors.CYAN}Response:{resp}{LogColors.END}", tag="llm_messages")
+        if json_mode:
+            json.loads(resp)
+        if self.dump_chat_cache:
+            self.cache.chat_set(input_content_json, resp)
+        return resp, finish_reason
+
     def calculate_token_from_messages(self, messages: list[dict]) -> int:
         if self.use_llama2 or self.use_gcr_endpoint:
             logger.warning("num_tokens_from_messages() is not implemented for model llama2.")
@@ -3,6 +3,7 @@ import re
 
 import numpy as np  # linear algebra
 import pandas as pd  # data processing, CSV file I/O (e.g. pd.read_csv)
+import preprocessed_store
 from sklearn.model_selection import train_test_split
 
 
@@ -10,6 +11,8 @@ def preprocess_script():
     """
     This method applies the preprocessing steps to the training, validation, and test datasets.
     """
+    if preprocessed_store.exists("/kaggle/input/preprocessed"):
+        return preprocessed_store.load_preprocessed("/kaggle/input/preprocessed")
     if os.path.exists("/kaggle/input/X_train.pkl"):
         X_train = pd.read_pickle("/kaggle/input/X_train.pkl")
         X_valid = pd.read_pickle("/kaggle/input/X_valid.pkl")
@@ -2,6 +2,7 @@ import os
 
 import numpy as np
 import pandas as pd
+import preprocessed_store
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.model_selection import train_test_split
@@ -68,6 +69,8 @@ def preprocess_transform(X: pd.DataFrame, preprocessor, numerical_cols, categori
 
 
 def preprocess_script():
+    if preprocessed_store.exists("/kaggle/input/preprocessed"):
+        return preprocessed_store.load_preprocessed("/kaggle/input/preprocessed")
     if os.path.exists("/kaggle/input/X_train.pkl"):
         X_train = pd.read_pickle("/kaggle/input/X_train.pkl")
         X_valid = pd.read_pickle("/kaggle/input/X_valid.pkl")
@@ -1,21 +1,15 @@
-import importlib.util
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from fea_share_preprocess import preprocess_script
+from feature_cache import transform_with_cache
+from model_runner import run_models, save_score
 from sklearn.metrics import mean_squared_error
 
 DIRNAME = Path(__file__).absolute().resolve().parent
 
 
-def import_module_from_path(module_name, module_path):
-    spec = importlib.util.spec_from_file_location(module_name, module_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 # 1) Preprocess the data
 X_train, X_valid, y_train, y_valid, X_test, ids = preprocess_script()
 
@@ -24,11 +18,7 @@ X_train_l, X_valid_l = [], []
 X_test_l = []
 
 for f in DIRNAME.glob("feature/feat*.py"):
-    cls = import_module_from_path(f.stem, f).feature_engineering_cls()
-    cls.fit(X_train)
-    X_train_f = cls.transform(X_train)
-    X_valid_f = cls.transform(X_valid)
-    X_test_f = cls.transform(X_test)
+    X_train_f, X_valid_f, X_test_f = transform_with_cache(f, X_train, X_valid, X_test)
 
     if X_train_f.shape[-1] == X_valid_f.shape[-1] and X_train_f.shape[-1] == X_test_f.shape[-1]:
         X_train_l.append(X_train_f)
@@ -40,33 +30,23 @@ X_valid = pd.concat(X_valid_l, axis=1, keys=[f"feature_{i}" for i in range(len(X
 X_test = pd.concat(X_test_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_test_l))])
 
 
-# 3) Train the model
-model_l = []  # list[tuple[model, predict_func]]
-for f in DIRNAME.glob("model/model*.py"):
-    select_python_path = f.with_name(f.stem.replace("model", "select") + f.suffix)
-    select_m = import_module_from_path(select_python_path.stem, select_python_path)
-    X_train_selected = select_m.select(X_train.copy())
-    X_valid_selected = select_m.select(X_valid.copy())
-
-    m = import_module_from_path(f.stem, f)
-    model_l.append((m.fit(X_train_selected, y_train, X_valid_selected, y_valid), m.predict, select_m))
+# 3) Train the models and predict the valid & test sets concurrently
+model_results = run_models(DIRNAME.glob("model/model*.py"), X_train, y_train, X_valid, y_valid, X_test)
 
 # 4) Evaluate the model on the validation set
 metrics_all = []
-for model, predict_func, select_m in model_l:
-    X_valid_selected = select_m.select(X_valid.copy())
-    y_valid_pred = predict_func(model, X_valid_selected)
+for result in model_results:
+    y_valid_pred = result.y_valid_pred
     metrics = mean_squared_error(y_valid, y_valid_pred, squared=False)
     print(f"RMLSE on valid set: {metrics}")
     metrics_all.append(metrics)
 
 # 5) Save the validation accuracy
 min_index = np.argmin(metrics_all)
-pd.Series(data=[metrics_all[min_index]], index=["RMLSE"]).to_csv("submission_score.csv")
+save_score("RMLSE", metrics_all[min_index], model_results)
 
 # 6) Make predictions on the test set and save them
-X_test_selected = model_l[min_index][2].select(X_test.copy())
-y_test_pred = model_l[min_index][1](model_l[min_index][0], X_test_selected)
+y_test_pred = model_results[min_index].y_test_pred
 
 # 7) Submit predictions for the test set
 submission_result = pd.DataFrame(np.expm1(y_test_pred), columns=["cost"])
@@ -1,6 +1,6 @@
 import io
 import json
-import pickle
+import shutil
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -12,6 +12,7 @@ from rdagent.core.prompts import Prompts
 from rdagent.core.scenario import Scenario
 from rdagent.oai.llm_utils import APIBackend
 from rdagent.scenarios.kaggle.experiment.kaggle_experiment import KGFactorExperiment
+from rdagent.scenarios.kaggle.experiment.template_shared import preprocessed_store
 from rdagent.scenarios.kaggle.kaggle_crawler import crawl_descriptions
 from rdagent.scenarios.kaggle.knowledge_management.vector_base import (
     KaggleExperienceBase,
@@ -129,39 +130,28 @@ class KGScenario(Scenario):
     @property
     def source_data(self) -> str:
         data_folder = Path(KAGGLE_IMPLEMENT_SETTING.local_data_path) / self.competition
-
-        if (data_folder / "X_valid.pkl").exists():
-            X_valid = pd.read_pickle(data_folder / "X_valid.pkl")
-            # TODO: Hardcoded for now, need to be fixed
-            if self.competition == "feedback-prize-english-language-learning":
-                self.input_shape = X_valid.shape
-                return "This is a sparse matrix of descriptive text."
-            buffer = io.StringIO()
-            X_valid.info(verbose=True, buf=buffer, show_counts=True)
-            data_info = buffer.getvalue()
-            self.input_shape = X_valid.shape
-            return data_info
-
-        preprocess_experiment = KGFactorExperiment([])
-        (
-            X_train,
-            X_valid,
-            y_train,
-            y_valid,
-            X_test,
-            *others,
-        ) = preprocess_experiment.experiment_workspace.generate_preprocess_data()
-
-        data_folder.mkdir(exist_ok=True, parents=True)
-        pickle.dump(X_train, open(data_folder / "X_train.pkl", "wb"))
-        pickle.dump(X_valid, open(data_folder / "X_valid.pkl", "wb"))
-        pickle.dump(y_train, open(data_folder / "y_train.pkl", "wb"))
-        pickle.dump(y_valid, open(data_folder / "y_valid.pkl", "wb"))
-        pickle.dump(X_test, open(data_folder / "X_test.pkl", "wb"))
-        pickle.dump(others, open(data_folder / "others.pkl", "wb"))
-
+        store_path = data_folder / "preprocessed"
+
+        if not preprocessed_store.exists(store_path):
+            if (data_folder / "X_valid.pkl").exists():
+                # the data preprocessed by the former versions are converted into the store once
+                preprocessed_store.save_preprocessed(
+                    store_path,
+                    *(pd.read_pickle(data_folder / f"{name}.pkl") for name in preprocessed_store.NAMES),
+                    *pd.read_pickle(data_folder / "others.pkl"),
+                )
+            else:
+                preprocess_experiment = KGFactorExperiment([])
+                preprocess_experiment.experiment_workspace.generate_preprocess_data(store_path=store_path)
+        # the factors are executed in workspaces linking the files of the data folder (see `FactorFBWorkspace`),
+        # so the reader of the store is put beside it
+        shutil.copyfile(preprocessed_store.__file__, data_folder / "preprocessed_store.py")
+
+        X_valid = preprocessed_store.load_frame(store_path / "X_valid")
         self.input_shape = X_valid.shape
-
+        # TODO: Hardcoded for now, need to be fixed
+        if self.competition == "feedback-prize-english-language-learning":
+            return "This is a sparse matrix of descriptive text."
         buffer = io.StringIO()
         X_valid.info(verbose=True, buf=buffer, show_counts=True)
         data_info = buffer.getvalue()
@@ -2,6 +2,7 @@ import os
 
 import numpy as np
 import pandas as pd
+import preprocessed_store
 from sklearn.model_selection import train_test_split
 
 
@@ -54,6 +55,8 @@ def preprocess_script():
     """
     This method applies the preprocessing steps to the training, validation, and test datasets.
     """
+    if preprocessed_store.exists("/kaggle/input/preprocessed"):
+        return preprocessed_store.load_preprocessed("/kaggle/input/preprocessed")
     if os.path.exists("X_train.pkl"):
         X_train = pd.read_pickle("X_train.pkl")
         X_valid = pd.read_pickle("X_valid.pkl")
@@ -1,3 +1,4 @@
+import shutil
 import subprocess
 import zipfile
 from pathlib import Path
@@ -8,26 +9,24 @@ import pandas as pd
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
 from rdagent.core.experiment import FBWorkspace
 from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.kaggle.experiment.template_shared import preprocessed_store
 from rdagent.utils.env import KGDockerEnv
 
-KG_FEATURE_PREPROCESS_SCRIPT = """import pickle
+KG_FEATURE_PREPROCESS_SCRIPT = """from fea_share_preprocess import preprocess_script
+from preprocessed_store import save_preprocessed
 
-from fea_share_preprocess import preprocess_script
+save_preprocessed("preprocessed", *preprocess_script())
+"""
 
-X_train, X_valid, y_train, y_valid, X_test, *others = preprocess_script()
 
-pickle.dump(X_train, open("X_train.pkl", "wb"))
-pickle.dump(X_valid, open("X_valid.pkl", "wb"))
-pickle.dump(y_train, open("y_train.pkl", "wb"))
-pickle.dump(y_valid, open("y_valid.pkl", "wb"))
-pickle.dump(X_test, open("X_test.pkl", "wb"))
-pickle.dump(others, open("others.pkl", "wb"))
-"""
+# the runtime helpers shared by all the competition templates (e.g. the feature cache used by `train.py`)
+KG_TEMPLATE_SHARED_PATH = Path(__file__).parent / "template_shared"
 
 
 class KGFBWorkspace(FBWorkspace):
     def __init__(self, template_folder_path: Path, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        self.inject_code_from_folder(KG_TEMPLATE_SHARED_PATH)
         self.inject_code_from_folder(template_folder_path)
         self.data_description: List[Tuple[str, int]] = []
 
@@ -41,33 +40,35 @@ class KGFBWorkspace(FBWorkspace):
 
     def generate_preprocess_data(
         self,
+        store_path: Path | None = None,
     ) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, pd.DataFrame, Any]:
+        """
+        Run `preprocess_script()` of the competition and save the outputs into a columnar store
+        (see `template_shared/preprocessed_store.py`), which is moved to `store_path` if it is given.
+        The returned data are memory mapped from the store.
+        """
         kgde = KGDockerEnv(KAGGLE_IMPLEMENT_SETTING.competition)
         kgde.prepare()
 
-        execute_log, results = kgde.dump_python_code_run_and_get_results(
+        workspace_store_path = self.workspace_path / "preprocessed"
+        shutil.rmtree(workspace_store_path, ignore_errors=True)
+        execute_log, _ = kgde.dump_python_code_run_and_get_results(
             code=KG_FEATURE_PREPROCESS_SCRIPT,
             local_path=str(self.workspace_path),
-            dump_file_names=[
-                "X_train.pkl",
-                "X_valid.pkl",
-                "y_train.pkl",
-                "y_valid.pkl",
-                "X_test.pkl",
-                "others.pkl",
-            ],
+            dump_file_names=[],
             running_extra_volume=(
                 {KAGGLE_IMPLEMENT_SETTING.local_data_path + "/" + KAGGLE_IMPLEMENT_SETTING.competition: "/kaggle/input"}
                 if KAGGLE_IMPLEMENT_SETTING.competition
                 else None
             ),
         )
-        if results is None:
+        if not preprocessed_store.exists(workspace_store_path):
             logger.error("Feature preprocess failed.")
             raise Exception("Feature preprocess failed.")
-        else:
-            X_train, X_valid, y_train, y_valid, X_test, others = results
-            return X_train, X_valid, y_train, y_valid, X_test, *others
+        if store_path is not None:
+            store_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(workspace_store_path, store_path)
+        return preprocessed_store.load_preprocessed(store_path or workspace_store_path)
 
     def execute(self, run_env: dict = {}, *args, **kwargs) -> str:
         logger.info(f"Running the experiment in {self.workspace_path}")
@@ -95,4 +96,8 @@ class KGFBWorkspace(FBWorkspace):
         if not csv_path.exists():
             logger.error(f"File {csv_path} does not exist.")
             return None
-        return pd.read_csv(csv_path, index_col=0).iloc[:, 0]
+        score_df = pd.read_csv(csv_path, index_col=0)
+        if score_df.shape[1] > 1:
+            # the other columns are the wall time of each model (see `template_shared/model_runner.py`)
+            logger.info(f"Wall time of the models: {score_df.iloc[0, 1:].to_dict()}")
+        return score_df.iloc[:, 0]
@@ -4,19 +4,22 @@ import time
 import zipfile
 from pathlib import Path
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
 from rdagent.log import rdagent_logger as logger
 
-options = webdriver.ChromeOptions()
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--headless")
 
-service = Service("/usr/local/bin/chromedriver")
+def get_chrome_driver():
+    # selenium is only imported when crawling, the competitions crawled before are read from the local files
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--headless")
+
+    service = Service("/usr/local/bin/chromedriver")
+    return webdriver.Chrome(options=options, service=service)
 
 
 def crawl_descriptions(competition: str, wait: float = 3.0, force: bool = False) -> dict[str, str]:
@@ -25,7 +28,9 @@ def crawl_descriptions(competition: str, wait: float = 3.0, force: bool = False)
         with fp.open("r") as f:
             return json.load(f)
 
-    driver = webdriver.Chrome(options=options, service=service)
+    from selenium.webdriver.common.by import By
+
+    driver = get_chrome_driver()
     overview_url = f"https://www.kaggle.com/competitions/{competition}/overview"
     driver.get(overview_url)
     time.sleep(wait)
@@ -2,17 +2,14 @@ import pickle
 from pathlib import Path
 from typing import List
 
+import numpy as np
 import pandas as pd
-from pandarallel import pandarallel
-
-from rdagent.core.conf import RD_AGENT_SETTINGS
-from rdagent.core.utils import multiprocessing_wrapper
-
-pandarallel.initialize(verbose=1)
 
 from rdagent.components.runner import CachedRunner
 from rdagent.components.runner.conf import RUNNER_SETTINGS
+from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.exception import FactorEmptyError
+from rdagent.core.utils import multiprocessing_wrapper
 from rdagent.log import rdagent_logger as logger
 from rdagent.scenarios.qlib.experiment.factor_experiment import QlibFactorExperiment
 
@@ -43,16 +40,70 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
     - results in `mlflow`
     """
 
+    # the max bytes of the padded arrays of a chunk of dates in `calculate_information_coefficient`
+    IC_CHUNK_BYTES = 256 * 1024**2
+
     def calculate_information_coefficient(
         self, concat_feature: pd.DataFrame, SOTA_feature_column_size: int, new_feature_columns_size: int
     ) -> pd.DataFrame:
-        res = pd.Series(index=range(SOTA_feature_column_size * new_feature_columns_size))
-        for col1 in range(SOTA_feature_column_size):
-            for col2 in range(SOTA_feature_column_size, SOTA_feature_column_size + new_feature_columns_size):
-                res.loc[col1 * new_feature_columns_size + col2 - SOTA_feature_column_size] = concat_feature.iloc[
-                    :, col1
-                ].corr(concat_feature.iloc[:, col2])
-        return res
+        """
+        The mean over dates of the cross-sectional Pearson correlation between each SOTA column and each new column.
+
+        The correlation of a pair only uses the instruments where both values are available (same as `Series.corr`).
+        All the pairs of a chunk of dates are calculated together with batched matrix products on the arrays
+        padded by date.
+
+        Returns
+        -------
+        pd.DataFrame
+            index: the position of the SOTA column, columns: the position of the new column
+        """
+        concat_feature = concat_feature.sort_index(level="datetime", kind="stable")
+        _, starts, counts = np.unique(
+            concat_feature.index.get_level_values("datetime"), return_index=True, return_counts=True
+        )
+        filled = concat_feature.to_numpy(dtype=np.float64, copy=True)
+        mask = ~np.isnan(filled)
+        filled[~mask] = 0.0
+
+        # demean & scale by date to keep the sums below well conditioned; the correlation is not changed by it.
+        group = np.repeat(np.arange(len(starts)), counts)
+        n = np.maximum(np.add.reduceat(mask, starts, axis=0), 1)
+        filled -= (np.add.reduceat(filled, starts, axis=0) / n)[group]
+        filled[~mask] = 0.0
+        std = np.sqrt(np.add.reduceat(filled**2, starts, axis=0) / n)
+        filled /= np.where(std > 0, std, 1.0)[group]
+
+        S, N = SOTA_feature_column_size, new_feature_columns_size
+        ic_sum, ic_count = np.zeros((S, N)), np.zeros((S, N))
+        dates_per_chunk = max(1, self.IC_CHUNK_BYTES // (8 * 2 * (S + N) * max(counts.max(initial=1), 1)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for chunk_start in range(0, len(starts), dates_per_chunk):
+                chunk = slice(chunk_start, chunk_start + dates_per_chunk)
+                chunk_starts, chunk_counts = starts[chunk], counts[chunk]
+                rows = np.concatenate([np.arange(st, st + c) for st, c in zip(chunk_starts, chunk_counts)])
+                date_pos = np.repeat(np.arange(len(chunk_starts)), chunk_counts)
+                inst_pos = rows - np.repeat(chunk_starts, chunk_counts)
+
+                padded = np.zeros((len(chunk_starts), chunk_counts.max(), S + N))
+                padded_mask = np.zeros_like(padded)
+                padded[date_pos, inst_pos] = filled[rows]
+                padded_mask[date_pos, inst_pos] = mask[rows]
+                x, y = padded[..., :S].transpose(0, 2, 1), padded[..., S:]
+                mx, my = padded_mask[..., :S].transpose(0, 2, 1), padded_mask[..., S:]
+
+                cnt = mx @ my
+                sx, sy = x @ my, mx @ y
+                cov = x @ y - sx * sy / cnt
+                var_x = (x**2) @ my - sx**2 / cnt
+                var_y = mx @ (y**2) - sy**2 / cnt
+                denominator = np.sqrt(var_x * var_y)
+                corr = np.where((cnt > 1) & (denominator > 1e-12), cov / denominator, np.nan)
+
+                valid = ~np.isnan(corr)
+                ic_sum += np.where(valid, corr, 0.0).sum(axis=0)
+                ic_count += valid.sum(axis=0)
+            return pd.DataFrame(ic_sum / ic_count)
 
     def deduplicate_new_factors(self, SOTA_feature: pd.DataFrame, new_feature: pd.DataFrame) -> pd.DataFrame:
         # calculate the IC between each column of SOTA_feature and new_feature
@@ -60,15 +111,9 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
         # return the new_feature
 
         concat_feature = pd.concat([SOTA_feature, new_feature], axis=1)
-        IC_max = (
-            concat_feature.groupby("datetime")
-            .parallel_apply(
-                lambda x: self.calculate_information_coefficient(x, SOTA_feature.shape[1], new_feature.shape[1])
-            )
-            .mean()
-        )
-        IC_max.index = pd.MultiIndex.from_product([range(SOTA_feature.shape[1]), range(new_feature.shape[1])])
-        IC_max = IC_max.unstack().max(axis=0)
+        IC_max = self.calculate_information_coefficient(
+            concat_feature, SOTA_feature.shape[1], new_feature.shape[1]
+        ).max(axis=0)
         return new_feature.iloc[:, IC_max[IC_max < 0.99].index]
 
     def develop(self, exp: QlibFactorExperiment) -> QlibFactorExperiment:
@@ -76,52 +121,60 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
         Generate the experiment by processing and combining factor data,
         then passing the combined data to Docker for backtest results.
         """
+        based_future = None
         if exp.based_experiments and exp.based_experiments[-1].result is None:
-            exp.based_experiments[-1] = self.develop(exp.based_experiments[-1])
+            # the backtest of the based experiment is independent of the new one, so they run concurrently
+            based_future = self.develop_async(exp.based_experiments[-1])
 
-        if RUNNER_SETTINGS.cache_result:
-            cache_hit, result = self.get_cache_result(exp)
-            if cache_hit:
-                exp.result = result
-                return exp
+        try:
+            if RUNNER_SETTINGS.cache_result:
+                cache_hit, result = self.get_cache_result(exp)
+                if cache_hit:
+                    exp.result = result
+                    return exp
 
-        if exp.based_experiments:
-            SOTA_factor = None
-            if len(exp.based_experiments) > 1:
-                SOTA_factor = self.process_factor_data(exp.based_experiments)
+            if exp.based_experiments:
+                SOTA_factor = None
+                if len(exp.based_experiments) > 1:
+                    SOTA_factor = self.process_factor_data(exp.based_experiments)
 
-            # Process the new factors data
-            new_factors = self.process_factor_data(exp)
+                # Process the new factors data
+                new_factors = self.process_factor_data(exp)
 
-            if new_factors.empty:
-                raise FactorEmptyError("No valid factor data found to merge.")
-
-            # Combine the SOTA factor and new factors if SOTA factor exists
-            if SOTA_factor is not None and not SOTA_factor.empty:
-                new_factors = self.deduplicate_new_factors(SOTA_factor, new_factors)
                 if new_factors.empty:
                     raise FactorEmptyError("No valid factor data found to merge.")
-                combined_factors = pd.concat([SOTA_factor, new_factors], axis=1).dropna()
-            else:
-                combined_factors = new_factors
-
-            # Sort and nest the combined factors under 'feature'
-            combined_factors = combined_factors.sort_index()
-            combined_factors = combined_factors.loc[:, ~combined_factors.columns.duplicated(keep="last")]
-            new_columns = pd.MultiIndex.from_product([["feature"], combined_factors.columns])
-            combined_factors.columns = new_columns
-
-            # Save the combined factors to the workspace
-            with open(exp.experiment_workspace.workspace_path / "combined_factors_df.pkl", "wb") as f:
-                pickle.dump(combined_factors, f)
-
-        result = exp.experiment_workspace.execute(
-            qlib_config_name=f"conf.yaml" if len(exp.based_experiments) == 0 else "conf_combined.yaml"
-        )
 
-        exp.result = result
-        if RUNNER_SETTINGS.cache_result:
-            self.dump_cache_result(exp, result)
+                # Combine the SOTA factor and new factors if SOTA factor exists
+                if SOTA_factor is not None and not SOTA_factor.empty:
+                    new_factors = self.deduplicate_new_factors(SOTA_factor, new_factors)
+                    if new_factors.empty:
+                        raise FactorEmptyError("No valid factor data found to merge.")
+                    combined_factors = pd.concat([SOTA_factor, new_factors], axis=1).dropna()
+                else:
+                    combined_factors = new_factors
+
+                # Sort and nest the combined factors under 'feature'
+                combined_factors = combined_factors.sort_index()
+                combined_factors = combined_factors.loc[:, ~combined_factors.columns.duplicated(keep="last")]
+                new_columns = pd.MultiIndex.from_product([["feature"], combined_factors.columns])
+                combined_factors.columns = new_columns
+
+                # Save the combined factors to the workspace
+                with open(exp.experiment_workspace.workspace_path / "combined_factors_df.pkl", "wb") as f:
+                    pickle.dump(combined_factors, f)
+
+            result = exp.experiment_workspace.execute_async(
+                qlib_config_name=f"conf.yaml" if len(exp.based_experiments) == 0 else "conf_combined.yaml"
+            ).result()
+
+            exp.result = result
+            if RUNNER_SETTINGS.cache_result:
+                self.dump_cache_result(exp, result)
+        finally:
+            # awaited on every path (also when the new factors fail), so the based backtest is never left running
+            # on its own and its result is not thrown away
+            if based_future is not None:
+                exp.based_experiments[-1] = based_future.result()
 
         return exp
 
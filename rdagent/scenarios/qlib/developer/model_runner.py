@@ -1,5 +1,6 @@
 import shutil
 import uuid
+from concurrent.futures import Future
 from pathlib import Path
 
 import pandas as pd
@@ -28,14 +29,25 @@ class QlibModelRunner(CachedRunner[QlibModelExperiment]):
     """
 
     def develop(self, exp: QlibModelExperiment) -> QlibModelExperiment:
+        return self.develop_async(exp).result()
+
+    def develop_async(self, exp: QlibModelExperiment) -> "Future[QlibModelExperiment]":
+        """
+        Submit the backtest of the experiment to the backtest scheduler without waiting for it.
+        The future is done with the experiment once its result is set, so the backtests of several experiments
+        (e.g. `develop_batch`) run concurrently.
+        """
+        future: Future[QlibModelExperiment] = Future()
         if RUNNER_SETTINGS.cache_result:
             cache_hit, result = self.get_cache_result(exp)
             if cache_hit:
                 exp.result = result
-                return exp
+                future.set_result(exp)
+                return future
 
         if exp.sub_workspace_list[0].code_dict.get("model.py") is None:
-            raise ModelEmptyError("model.py is empty")
+            future.set_exception(ModelEmptyError("model.py is empty"))
+            return future
         # to replace & inject code
         exp.experiment_workspace.inject_code(**{"model.py": exp.sub_workspace_list[0].code_dict["model.py"]})
 
@@ -46,10 +58,16 @@ class QlibModelRunner(CachedRunner[QlibModelExperiment]):
         elif exp.sub_tasks[0].model_type == "Tabular":
             env_to_use.update({"dataset_cls": "DatasetH"})
 
-        result = exp.experiment_workspace.execute(qlib_config_name="conf.yaml", run_env=env_to_use)
-
-        exp.result = result
-        if RUNNER_SETTINGS.cache_result:
-            self.dump_cache_result(exp, result)
+        def _set_result(backtest: Future) -> None:
+            try:
+                exp.result = backtest.result()
+                if RUNNER_SETTINGS.cache_result:
+                    self.dump_cache_result(exp, exp.result)
+                future.set_result(exp)
+            except BaseException as e:  # noqa: BLE001
+                future.set_exception(e)
 
-        return exp
+        exp.experiment_workspace.execute_async(qlib_config_name="conf.yaml", run_env=env_to_use).add_done_callback(
+            _set_result
+        )
+        return future
@@ -1,6 +1,9 @@
 from copy import deepcopy
 from pathlib import Path
 
+from jinja2 import Environment, StrictUndefined
+
+from rdagent.components.coder.factor_coder.config import FACTOR_IMPLEMENT_SETTINGS
 from rdagent.components.coder.factor_coder.factor import (
     FactorExperiment,
     FactorFBWorkspace,
@@ -25,8 +28,13 @@ class QlibFactorScenario(Scenario):
         super().__init__()
         self._background = deepcopy(prompt_dict["qlib_factor_background"])
         self._source_data = deepcopy(get_data_folder_intro())
-        self._output_format = deepcopy(prompt_dict["qlib_factor_output_format"])
-        self._interface = deepcopy(prompt_dict["qlib_factor_interface"])
+        # the file names of the factor values depend on the format of the source data
+        self._output_format, self._interface = (
+            Environment(undefined=StrictUndefined)
+            .from_string(prompt_dict[name])
+            .render(source_data_format=FACTOR_IMPLEMENT_SETTINGS.source_data_format)
+            for name in ("qlib_factor_output_format", "qlib_factor_interface")
+        )
         self._strategy = deepcopy(prompt_dict["qlib_factor_strategy"])
         self._simulator = deepcopy(prompt_dict["qlib_factor_simulator"])
         self._rich_style_description = deepcopy(prompt_dict["qlib_factor_rich_style_description"])
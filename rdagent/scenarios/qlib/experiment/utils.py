@@ -1,4 +1,5 @@
 import shutil
+import uuid
 from pathlib import Path
 
 import pandas as pd
@@ -7,6 +8,7 @@ import pandas as pd
 from jinja2 import Environment, StrictUndefined
 
 from rdagent.components.coder.factor_coder.config import FACTOR_IMPLEMENT_SETTINGS
+from rdagent.log import rdagent_logger as logger
 from rdagent.utils.env import QTDockerEnv
 
 
@@ -28,25 +30,44 @@ def generate_data_folder_from_qlib():
         Path(__file__).parent / "factor_data_template" / "daily_pv_debug.h5"
     ).exists(), "daily_pv_debug.h5 is not generated."
 
-    Path(FACTOR_IMPLEMENT_SETTINGS.data_folder).mkdir(parents=True, exist_ok=True)
-    shutil.copy(
-        Path(__file__).parent / "factor_data_template" / "daily_pv_all.h5",
-        Path(FACTOR_IMPLEMENT_SETTINGS.data_folder) / "daily_pv.h5",
-    )
-    shutil.copy(
-        Path(__file__).parent / "factor_data_template" / "README.md",
-        Path(FACTOR_IMPLEMENT_SETTINGS.data_folder) / "README.md",
-    )
+    readme = (Path(__file__).parent / "factor_data_template" / "README.md").read_text()
+    for template_name, data_folder in (
+        ("daily_pv_all.h5", FACTOR_IMPLEMENT_SETTINGS.data_folder),
+        ("daily_pv_debug.h5", FACTOR_IMPLEMENT_SETTINGS.data_folder_debug),
+    ):
+        Path(data_folder).mkdir(parents=True, exist_ok=True)
+        shutil.copy(Path(__file__).parent / "factor_data_template" / template_name, Path(data_folder) / "daily_pv.h5")
+        prepare_source_data(Path(data_folder))
+        (Path(data_folder) / "README.md").write_text(
+            Environment(undefined=StrictUndefined)
+            .from_string(readme)
+            .render(source_data_format=FACTOR_IMPLEMENT_SETTINGS.source_data_format)
+        )
 
-    Path(FACTOR_IMPLEMENT_SETTINGS.data_folder_debug).mkdir(parents=True, exist_ok=True)
-    shutil.copy(
-        Path(__file__).parent / "factor_data_template" / "daily_pv_debug.h5",
-        Path(FACTOR_IMPLEMENT_SETTINGS.data_folder_debug) / "daily_pv.h5",
-    )
-    shutil.copy(
-        Path(__file__).parent / "factor_data_template" / "README.md",
-        Path(FACTOR_IMPLEMENT_SETTINGS.data_folder_debug) / "README.md",
-    )
+
+def prepare_source_data(data_folder: Path) -> None:
+    """
+    Save a copy of each `.h5` file in `data_folder` in feather (e.g. `daily_pv.h5` -> `daily_pv.feather`) if
+    `FACTOR_IMPLEMENT_SETTINGS.source_data_format` is "feather". The source files are kept, and the files which
+    can't be converted are skipped.
+    """
+    if FACTOR_IMPLEMENT_SETTINGS.source_data_format != "feather":
+        return
+    from pyarrow import feather
+
+    for p in data_folder.glob("*.h5"):
+        target_path = p.with_suffix(".feather")
+        if target_path.exists():
+            continue
+        tmp_path = target_path.with_name(f"{target_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            # uncompressed, so the readers can memory map the columns; the index is kept in the metadata
+            feather.write_feather(pd.read_hdf(p, key="data"), tmp_path, compression="uncompressed")
+            tmp_path.replace(target_path)
+        except Exception as e:
+            logger.warning(f"Failed to convert {p} into feather: {e}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
 
 def get_data_folder_intro():
@@ -69,16 +90,23 @@ def get_data_folder_intro():
 """
     )
     content_l = []
+    # the data is described in the format read by the factors; the `.h5` files are kept with their feather copies
+    skipped_suffix = ".h5" if FACTOR_IMPLEMENT_SETTINGS.source_data_format == "feather" else ".feather"
     for p in Path(FACTOR_IMPLEMENT_SETTINGS.data_folder_debug).iterdir():
-        if p.name.endswith(".h5"):
-            df = pd.read_hdf(p)
+        if p.suffix == skipped_suffix and any(
+            p.with_suffix(suffix).exists() for suffix in (".h5", ".feather") if suffix != skipped_suffix
+        ):
+            continue
+        if p.name.endswith(".h5") or p.name.endswith(".feather"):
+            read_func = "read_hdf" if p.name.endswith(".h5") else "read_feather"
+            df = getattr(pd, read_func)(p)
             # get  df.head() as string with full width
             pd.set_option("display.max_columns", None)  # or 1000
             pd.set_option("display.max_rows", None)  # or 1000
             pd.set_option("display.max_colwidth", None)  # or 199
             rendered = JJ_TPL.render(
                 file_name=p.name,
-                type_desc="generated by `pd.read_hdf(filename).head()`",
+                type_desc=f"generated by `pd.{read_func}(filename).head()`",
                 content=df.head().to_string(),
             )
             content_l.append(rendered)
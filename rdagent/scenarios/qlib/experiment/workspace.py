@@ -1,11 +1,68 @@
+import contextvars
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
+import psutil
 
+from rdagent.components.runner.conf import RUNNER_SETTINGS
 from rdagent.core.experiment import FBWorkspace
 from rdagent.log import rdagent_logger as logger
-from rdagent.utils.env import QTDockerEnv
+from rdagent.utils.env import DockerConf, QlibDockerConf, QTDockerEnv
+
+
+def _parse_size(size: str | None) -> int:
+    """parse the docker size like `48g` into bytes"""
+    if size is None:
+        return 0
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([bkmg]?)b?", size.strip().lower())
+    if match is None:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group(1)) * 1024 ** "bkmg".index(match.group(2) or "b"))
+
+
+class QlibBacktestScheduler:
+    """
+    Run the qlib backtests concurrently.
+
+    Each backtest runs in its own container, so the number of concurrent backtests is limited by
+    - the CPU budget: `RUNNER_SETTINGS.backtest_cpus_per_worker` CPUs for each backtest.
+    - the memory budget: `mem_limit` + `shm_size` of the docker config for each backtest.
+    """
+
+    def __init__(self, max_workers: int | None = None, conf: DockerConf | None = None) -> None:
+        self.max_workers = max_workers or self.budget_workers(conf or QlibDockerConf())
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="qlib_backtest")
+        logger.info(f"Qlib backtests run with at most {self.max_workers} workers.")
+
+    @staticmethod
+    def budget_workers(conf: DockerConf) -> int:
+        n_by_cpu = (os.cpu_count() or 1) // RUNNER_SETTINGS.backtest_cpus_per_worker
+        memory_per_worker = _parse_size(conf.mem_limit) + _parse_size(conf.shm_size)
+        n_by_memory = psutil.virtual_memory().total // memory_per_worker if memory_per_worker else n_by_cpu
+        return max(1, min(n_by_cpu, n_by_memory))
+
+    def submit(self, fn, *args: Any, **kwargs: Any) -> Future:
+        """run `fn` in a copy of the current context, so the logs of the backtest keep the tag of the caller"""
+        return self.executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_BACKTEST_SCHEDULER: QlibBacktestScheduler | None = None
+_BACKTEST_SCHEDULER_LOCK = threading.Lock()
+# building the image concurrently is wasteful, so the environment is prepared by one backtest at a time
+_PREPARE_LOCK = threading.Lock()
+
+
+def get_backtest_scheduler() -> QlibBacktestScheduler:
+    global _BACKTEST_SCHEDULER
+    with _BACKTEST_SCHEDULER_LOCK:
+        if _BACKTEST_SCHEDULER is None:
+            _BACKTEST_SCHEDULER = QlibBacktestScheduler(RUNNER_SETTINGS.backtest_max_workers)
+        return _BACKTEST_SCHEDULER
 
 
 class QlibFBWorkspace(FBWorkspace):
@@ -15,18 +72,13 @@ class QlibFBWorkspace(FBWorkspace):
 
     def execute(self, qlib_config_name: str = "conf.yaml", run_env: dict = {}, *args, **kwargs) -> str:
         qtde = QTDockerEnv()
-        qtde.prepare()
+        with _PREPARE_LOCK:
+            qtde.prepare()
 
-        # Run the Qlib backtest
+        # Run the Qlib backtest and read the results in the same container
         execute_log = qtde.run(
             local_path=str(self.workspace_path),
-            entry=f"qrun {qlib_config_name}",
-            env=run_env,
-        )
-
-        execute_log = qtde.run(
-            local_path=str(self.workspace_path),
-            entry="python read_exp_res.py",
+            entry=f"sh -c 'qrun {qlib_config_name}; python read_exp_res.py'",
             env=run_env,
         )
 
@@ -40,3 +92,7 @@ class QlibFBWorkspace(FBWorkspace):
             return None
 
         return pd.read_csv(csv_path, index_col=0).iloc[:, 0]
+
+    def execute_async(self, qlib_config_name: str = "conf.yaml", run_env: dict = {}) -> Future:
+        """Submit the backtest to the backtest scheduler and return the future of the result of `execute`."""
+        return get_backtest_scheduler().submit(self.execute, qlib_config_name=qlib_config_name, run_env=run_env)
@@ -7,11 +7,13 @@ Tries to create uniform environment for the agent to run;
 
 # TODO: move the scenario specific docker env into other folders.
 
+import atexit
 import json
 import os
 import pickle
 import subprocess
 import sys
+import threading
 import uuid
 import zipfile
 from abc import abstractmethod
@@ -138,6 +140,14 @@ class DockerConf(BaseSettings):
     enable_gpu: bool = True  # because we will automatically disable GPU if not available. So we enable it by default.
     mem_limit: str | None = "48g"  # Add memory limit attribute
 
+    pooled: bool = False
+    # Keep warm containers and run the entries in them with `docker exec` instead of creating a container for each run.
+    # The volumes are fixed when a container is created, so each workspace (mounted at `mount_path` as usual) gets its
+    # own warm containers, which are reused by the later runs of the same workspace.
+    # Unlike the normal runs, an entry exiting with a non-zero code raises a `RuntimeError`.
+    pool_size: int = 1  # the max number of warm containers for the same image and volumes
+    pool_max_idle: int = 4  # the max number of idle warm containers; the least recently used ones are removed
+
 
 class QlibDockerConf(DockerConf):
     class Config:
@@ -189,6 +199,106 @@ class KGDockerConf(DockerConf):
     # local_data_path: str = "/data/userdata/share/kaggle"
 
 
+# image -> whether the GPU is available in the containers of the image; probed once per process
+_GPU_AVAILABLE: dict[str, bool] = {}
+_GPU_PROBE_LOCK = threading.Lock()
+
+
+class DockerContainerPool:
+    """
+    Warm containers grouped by the configuration they are created with.
+
+    A container is leased to one run at a time; the containers which are not running any more are
+    dropped when they are leased or returned.
+    """
+
+    def __init__(self) -> None:
+        self._idle: dict[tuple, list[docker.models.containers.Container]] = {}
+        # the idle containers of all the keys, from the least recently used one
+        self._idle_order: list[tuple[tuple, docker.models.containers.Container]] = []
+        self._n_containers: dict[tuple, int] = {}
+        self._all: list[docker.models.containers.Container] = []
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _is_healthy(container: docker.models.containers.Container) -> bool:
+        try:
+            container.reload()
+        except docker.errors.APIError:
+            return False
+        return container.status == "running"
+
+    def _discard(self, key: tuple, container: docker.models.containers.Container) -> None:
+        with self._cond:
+            self._n_containers[key] -= 1
+            if container in self._all:
+                self._all.remove(container)
+            self._cond.notify()
+        try:
+            container.remove(force=True)
+        except docker.errors.APIError:
+            pass
+
+    def acquire(self, key: tuple, size: int, create) -> docker.models.containers.Container:
+        """lease a healthy container of `key`, `create()` is called when a new container is needed"""
+        while True:
+            with self._cond:
+                while not self._idle.get(key) and self._n_containers.get(key, 0) >= size:
+                    self._cond.wait()
+                container = self._idle[key].pop() if self._idle.get(key) else None
+                if container is not None:
+                    self._idle_order.remove((key, container))
+                else:
+                    self._n_containers[key] = self._n_containers.get(key, 0) + 1
+            if container is None:
+                try:
+                    container = create()
+                except Exception:
+                    with self._cond:
+                        self._n_containers[key] -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._all.append(container)
+                return container
+            if self._is_healthy(container):
+                return container
+            logger.warning(f"Warm container {container.short_id} is not running any more, dropping it.")
+            self._discard(key, container)
+
+    def release(self, key: tuple, container: docker.models.containers.Container, max_idle: int) -> None:
+        """return the leased container; the least recently used idle containers beyond `max_idle` are removed"""
+        if not self._is_healthy(container):
+            self._discard(key, container)
+            return
+        with self._cond:
+            self._idle.setdefault(key, []).append(container)
+            self._idle_order.append((key, container))
+            evicted = self._idle_order[: max(len(self._idle_order) - max_idle, 0)]
+            for evicted_key, evicted_container in evicted:
+                self._idle_order.remove((evicted_key, evicted_container))
+                self._idle[evicted_key].remove(evicted_container)
+            self._cond.notify()
+        for evicted_key, evicted_container in evicted:
+            self._discard(evicted_key, evicted_container)
+
+    def close(self) -> None:
+        with self._cond:
+            containers, self._all = self._all, []
+            self._idle.clear()
+            self._idle_order.clear()
+            self._n_containers.clear()
+        for container in containers:
+            try:
+                container.remove(force=True)
+            except docker.errors.APIError:
+                pass
+
+
+_CONTAINER_POOL = DockerContainerPool()
+atexit.register(_CONTAINER_POOL.close)
+
+
 # physionet.org/files/mimic-eicu-fiddle-feature/1.0.0/FIDDLE_mimic3
 class DockerEnv(Env[DockerConf]):
     # TODO: Save the output into a specific file
@@ -253,7 +363,7 @@ class DockerEnv(Env[DockerConf]):
             raise RuntimeError(f"Error while pulling the image: {e}")
 
     def _gpu_kwargs(self, client):
-        """get gpu kwargs based on its availability"""
+        """get gpu kwargs based on its availability (the availability is probed once for each image)"""
         if not self.conf.enable_gpu:
             return {}
         gpu_kwargs = {
@@ -261,12 +371,103 @@ class DockerEnv(Env[DockerConf]):
                 [docker.types.DeviceRequest(count=-1, capabilities=[["gpu"]])] if self.conf.enable_gpu else None
             ),
         }
+        with _GPU_PROBE_LOCK:
+            if self.conf.image not in _GPU_AVAILABLE:
+                try:
+                    client.containers.run(self.conf.image, "nvidia-smi", remove=True, **gpu_kwargs)
+                    logger.info("GPU Devices are available.")
+                    _GPU_AVAILABLE[self.conf.image] = True
+                except docker.errors.APIError:
+                    _GPU_AVAILABLE[self.conf.image] = False
+        return gpu_kwargs if _GPU_AVAILABLE[self.conf.image] else {}
+
+    def _get_volumes(self, local_path: str | None, running_extra_volume: dict | None) -> dict:
+        volumns = {}
+        if local_path is not None:
+            local_path = os.path.abspath(local_path)
+            volumns[local_path] = {"bind": self.conf.mount_path, "mode": "rw"}
+        if self.conf.extra_volumes is not None:
+            for lp, rp in self.conf.extra_volumes.items():
+                volumns[lp] = {"bind": rp, "mode": "rw"}
+        if running_extra_volume is not None:
+            for lp, rp in running_extra_volume.items():
+                volumns[lp] = {"bind": rp, "mode": "rw"}
+        return volumns
+
+    def _print_run_info(self, entry: str, env: dict, volumns: dict) -> None:
+        print(Rule("[bold green]Docker Logs Begin[/bold green]", style="dark_orange"))
+        table = Table(title="Run Info", show_header=False)
+        table.add_column("Key", style="bold cyan")
+        table.add_column("Value", style="bold magenta")
+        table.add_row("Entry", entry)
+        table.add_row("Env", "\n".join(f"{k}:{v}" for k, v in env.items()))
+        table.add_row("Volumns", "\n".join(f"{k}:{v}" for k, v in volumns.items()))
+        print(table)
+
+    @staticmethod
+    def _collect_logs(logs) -> str:
+        log_output = ""
+        for log in logs:
+            decoded_log = log.strip().decode()
+            Console().print(decoded_log, markup=False)
+            log_output += decoded_log + "\n"
+        print(Rule("[bold green]Docker Logs End[/bold green]", style="dark_orange"))
+        return log_output
+
+    def _run_pooled(
+        self,
+        client: docker.DockerClient,
+        entry: str,
+        local_path: str | None,
+        env: dict,
+        running_extra_volume: dict | None,
+    ) -> str:
+        """
+        Run the entry in a warm container with `docker exec`.
+        The container is created with the same volumes as a normal run, so only the containers of the same workspace
+        are reused and the entry sees the workspace at `mount_path`.
+        """
+        if local_path is not None:
+            local_path = os.path.abspath(local_path)
+        volumns = self._get_volumes(local_path, running_extra_volume)
+
+        gpu_kwargs = self._gpu_kwargs(client)
+        key = (
+            self.conf.image,
+            tuple(sorted((str(lp), v["bind"]) for lp, v in volumns.items())),
+            self.conf.network,
+            self.conf.shm_size,
+            self.conf.mem_limit,
+            bool(gpu_kwargs),
+        )
+
+        def create() -> docker.models.containers.Container:
+            logger.info(f"Starting a warm container of {self.conf.image}.")
+            return client.containers.run(
+                image=self.conf.image,
+                command="tail -f /dev/null",
+                volumes=volumns,
+                detach=True,
+                working_dir=self.conf.mount_path,
+                network=self.conf.network,
+                shm_size=self.conf.shm_size,
+                mem_limit=self.conf.mem_limit,
+                labels={"rdagent.pooled": "true"},
+                **gpu_kwargs,
+            )
+
+        container = _CONTAINER_POOL.acquire(key, self.conf.pool_size, create)
         try:
-            client.containers.run(self.conf.image, "nvidia-smi", **gpu_kwargs)
-            logger.info("GPU Devices are available.")
-        except docker.errors.APIError:
-            return {}
-        return gpu_kwargs
+            # the entry runs in the working directory of the container, i.e. `mount_path`
+            exec_id = client.api.exec_create(container.id, ["sh", "-c", entry], environment=env)["Id"]
+            self._print_run_info(entry, env, volumns)
+            log_output = self._collect_logs(client.api.exec_start(exec_id, stream=True))
+            exit_code = client.api.exec_inspect(exec_id)["ExitCode"]
+            if exit_code:
+                raise docker.errors.ContainerError(container, exit_code, entry, self.conf.image, log_output)
+            return log_output
+        finally:
+            _CONTAINER_POOL.release(key, container, self.conf.pool_max_idle)
 
     def run(
         self,
@@ -281,20 +482,11 @@ class DockerEnv(Env[DockerConf]):
         if entry is None:
             entry = self.conf.default_entry
 
-        volumns = {}
-        if local_path is not None:
-            local_path = os.path.abspath(local_path)
-            volumns[local_path] = {"bind": self.conf.mount_path, "mode": "rw"}
-        if self.conf.extra_volumes is not None:
-            for lp, rp in self.conf.extra_volumes.items():
-                volumns[lp] = {"bind": rp, "mode": "rw"}
-        if running_extra_volume is not None:
-            for lp, rp in running_extra_volume.items():
-                volumns[lp] = {"bind": rp, "mode": "rw"}
-
-        log_output = ""
-
         try:
+            if self.conf.pooled:
+                return self._run_pooled(client, entry, local_path, env, running_extra_volume)
+
+            volumns = self._get_volumes(local_path, running_extra_volume)
             container: docker.models.containers.Container = client.containers.run(
                 image=self.conf.image,
                 command=entry,
@@ -309,19 +501,8 @@ class DockerEnv(Env[DockerConf]):
                 **self._gpu_kwargs(client),
             )
             logs = container.logs(stream=True)
-            print(Rule("[bold green]Docker Logs Begin[/bold green]", style="dark_orange"))
-            table = Table(title="Run Info", show_header=False)
-            table.add_column("Key", style="bold cyan")
-            table.add_column("Value", style="bold magenta")
-            table.add_row("Entry", entry)
-            table.add_row("Env", "\n".join(f"{k}:{v}" for k, v in env.items()))
-            table.add_row("Volumns", "\n".join(f"{k}:{v}" for k, v in volumns.items()))
-            print(table)
-            for log in logs:
-                decoded_log = log.strip().decode()
-                Console().print(decoded_log, markup=False)
-                log_output += decoded_log + "\n"
-            print(Rule("[bold green]Docker Logs End[/bold green]", style="dark_orange"))
+            self._print_run_info(entry, env, volumns)
+            log_output = self._collect_logs(logs)
             container.wait()
             container.stop()
             container.remove()
@@ -0,0 +1,297 @@
+"""
+Incremental snapshots of the workflow session.
+
+Pickling the whole loop after every step rewrites the trace with all the experiments (and their code),
+the scenario and the knowledge bases again and again, so the snapshots grow with the number of loops.
+
+Here the objects of the types in `SHARED_TYPES` (experiments, workspaces, knowledge bases, ...) are
+pickled on their own and saved into a content-addressed object folder; the objects holding them only
+keep references to their digests. So
+
+- an object shared by many snapshots (e.g. the scenario, the experiments of the former loops) is saved once;
+- a step only writes the objects changed since the former steps (the delta), and the snapshot file
+  itself only keeps the rest of the loop object (the base referring to the objects);
+- a step only pickles the objects changed since the former steps. An object is compared with the former
+  step by a token of its state: the plain containers and objects in it are walked, the shared objects are
+  compared by their references, the strings and numbers by value and the other values (arrays, data
+  frames, ...) by identity. An object defining `snapshot_version` (e.g. `Graph`, `TrackedDict`) is compared by that version
+  instead of being walked, it must change the version whenever anything it holds changes;
+- the objects are compressed and written in a background thread if `session_snapshot_async` is on.
+
+Limitations:
+
+- an array or a data frame changed in place (instead of being assigned again) is not found out;
+- an object which is not of `SHARED_TYPES` is pickled into every shared object referring to it, so the shared
+  objects don't refer to the same copy after loading (e.g. the nodes of a graph also held by the knowledge base
+  which holds the graph). Make such an object a shared type or only refer to it from one shared object.
+
+Layout of the session folder:
+
+- ``objects/{digest[:2]}/{digest}``: the compressed pickle of an object.
+- ``{loop}/{step}_{name}``: `MAGIC` followed by the compressed pickle of the loop object.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+import uuid
+import weakref
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PurePath
+from typing import Any
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.evaluation import Feedback
+from rdagent.core.evolving_framework import Knowledge
+from rdagent.core.experiment import Experiment, Task, Workspace
+from rdagent.core.knowledge_base import KnowledgeBase
+from rdagent.core.proposal import Hypothesis
+from rdagent.core.scenario import Scenario
+from rdagent.log import rdagent_logger as logger
+
+MAGIC = b"RDAGENT-SNAPSHOT-1\n"
+OBJECTS_FOLDER = "objects"
+SHARED_TYPES: tuple[type, ...] = (
+    Experiment,
+    Workspace,
+    Task,
+    Hypothesis,
+    Feedback,
+    Scenario,
+    KnowledgeBase,
+    Knowledge,
+)
+
+# the values compared by equality in the tokens
+_ATOMIC_TYPES = (str, bytes, int, float, complex, bool, type(None), PurePath)
+
+
+class SnapshotCycleError(Exception):
+    """The shared objects refer to each other, so they can't be saved separately."""
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, dumper: _Dumper, root: Any) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.dumper = dumper
+        self.root = root
+
+    def persistent_id(self, obj: Any) -> tuple[str, int] | None:
+        if obj is self.root or not isinstance(obj, SHARED_TYPES):
+            return None
+        return self.dumper.ref(obj)
+
+
+class _Same:
+    """compared by identity in a token, e.g. an array or a data frame"""
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Same) and other.value is self.value
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def _is_plain_object(value: Any) -> bool:
+    """an object pickled by its `__dict__`, so it can be walked"""
+    cls = type(value)
+    return (
+        hasattr(value, "__dict__")
+        and not isinstance(value, type)
+        and cls.__module__ != "builtins"
+        and cls.__reduce_ex__ is object.__reduce_ex__
+        and cls.__reduce__ is object.__reduce__
+    )
+
+
+class _Dumper:
+    def __init__(self, cache: dict[int, tuple] | None = None, saved: set[str] | None = None) -> None:
+        # id of object -> (digest, n), `n` tells the different objects with the same content apart
+        self.refs: dict[int, tuple[str, int]] = {}
+        self.n_same: dict[str, int] = {}
+        self.in_progress: set[int] = set()
+        self.blobs: dict[str, bytes] = {}
+        # id of object -> (weak reference, token, digest) of the former dumps, and the digests saved
+        self.cache = {} if cache is None else cache
+        self.saved = set() if saved is None else saved
+
+    def dumps(self, obj: Any) -> bytes:
+        buffer = io.BytesIO()
+        _SnapshotPickler(buffer, self, obj).dump(obj)
+        return buffer.getvalue()
+
+    def token(self, obj: Any) -> Any:
+        """a value which is equal to the token of the former dump if the state of `obj` is not changed"""
+        if hasattr(obj, "snapshot_version"):
+            return ("version", obj.snapshot_version)
+        seen = {id(obj): 0}
+
+        def walk(value: Any) -> Any:
+            if isinstance(value, _ATOMIC_TYPES):
+                return value
+            if isinstance(value, SHARED_TYPES) and value is not obj:
+                return ("ref", self.ref(value))
+            if id(value) in seen:
+                return ("seen", seen[id(value)])
+            seen[id(value)] = len(seen)
+            if hasattr(value, "snapshot_version"):
+                return ("version", _Same(value), value.snapshot_version)
+            if type(value) in (list, tuple, set, frozenset):
+                return (type(value), *(walk(v) for v in value))
+            if type(value) is dict:
+                return (dict, *((walk(k), walk(v)) for k, v in value.items()))
+            if _is_plain_object(value):
+                return (type(value), walk(vars(value)))
+            return _Same(value)
+
+        return (type(obj), walk(vars(obj))) if _is_plain_object(obj) else _Same(obj)
+
+    def ref(self, obj: Any) -> tuple[str, int]:
+        key = id(obj)
+        if key in self.refs:
+            return self.refs[key]
+        if key in self.in_progress:
+            raise SnapshotCycleError(f"{type(obj).__name__} refers to itself through other shared objects.")
+        self.in_progress.add(key)
+        try:
+            token = self.token(obj)
+            cached = self.cache.get(key)
+            if cached is not None and cached[0]() is obj and cached[1] == token and cached[2] in self.saved:
+                digest, data = cached[2], None
+            else:
+                data = self.dumps(obj)
+                digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+                self._cache(obj, token, digest)
+        finally:
+            self.in_progress.discard(key)
+        n = self.n_same.get(digest, 0)
+        self.n_same[digest] = n + 1
+        self.refs[key] = (digest, n)
+        if data is not None:
+            self.blobs[digest] = data
+        return self.refs[key]
+
+    def _cache(self, obj: Any, token: Any, digest: str) -> None:
+        key, cache = id(obj), self.cache
+
+        def forget(ref: weakref.ref) -> None:
+            if cache.get(key, (None,))[0] is ref:
+                cache.pop(key, None)
+
+        try:
+            cache[key] = (weakref.ref(obj, forget), token, digest)
+        except TypeError:  # not weakly referable, it is pickled every time
+            pass
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, loader: _Loader) -> None:
+        super().__init__(file)
+        self.loader = loader
+
+    def persistent_load(self, pid: tuple[str, int]) -> Any:
+        return self.loader.load_ref(pid)
+
+
+class _Loader:
+    def __init__(self, objects_path: Path) -> None:
+        self.objects_path = objects_path
+        self.memo: dict[tuple[str, int], Any] = {}
+
+    def loads(self, data: bytes) -> Any:
+        return _SnapshotUnpickler(io.BytesIO(data), self).load()
+
+    def load_ref(self, ref: tuple[str, int]) -> Any:
+        if ref not in self.memo:
+            digest = ref[0]
+            self.memo[ref] = self.loads(zlib.decompress((self.objects_path / digest[:2] / digest).read_bytes()))
+        return self.memo[ref]
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class SnapshotStore:
+    """
+    The objects of the snapshots in a session folder.
+
+    The objects known to be saved are remembered, so a step only compresses and writes the new ones, and the
+    digests of the shared objects are cached, so a step only pickles the changed ones.
+    """
+
+    def __init__(self, session_folder: Path) -> None:
+        self.objects_path = session_folder / OBJECTS_FOLDER
+        self.saved: set[str] = set()
+        self.digest_cache: dict[int, tuple] = {}
+
+    def write(self, path: Path, root: bytes, blobs: dict[str, bytes]) -> None:
+        level = RD_AGENT_SETTINGS.session_snapshot_compress_level
+        try:
+            for digest, data in blobs.items():
+                object_path = self.objects_path / digest[:2] / digest
+                if not object_path.exists():
+                    object_path.parent.mkdir(parents=True, exist_ok=True)
+                    _atomic_write(object_path, zlib.compress(data, level))
+            # the snapshot is written after its objects, so a snapshot on the disk is always complete
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, MAGIC + zlib.compress(root, level))
+        except Exception:
+            self.saved.difference_update(blobs)
+            raise
+
+
+_STORES: dict[Path, SnapshotStore] = {}
+# one writer thread, so the snapshots are written in the order of the steps
+_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session_snapshot")
+
+
+def _session_folder(path: Path) -> Path:
+    """the snapshots are saved in `{session folder}/{loop}/{step}_{name}`"""
+    return path.absolute().parent.parent
+
+
+def _log_failed_write(future: Future) -> None:
+    if (e := future.exception()) is not None:
+        logger.warning(f"Failed to write the session snapshot: {e}")
+
+
+def dump_snapshot(obj: Any, path: str | Path) -> None:
+    """
+    Save the snapshot of `obj` into `path` and its shared objects into the `objects` folder of the session.
+    `obj` and its changed shared objects are pickled in the calling thread; the writing is done in the
+    background if `RD_AGENT_SETTINGS.session_snapshot_async` is on.
+    """
+    path = Path(path)
+    store = _STORES.setdefault(_session_folder(path), SnapshotStore(_session_folder(path)))
+    dumper = _Dumper(store.digest_cache, store.saved)
+    root = dumper.dumps(obj)
+    blobs = {digest: data for digest, data in dumper.blobs.items() if digest not in store.saved}
+    store.saved.update(blobs)
+    if RD_AGENT_SETTINGS.session_snapshot_async:
+        _WRITER.submit(store.write, path, root, blobs).add_done_callback(_log_failed_write)
+    else:
+        store.write(path, root, blobs)
+
+
+def wait_for_snapshots() -> None:
+    """Wait until the snapshots submitted before are written."""
+    _WRITER.submit(lambda: None).result()
+
+
+def load_snapshot(path: str | Path) -> Any:
+    """Load the snapshot saved by `dump_snapshot` or a snapshot saved as a single pickle."""
+    path = Path(path)
+    wait_for_snapshots()
+    data = path.read_bytes()
+    if not data.startswith(MAGIC):
+        return pickle.loads(data)
+    return _Loader(_session_folder(path) / OBJECTS_FOLDER).loads(zlib.decompress(data[len(MAGIC) :]))
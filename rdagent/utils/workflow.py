@@ -8,8 +8,10 @@ Postscripts:
 
 """
 
+import contextvars
 import datetime
 import pickle
+import threading
 from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -17,8 +19,10 @@ from typing import Callable
 
 from tqdm.auto import tqdm
 
+from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.exception import CoderError
 from rdagent.log import rdagent_logger as logger
+from rdagent.utils.snapshot import SnapshotCycleError, dump_snapshot, load_snapshot
 
 
 class LoopMeta(type):
@@ -70,6 +74,28 @@ class LoopTrace:
     # TODO: more information about the trace
 
 
+class _PipelineState:
+    """The state of the loops running in a pipeline, it is kept out of the loop so it is never pickled."""
+
+    def __init__(self, first_loop: int) -> None:
+        # the steps except the background steps hold the lock, so they never run concurrently
+        self.lock = threading.RLock()
+        self.cond = threading.Condition()
+        self.next_loop = first_loop  # the first loop which is not done
+        self.latest: int | None = None  # the latest started loop
+        self.inflight: set[int] = set()
+        self.released: set[int] = set()  # the loops which reach a background step, so the next loop can start
+        self.done: dict[int, bool] = {}  # loop index -> whether the loop is completed (not skipped)
+        self.traces: dict[int, list[LoopTrace]] = defaultdict(list)
+        self.stop = threading.Event()
+        self.error: BaseException | None = None
+        self.error_loop: int | None = None
+
+    def should_stop(self, li: int) -> bool:
+        """the loops after the failed loop are stopped, the former loops are finished as running one by one"""
+        return self.stop.is_set() or (self.error_loop is not None and li > self.error_loop)
+
+
 class LoopBase:
     steps: list[Callable]  # a list of steps to work on
     loop_trace: dict[int, list[LoopTrace]]
@@ -78,6 +104,12 @@ class LoopBase:
         default_factory=tuple
     )  # you can define a list of error that will skip current loop
 
+    # the steps which only work on the outputs of their own loop (e.g. running the experiment), so they can run
+    # concurrently with the steps of the other loops when the loops are pipelined
+    background_steps: tuple[str, ...] = ("running",)
+    # the steps which must run in the order of the loops (e.g. appending the feedback into the trace)
+    ordered_steps: tuple[str, ...] = ("feedback",)
+
     def __init__(self):
         self.loop_idx = 0  # current loop index
         self.step_idx = 0  # the index of next step to be run
@@ -92,8 +124,12 @@ class LoopBase:
         ----------
         step_n : int | None
             How many steps to run;
-            `None` indicates to run forever until error or KeyboardInterrupt
+            `None` indicates to run forever until error or KeyboardInterrupt;
+            the steps are always run one by one if it is given.
         """
+        if step_n is None and RD_AGENT_SETTINGS.workflow_max_inflight_loops > 1:
+            self._run_pipelined(RD_AGENT_SETTINGS.workflow_max_inflight_loops)
+            return
         with tqdm(total=len(self.steps), desc="Workflow Progress", unit="step") as pbar:
             while True:
                 if step_n is not None:
@@ -137,17 +173,124 @@ class LoopBase:
 
                 self.dump(self.session_folder / f"{li}" / f"{si}_{name}")  # save a snapshot after the session
 
+    def _run_pipelined(self, max_inflight: int) -> None:
+        """
+        Run the loops in a pipeline, so the next loops are proposed and coded (speculatively, based on the
+        trace at that time) while the former loops are running.
+
+        - A new loop starts after the latest loop reaches one of `background_steps`, and at most
+          `max_inflight` loops are in flight.
+        - The steps except `background_steps` run one at a time, so they never see a half-updated state.
+        - The steps in `ordered_steps` of a loop wait until all the former loops are done, so the feedbacks
+          land in the trace in the order of the loops.
+        - The snapshot is saved after each loop is done (and all the former loops); a resumed session starts
+          from the next loop, the loops in flight are run again.
+        """
+        state = _PipelineState(first_loop=self.loop_idx)
+        with state.cond:
+            try:
+                while True:
+                    if state.error is not None:
+                        if any(li < state.error_loop for li in state.inflight):
+                            state.cond.wait()
+                            continue
+                        raise state.error
+                    if len(state.inflight) < max_inflight and (state.latest is None or state.latest in state.released):
+                        li = state.next_loop if state.latest is None else state.latest + 1
+                        # the first loop may be resumed from the middle
+                        si, prev_out = (self.step_idx, self.loop_prev_out) if state.latest is None else (0, {})
+                        state.latest = li
+                        state.inflight.add(li)
+                        # in a copy of the current context, so the loop keeps the log tag of the caller
+                        threading.Thread(
+                            target=contextvars.copy_context().run,
+                            args=(self._run_loop_in_pipeline, state, li, si, prev_out),
+                            name=f"loop_{li}",
+                        ).start()
+                        continue
+                    state.cond.wait()
+            finally:
+                state.stop.set()
+
+    def _run_loop_in_pipeline(self, state: _PipelineState, li: int, si: int, prev_out: dict) -> None:
+        completed = False
+        try:
+            while si < len(self.steps) and not state.should_stop(li):
+                name = self.steps[si]
+                if name in self.background_steps:
+                    with state.cond:
+                        state.released.add(li)
+                        state.cond.notify_all()
+                elif name in self.ordered_steps:
+                    with state.cond:
+                        state.cond.wait_for(lambda: state.next_loop >= li or state.should_stop(li))
+
+                start = datetime.datetime.now(datetime.timezone.utc)
+                try:
+                    if name in self.background_steps:
+                        prev_out[name] = getattr(self, name)(prev_out)
+                    else:
+                        with state.lock:
+                            prev_out[name] = getattr(self, name)(prev_out)
+                except self.skip_loop_error as e:
+                    logger.warning(f"Skip loop {li} due to {e}")
+                    break
+                except CoderError as e:
+                    logger.warning(f"Traceback loop {li} due to {e}")
+                    si = 0
+                    continue
+                end = datetime.datetime.now(datetime.timezone.utc)
+                state.traces[li].append(LoopTrace(start, end))
+                si += 1
+            else:
+                completed = not state.should_stop(li)
+        except BaseException as e:
+            with state.cond:
+                if state.error_loop is None or li < state.error_loop:
+                    state.error, state.error_loop = e, li
+                state.inflight.discard(li)
+                state.cond.notify_all()
+            return
+        if not state.should_stop(li):
+            self._finish_loop_in_pipeline(state, li, completed)
+        else:
+            with state.cond:
+                state.inflight.discard(li)
+                state.cond.notify_all()
+
+    def _finish_loop_in_pipeline(self, state: _PipelineState, li: int, completed: bool) -> None:
+        with state.lock:  # no other step changes the loop while saving the snapshot
+            with state.cond:
+                state.done[li] = completed
+                state.inflight.discard(li)
+                state.released.add(li)
+                last_completed = None
+                while state.next_loop in state.done:
+                    self.loop_trace[state.next_loop].extend(state.traces.pop(state.next_loop, []))
+                    if state.done[state.next_loop]:
+                        last_completed = state.next_loop
+                    state.next_loop += 1
+                state.cond.notify_all()
+            self.loop_idx, self.step_idx, self.loop_prev_out = state.next_loop, 0, {}
+            if last_completed is not None:
+                si = len(self.steps) - 1
+                self.dump(self.session_folder / f"{last_completed}" / f"{si}_{self.steps[si]}")
+
     def dump(self, path: str | Path):
         path = Path(path)
+        if RD_AGENT_SETTINGS.session_snapshot_incremental:
+            try:
+                dump_snapshot(self, path)
+                return
+            except SnapshotCycleError as e:
+                logger.warning(f"Save the session as a single pickle because {e}")
         path.parent.mkdir(parents=True, exist_ok=True)
         with path.open("wb") as f:
             pickle.dump(self, f)
 
     @classmethod
     def load(cls, path: str | Path):
-        path = Path(path)
-        with path.open("rb") as f:
-            session = pickle.load(f)
+        session = load_snapshot(path)
         logger.set_trace_path(session.session_folder.parent)
 
         max_loop = max(session.loop_trace.keys())
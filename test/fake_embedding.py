@@ -0,0 +1,18 @@
+import hashlib
+
+import numpy as np
+
+
+def fake_embedding(self, input_content: str | list[str], **kwargs) -> list:
+    """
+    A random embedding seeded by the content, so the same content always has the same embedding.
+    It replaces `APIBackend.create_embedding` in the offline tests.
+    """
+
+    def embed(content: str) -> list[float]:
+        seed = int(hashlib.md5(content.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=16).tolist()
+
+    if isinstance(input_content, str):
+        return embed(input_content)
+    return [embed(content) for content in input_content]
@@ -45,6 +45,15 @@ class TestChatCompletion(unittest.TestCase):
         response2 = session.build_chat_completion(user_prompt=user_prompt_2)
         assert response2 is not None
 
+    def test_batch_chat(self) -> None:
+        system_prompt = "You are a helpful assistant."
+        user_prompts = [f"What is {i} + {i}? Please only answer the number." for i in range(4)]
+        responses = APIBackend().batch_chat(user_prompts, system_prompt=system_prompt)
+        assert len(responses) == len(user_prompts)
+        for i, response in enumerate(responses):
+            assert isinstance(response, str)
+            assert str(i + i) in response
+
 
 if __name__ == "__main__":
     unittest.main()
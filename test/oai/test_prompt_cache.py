@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.core.utils import multiprocessing_wrapper
+from rdagent.oai.llm_utils import MemoryLRUCache, SQliteLazyCache
+
+
+def _write_cache(cache_location: str, i: int) -> str | None:
+    cache = SQliteLazyCache(cache_location=cache_location)
+    cache.chat_set(f"prompt_{i}", f"response_{i}")
+    cache.embedding_set({f"content_{i}": [0.5, float(i)]})
+    return cache.chat_get(f"prompt_{i}")
+
+
+@pytest.mark.offline
+class TestPromptCache(unittest.TestCase):
+    def test_multiprocess_write(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_location = str(Path(tmp_dir) / "prompt_cache.db")
+            responses = multiprocessing_wrapper([(_write_cache, (cache_location, i)) for i in range(8)], n=4)
+            assert responses == [f"response_{i}" for i in range(8)]
+
+            # the buffered writes of the workers are committed when they exit.
+            cache = SQliteLazyCache(cache_location=cache_location)
+            for i in range(8):
+                assert cache.chat_get(f"prompt_{i}") == f"response_{i}"
+                assert cache.embedding_get(f"content_{i}") == [0.5, float(i)]
+            assert cache.chat_get("unknown prompt") is None
+            stats = cache.get_stats()
+            assert stats["chat_hit"] == 8
+            assert stats["chat_miss"] == 1
+
+            # the second lookups are served by the in-memory tier.
+            for i in range(8):
+                assert cache.embedding_get(f"content_{i}") == [0.5, float(i)]
+            assert cache.get_stats()["memory_hit"] >= 8
+
+    def test_memory_lru_bytes_limit(self) -> None:
+        cache = MemoryLRUCache(max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        assert cache.get("a") == "12345"  # "a" becomes the most recently used one
+        cache.put("c", "12345")
+        assert cache.get("b") is None
+        assert cache.get("a") == "12345"
+        assert cache.get("c") == "12345"
+        cache.put("d", "x" * 11)  # larger than the whole cache
+        assert cache.get("d") is None
+        assert cache.get_stats()["bytes"] == 10
+
+
+if __name__ == "__main__":
+    unittest.main()
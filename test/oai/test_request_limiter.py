@@ -0,0 +1,107 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.oai import llm_utils
+from rdagent.oai.llm_utils import APIBackend, LLMRequestLimiter
+
+
+class FakeAsyncClient:
+    """Answer each chat completion with its last message after a short delay, like `openai.AsyncOpenAI`."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: list, **kwargs) -> SimpleNamespace:
+        assert not self.closed
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        message = SimpleNamespace(content=f"answer to {messages[-1]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.offline
+class TestLLMRequestLimiter(unittest.TestCase):
+    @staticmethod
+    def start_times(limiter: LLMRequestLimiter, tokens: list[int], duration: float = 0.0) -> list[float]:
+        async def request(n_tokens: int) -> float:
+            async with limiter.limit(tokens=n_tokens):
+                started = time.monotonic()
+                await asyncio.sleep(duration)
+                return started
+
+        async def run() -> list[float]:
+            start = time.monotonic()
+            return [t - start for t in await asyncio.gather(*[request(n) for n in tokens])]
+
+        return asyncio.run(run())
+
+    def test_concurrency(self) -> None:
+        limiter = LLMRequestLimiter("model", max_concurrency=2, rpm_limit=None, tpm_limit=None)
+        started = sorted(self.start_times(limiter, [0] * 6, duration=0.1))
+        # 3 waves of 2 requests
+        for i, t in enumerate(started):
+            self.assertAlmostEqual(t, (i // 2) * 0.1, delta=0.05)
+
+    def test_rate_window(self) -> None:
+        limiter = LLMRequestLimiter("model", max_concurrency=10, rpm_limit=2, tpm_limit=None)
+        limiter.WINDOW_SECONDS = 0.2
+        started = sorted(self.start_times(limiter, [0] * 3))
+        self.assertLess(started[1], 0.05)
+        self.assertGreaterEqual(started[2], 0.2)
+
+        limiter = LLMRequestLimiter("model", max_concurrency=10, rpm_limit=None, tpm_limit=100)
+        limiter.WINDOW_SECONDS = 0.2
+        # a request larger than the budget is still sent when the window is empty
+        started = self.start_times(limiter, [150, 60])
+        self.assertLess(started[0], 0.05)
+        self.assertGreaterEqual(started[1], 0.2)
+
+    def test_batch_chat(self) -> None:
+        clients = []
+
+        def build_clients(self, *, asynchronous: bool):
+            pair = (FakeAsyncClient(), FakeAsyncClient())
+            if asynchronous:
+                clients.append(pair)
+            return pair
+
+        # the encoder of tiktoken is downloaded, the tokens are counted by a stub instead
+        with mock.patch.object(APIBackend, "_build_clients", build_clients), mock.patch.object(
+            llm_utils.tiktoken, "encoding_for_model", return_value=SimpleNamespace(encode=str.split)
+        ), mock.patch.object(RD_AGENT_SETTINGS, "llm_max_concurrency", 2), mock.patch.object(
+            RD_AGENT_SETTINGS, "log_llm_chat_content", False
+        ):
+            backend = APIBackend(
+                use_chat_cache=False, dump_chat_cache=False, use_embedding_cache=False, dump_embedding_cache=False
+            )
+            backend.chat_stream = False
+            for _ in range(2):
+                responses = backend.batch_chat([f"q{i}" for i in range(5)], system_prompt="system")
+                self.assertEqual(responses, [f"answer to q{i}" for i in range(5)])
+            # a direct call outside `batch_chat` also closes the clients of its event loop
+            response = asyncio.run(backend.acreate_chat_completion("q", system_prompt="system"))
+            self.assertEqual(response, "answer to q")
+
+        # one pair of clients for each event loop, closed when its last request finishes
+        self.assertEqual(len(clients), 3)
+        self.assertEqual([chat_client.max_running for chat_client, _ in clients], [2, 2, 1])
+        for chat_client, embedding_client in clients:
+            self.assertTrue(chat_client.closed and embedding_client.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
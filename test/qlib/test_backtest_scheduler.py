@@ -0,0 +1,158 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from rdagent.components.runner.conf import RUNNER_SETTINGS
+from rdagent.core.exception import FactorEmptyError
+from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.qlib.developer.factor_runner import QlibFactorRunner
+from rdagent.scenarios.qlib.developer.model_runner import QlibModelRunner
+from rdagent.scenarios.qlib.experiment import workspace
+from rdagent.scenarios.qlib.experiment.workspace import (
+    QlibBacktestScheduler,
+    QlibFBWorkspace,
+)
+
+
+class FakeQTDockerEnv:
+    """Write the outputs of the backtest like the container; `release` holds the backtests when it is set."""
+
+    entries: list[str] = []
+    release: threading.Event | None = None
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def prepare(self) -> None:
+        pass
+
+    def run(self, local_path: str, entry: str, env: dict) -> str:
+        cls = type(self)
+        with cls.lock:
+            cls.entries.append(entry)
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        try:
+            if cls.release is not None:
+                cls.release.wait(10)
+            pd.DataFrame({"return": [0.1]}).to_pickle(Path(local_path) / "ret.pkl")
+            pd.Series({"IC": len(env)}, name="value").to_csv(Path(local_path) / "qlib_res.csv")
+        finally:
+            with cls.lock:
+                cls.running -= 1
+        return ""
+
+
+@pytest.mark.offline
+class QlibBacktestSchedulerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        FakeQTDockerEnv.entries, FakeQTDockerEnv.release = [], None
+        FakeQTDockerEnv.running = FakeQTDockerEnv.max_running = 0
+        self.scheduler = QlibBacktestScheduler(max_workers=2)
+        patches = [
+            mock.patch.object(workspace, "QTDockerEnv", FakeQTDockerEnv),
+            mock.patch.object(workspace, "_BACKTEST_SCHEDULER", self.scheduler),
+            mock.patch.object(RUNNER_SETTINGS, "cache_result", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self) -> None:
+        self.scheduler.executor.shutdown()
+        self.tmp_dir.cleanup()
+
+    def workspace(self, name: str) -> QlibFBWorkspace:
+        ws = QlibFBWorkspace(template_folder_path=Path(self.tmp_dir.name) / "template")
+        ws.workspace_path = Path(self.tmp_dir.name) / name
+        ws.prepare()
+        return ws
+
+    def test_budget_workers(self) -> None:
+        with mock.patch.object(workspace.os, "cpu_count", return_value=32), mock.patch.object(
+            workspace.psutil, "virtual_memory", return_value=SimpleNamespace(total=48 * 1024**3)
+        ), mock.patch.object(RUNNER_SETTINGS, "backtest_cpus_per_worker", 8):
+            # 4 workers by the CPUs, 3 workers by the memory
+            self.assertEqual(QlibBacktestScheduler.budget_workers(SimpleNamespace(mem_limit="10g", shm_size="6g")), 3)
+            self.assertEqual(QlibBacktestScheduler.budget_workers(SimpleNamespace(mem_limit=None, shm_size=None)), 4)
+            self.assertEqual(QlibBacktestScheduler.budget_workers(SimpleNamespace(mem_limit="64g", shm_size=None)), 1)
+
+    def test_admission(self) -> None:
+        lock, running, max_running = threading.Lock(), [0], [0]
+
+        def backtest(i: int) -> int:
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return i
+
+        futures = [self.scheduler.submit(backtest, i) for i in range(5)]
+        self.assertEqual([future.result() for future in futures], list(range(5)))
+        self.assertEqual(max_running[0], 2)
+        # the backtests keep the log tag of the caller
+        with logger.tag("loop_0"):
+            self.assertEqual(self.scheduler.submit(lambda: logger._tag).result(), "loop_0")
+
+    def test_execute(self) -> None:
+        ws = self.workspace("ws")
+        result = ws.execute_async(qlib_config_name="conf_combined.yaml", run_env={"a": 1}).result()
+        self.assertEqual(result.to_dict(), {"IC": 1})
+        # qrun & read_exp_res.py run in the same container
+        self.assertEqual(FakeQTDockerEnv.entries, ["sh -c 'qrun conf_combined.yaml; python read_exp_res.py'"])
+
+    def test_model_runner_futures(self) -> None:
+        FakeQTDockerEnv.release = threading.Event()
+        exps = [
+            SimpleNamespace(
+                sub_workspace_list=[SimpleNamespace(code_dict={"model.py": "# model"})],
+                sub_tasks=[SimpleNamespace(model_type=model_type)],
+                experiment_workspace=self.workspace(model_type),
+                result=None,
+            )
+            for model_type in ("TimeSeries", "Tabular")
+        ]
+        runner = QlibModelRunner(scen=None)
+        futures = [runner.develop_async(exp) for exp in exps]
+        # the backtests of both experiments are submitted without waiting for each other
+        for _ in range(100):
+            if FakeQTDockerEnv.running == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(FakeQTDockerEnv.max_running, 2)
+        self.assertFalse(any(future.done() for future in futures))
+        FakeQTDockerEnv.release.set()
+        self.assertEqual([future.result(timeout=10) for future in futures], exps)
+        self.assertEqual([exp.result.to_dict() for exp in exps], [{"IC": 4}, {"IC": 2}])
+
+        exps[0].sub_workspace_list[0].code_dict = {}
+        with self.assertRaisesRegex(Exception, "model.py is empty"):
+            runner.develop_batch(exps)
+
+    def test_factor_runner_awaits_based(self) -> None:
+        FakeQTDockerEnv.release = threading.Event()
+        based = SimpleNamespace(based_experiments=[], experiment_workspace=self.workspace("based"), result=None)
+        exp = SimpleNamespace(based_experiments=[based], experiment_workspace=self.workspace("new"), result=None)
+        runner = QlibFactorRunner(scen=None)
+        threading.Timer(0.1, FakeQTDockerEnv.release.set).start()
+        with mock.patch.object(QlibFactorRunner, "process_factor_data", return_value=pd.DataFrame()):
+            with self.assertRaises(FactorEmptyError):
+                runner.develop(exp)
+        # the backtest of the based experiment is finished and kept although the new factors fail
+        self.assertEqual(FakeQTDockerEnv.running, 0)
+        self.assertEqual(based.result.to_dict(), {"IC": 0})
+        self.assertEqual(FakeQTDockerEnv.entries, ["sh -c 'qrun conf.yaml; python read_exp_res.py'"])
+
+
+if __name__ == "__main__":
+    unittest.main()
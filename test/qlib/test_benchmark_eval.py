@@ -0,0 +1,107 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.components.benchmark import eval_method
+from rdagent.components.benchmark.eval_method import BaseEval, FactorImplementEval
+from rdagent.components.coder.factor_coder.CoSTEER.evaluators import (
+    FactorOutputFormatEvaluator,
+)
+from rdagent.components.coder.factor_coder.factor import FactorTask
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.exception import CustomRuntimeError
+from rdagent.core.experiment import Workspace
+
+
+class DataFrameWorkspace(Workspace):
+    def __init__(self, target_task: FactorTask, df: pd.DataFrame | None) -> None:
+        super().__init__(target_task)
+        self.df = df
+        self.raise_exception = False
+
+    def execute(self, *args, **kwargs):
+        if self.df is None and self.raise_exception:
+            raise CustomRuntimeError("failed")
+        return "", self.df
+
+    def copy(self):
+        return self
+
+
+class StaticDeveloper:
+    def __init__(self, rounds: list[list[Workspace]]) -> None:
+        self.rounds = iter(rounds)
+
+    def develop(self, exp):
+        return SimpleNamespace(sub_workspace_list=next(self.rounds))
+
+
+def factor_df(name: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product(
+        [pd.date_range("2020-01-01", periods=10), [f"SH{i:06d}" for i in range(20)]], names=["datetime", "instrument"]
+    )
+    return pd.DataFrame({name: rng.normal(size=len(index))}, index=index)
+
+
+@pytest.mark.offline
+class FactorImplementEvalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tasks = [FactorTask(f"factor_{i}", "", "") for i in range(2)]
+        self.gt = [DataFrameWorkspace(task, factor_df(task.factor_name, i)) for i, task in enumerate(self.tasks)]
+        self.rounds = [
+            [
+                DataFrameWorkspace(self.tasks[0], self.gt[0].df + 0.1 * factor_df("factor_0", 10)),
+                DataFrameWorkspace(self.tasks[1], None),
+            ],
+            [
+                DataFrameWorkspace(self.tasks[0], self.gt[0].df.copy()),
+                DataFrameWorkspace(self.tasks[1], self.gt[1].df.iloc[50:] * 2),
+            ],
+        ]
+        self.old_multi_proc_n = RD_AGENT_SETTINGS.multi_proc_n
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.multi_proc_n = self.old_multi_proc_n
+
+    def evaluation(self) -> FactorImplementEval:
+        evaluation = FactorImplementEval(
+            eval_method.TestCases([eval_method.TestCase(task, gt) for task, gt in zip(self.tasks, self.gt)]),
+            StaticDeveloper(self.rounds),
+            scen=None,
+            test_round=len(self.rounds),
+        )
+        # the output format is evaluated by the LLM
+        evaluation.evaluator_l = [
+            ev for ev in evaluation.evaluator_l if not isinstance(ev, FactorOutputFormatEvaluator)
+        ]
+        return evaluation
+
+    def test_eval(self) -> None:
+        for multi_proc_n in (1, 2):
+            RD_AGENT_SETTINGS.multi_proc_n = multi_proc_n
+            evaluation = self.evaluation()
+            res = evaluation.eval()
+            self.assertEqual(list(res), ["factor_0", "factor_1"])
+            for factor_name, gt in zip(["factor_0", "factor_1"], self.gt):
+                for gen, eval_res in res[factor_name]:
+                    expected = BaseEval.eval_case(evaluation, gt, gen)
+                    if isinstance(expected, Exception):
+                        self.assertIsInstance(eval_res, type(expected))
+                        continue
+                    self.assertEqual([str(ev) for ev, _ in eval_res], [str(ev) for ev, _ in expected])
+                    for (_, (feedback, metric)), (_, (expected_feedback, expected_metric)) in zip(eval_res, expected):
+                        self.assertEqual(feedback, expected_feedback)
+                        self.assertAlmostEqual(metric, expected_metric)
+                    self.assertIn("execution", eval_res.timing)
+
+            summary = FactorImplementEval.summarize_res(res)
+            self.assertIn("time: FactorCorrelationEvaluator", summary.index)
+            self.assertEqual(summary.loc["FactorSingleColumnEvaluator"].notna().sum(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
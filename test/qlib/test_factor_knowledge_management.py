@@ -0,0 +1,161 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from rdagent.components.coder.factor_coder.CoSTEER.evaluators import (
+    FactorSingleFeedback,
+)
+from rdagent.components.coder.factor_coder.CoSTEER.knowledge_management import (
+    FactorGraphKnowledgeBase,
+    FactorGraphRAGStrategy,
+    FactorKnowledge,
+    FactorQueriedGraphKnowledge,
+)
+from rdagent.components.coder.factor_coder.factor import FactorTask
+from rdagent.components.knowledge_management.graph import (
+    UndirectedGraph,
+    UndirectedNode,
+)
+from rdagent.core.experiment import Workspace
+from rdagent.oai.llm_utils import APIBackend
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from fake_embedding import fake_embedding
+
+
+class CodeWorkspace(Workspace):
+    def __init__(self, target_task: FactorTask, code: str) -> None:
+        super().__init__(target_task)
+        self.code = code
+
+    def execute(self, *args, **kwargs):
+        return "", None
+
+    def copy(self):
+        return self
+
+
+
+@pytest.mark.offline
+class FactorGraphRAGStrategyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # the patches are inherited by the processes forked to compute the embedding distances
+        patches = [
+            mock.patch.object(APIBackend, "__init__", lambda self, *args, **kwargs: None),
+            mock.patch.object(APIBackend, "create_embedding", fake_embedding),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.kb = FactorGraphKnowledgeBase()
+        self.kb.graph = UndirectedGraph()
+        self.components = [UndirectedNode(content=f"component {i}", label="component") for i in range(4)]
+        for component in self.components:
+            self.kb.graph.add_node(component)
+
+        self.success_tasks = [FactorTask(f"success_{j}", f"success factor {j}", f"x_{j}") for j in range(6)]
+        for j, task in enumerate(self.success_tasks):
+            info = task.get_task_information()
+            self.kb.task_to_component_nodes[info] = [self.components[j % 4], self.components[(j + 1) % 4]]
+            trace = [
+                self.knowledge(task, f"failed {j}", value_generated_flag=False),
+                self.knowledge(task, f"succeeded {j}", final_decision_based_on_gt=j % 2 == 0),
+            ]
+            self.kb.working_trace_knowledge[info] = trace
+            self.kb.working_trace_error_analysis[info] = [[f"error {j % 3}", f"error {(j + 1) % 3}"]]
+            self.kb.success_task_to_knowledge_dict[info] = trace[-1]
+            self.kb.update_success_task(info)
+
+        self.tasks = [FactorTask(f"new_{i}", f"new factor {i}", f"y_{i}") for i in range(4)]
+        components = [self.components[:2], self.components[2:3], [self.components[3], self.components[0]], []]
+        error_analysis = [[["error 0", "error 1"]], [["error 2"]], [["unknown error"], ["error 1"]], None]
+        for i, task in enumerate(self.tasks):
+            info = task.get_task_information()
+            self.kb.task_to_component_nodes[info] = components[i]
+            if error_analysis[i] is not None:
+                self.kb.working_trace_knowledge[info] = [
+                    self.knowledge(task, f"trial {i} {k}", value_generated_flag=True)
+                    for k in range(len(error_analysis[i]))
+                ]
+                self.kb.working_trace_error_analysis[info] = error_analysis[i]
+        # an already succeeded task is queried with the new ones
+        self.tasks.append(self.success_tasks[0])
+        self.strategy = FactorGraphRAGStrategy(self.kb)
+
+    @staticmethod
+    def knowledge(task: FactorTask, code: str, **feedback) -> FactorKnowledge:
+        return FactorKnowledge(task, CodeWorkspace(task, code), FactorSingleFeedback(**feedback))
+
+    def query(self, tasks: list[FactorTask]) -> FactorQueriedGraphKnowledge:
+        queried_knowledge = FactorQueriedGraphKnowledge(
+            former_traces={},
+            component_with_success_task={},
+            error_with_success_task={},
+            success_task_to_knowledge_dict=self.kb.success_task_to_knowledge_dict,
+            failed_task_info_set=set(),
+        )
+        evo = SimpleNamespace(sub_tasks=tasks)
+        self.strategy.former_trace_query(evo, queried_knowledge)
+        self.strategy.component_query(evo, queried_knowledge, knowledge_sampler=1.0)
+        self.strategy.error_query(evo, queried_knowledge, knowledge_sampler=1.0)
+        return queried_knowledge
+
+    def test_batch_query(self) -> None:
+        """querying the tasks together gives the same knowledge as querying them one by one"""
+        batched = self.query(self.tasks)
+        for task in self.tasks:
+            info = task.get_task_information()
+            single = self.query([task])
+            self.assertEqual(batched.component_with_success_task[info], single.component_with_success_task[info])
+            self.assertEqual(batched.error_with_success_task[info], single.error_with_success_task[info])
+
+        infos = [task.get_task_information() for task in self.tasks]
+        self.assertTrue(all(batched.component_with_success_task[info] for info in infos[:-1]))
+        self.assertEqual(batched.component_with_success_task[infos[-1]], [])
+        self.assertTrue(batched.error_with_success_task[infos[0]])
+        self.assertTrue(batched.error_with_success_task[infos[2]])
+        self.assertEqual(batched.error_with_success_task[infos[3]], [])
+
+    def test_dump_incremental(self) -> None:
+        def summary(value):
+            if isinstance(value, FactorKnowledge):
+                return value.get_implementation_and_feedback_str()
+            if isinstance(value, UndirectedNode):
+                return value.content, value.label
+            if isinstance(value, list):
+                return [summary(v) for v in value]
+            return value
+
+        task = FactorTask("success_6", "success factor 6", "x_6")
+        info = task.get_task_information()
+        self.kb.task_to_component_nodes[info] = self.components[:1]
+        self.kb.working_trace_knowledge[info] = [self.knowledge(task, "failed 6", value_generated_flag=False)]
+        self.kb.working_trace_error_analysis[info] = [["error 5"]]
+        with tempfile.TemporaryDirectory() as path:
+            self.kb.dump_incremental(path)
+            # the task succeeds, its error analysis is replaced by the error nodes in place
+            self.kb.working_trace_knowledge[info].append(
+                self.knowledge(task, "succeeded 6", final_decision_based_on_gt=True)
+            )
+            self.kb.mark_dirty("working_trace_knowledge", info)
+            self.kb.success_task_to_knowledge_dict[info] = self.kb.working_trace_knowledge[info][-1]
+            self.kb.update_success_task(info)
+            self.kb.dump_incremental(path)
+
+            loaded = FactorGraphKnowledgeBase.load_incremental(path)
+            for attr in FactorGraphKnowledgeBase.INCREMENTAL_ATTRS:
+                self.assertEqual(
+                    {key: summary(value) for key, value in getattr(loaded, attr).items()},
+                    {key: summary(value) for key, value in getattr(self.kb, attr).items()},
+                )
+            self.assertIs(loaded.working_trace_error_analysis[info][0][0], loaded.graph.find_node("error 5", "error"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.qlib.developer.factor_runner import QlibFactorRunner
+
+
+@pytest.mark.offline
+class TestDeduplicateNewFactors(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        index = pd.MultiIndex.from_product(
+            [pd.date_range("2020-01-01", periods=20), [f"SH{i:06d}" for i in range(30)]],
+            names=["datetime", "instrument"],
+        )
+        index = index[rng.random(len(index)) > 0.1]
+        self.sota = pd.DataFrame(rng.normal(size=(len(index), 3)) * 100 + 1000, index=index, columns=["a", "b", "c"])
+        self.new = pd.DataFrame(rng.normal(size=(len(index), 3)), index=index, columns=["x", "y", "z"])
+        self.new["y"] = self.sota["b"] * 2 + 1
+        self.new.iloc[rng.random(len(index)) < 0.2, 0] = np.nan
+        self.sota.iloc[rng.random(len(index)) < 0.2, 2] = np.nan
+        self.runner = QlibFactorRunner.__new__(QlibFactorRunner)
+
+    def test_same_ic_as_pandas(self) -> None:
+        concat_feature = pd.concat([self.sota, self.new], axis=1)
+        expected = pd.DataFrame(
+            [
+                [
+                    concat_feature.groupby("datetime").apply(lambda x: x[s].corr(x[n])).mean()
+                    for n in self.new.columns
+                ]
+                for s in self.sota.columns
+            ]
+        )
+        self.runner.IC_CHUNK_BYTES = 4096  # several chunks of dates
+        ic = self.runner.calculate_information_coefficient(concat_feature, 3, 3)
+        np.testing.assert_allclose(ic.values, expected.values, atol=1e-10)
+
+    def test_deduplicate(self) -> None:
+        self.assertEqual(self.runner.deduplicate_new_factors(self.sota, self.new).columns.tolist(), ["x", "z"])
+
+
+if __name__ == "__main__":
+    unittest.main()
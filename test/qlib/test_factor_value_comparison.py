@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.components.coder.factor_coder.CoSTEER.evaluators import (
+    FactorCorrelationEvaluator,
+    FactorEqualValueCountEvaluator,
+    FactorIndexEvaluator,
+    FactorMissingValuesEvaluator,
+    FactorRowCountEvaluator,
+)
+from rdagent.components.coder.factor_coder.CoSTEER.value_comparison import (
+    compare_factor_values,
+)
+from rdagent.core.experiment import Workspace
+
+
+class DataFrameWorkspace(Workspace):
+    def __init__(self, df: pd.DataFrame) -> None:
+        super().__init__()
+        self.df = df
+
+    def execute(self, *args, **kwargs):
+        return "", self.df
+
+    def copy(self):
+        return self
+
+
+def factor_df(n_days: int, n_instruments: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product(
+        [pd.date_range("2020-01-01", periods=n_days), [f"SH{i:06d}" for i in range(n_instruments)]],
+        names=["datetime", "instrument"],
+    )
+    # rounded values, so the ranks have ties
+    return pd.DataFrame({"factor": rng.normal(size=len(index)).round(1)}, index=index)
+
+
+@pytest.mark.offline
+class FactorValueComparisonTest(unittest.TestCase):
+    def assert_same_feedback(self, gen_df: pd.DataFrame, gt_df: pd.DataFrame) -> None:
+        """the fused comparison gives the same feedback as the evaluators"""
+        gen, gt = DataFrameWorkspace(gen_df), DataFrameWorkspace(gt_df)
+        comparison = compare_factor_values(gen_df.sort_index(), gt_df.sort_index())
+        self.assertIsNotNone(comparison)
+        pairs = [
+            (FactorRowCountEvaluator.feedback(comparison.row_ratio), FactorRowCountEvaluator(None)),
+            (FactorIndexEvaluator.feedback(comparison.index_similarity), FactorIndexEvaluator(None)),
+            (
+                FactorMissingValuesEvaluator.feedback(comparison.gen_missing_values, comparison.gt_missing_values),
+                FactorMissingValuesEvaluator(None),
+            ),
+            (
+                FactorEqualValueCountEvaluator.feedback(comparison.all_values_equal, comparison.equal_value_ratio),
+                FactorEqualValueCountEvaluator(None),
+            ),
+        ]
+        for hard_check in (True, False):
+            evaluator = FactorCorrelationEvaluator(hard_check=hard_check, scen=None)
+            pairs.append((evaluator.feedback(*comparison.correlation()), evaluator))
+        for (fused_feedback, fused_result), evaluator in pairs:
+            feedback, result = evaluator.evaluate(gen, gt)
+            self.assertEqual(fused_feedback, feedback, str(evaluator))
+            self.assertAlmostEqual(fused_result, result, msg=str(evaluator))
+
+    def test_same_values(self) -> None:
+        gt_df = factor_df(20, 30, seed=0)
+        self.assert_same_feedback(gt_df.copy(), gt_df)
+
+    def test_different_values(self) -> None:
+        gt_df = factor_df(20, 30, seed=0)
+        gen_df = gt_df + factor_df(20, 30, seed=1) * 0.5
+        gen_df.iloc[::7] = np.nan
+        # a datetime with constant values, and a datetime with only one valid pair
+        gen_df.loc["2020-01-02"] = 1.0
+        gen_df.loc["2020-01-03"] = np.nan
+        gen_df.loc[("2020-01-03", "SH000000")] = 1.0
+        self.assert_same_feedback(gen_df, gt_df)
+        # the rows missing in the source dataframe
+        self.assert_same_feedback(gen_df.iloc[40:].sample(frac=1, random_state=0), gt_df)
+
+    def test_fallback(self) -> None:
+        gt_df = factor_df(5, 5, seed=0)
+        self.assertIsNone(compare_factor_values(pd.concat([gt_df, gt_df]), gt_df))
+        self.assertIsNone(compare_factor_values(gt_df.rename(columns={"factor": "other"}), gt_df))
+        self.assertIsNone(compare_factor_values(gt_df.assign(other=1.0), gt_df))
+
+
+if __name__ == "__main__":
+    unittest.main()
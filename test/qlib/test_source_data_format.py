@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.components.coder.factor_coder.config import FACTOR_IMPLEMENT_SETTINGS
+from rdagent.components.coder.factor_coder.factor import FactorFBWorkspace, FactorTask
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.scenarios.qlib.experiment.utils import prepare_source_data
+
+FACTOR_CODE = """
+import pandas as pd
+from pyarrow import feather
+
+df = pd.read_feather("daily_pv.feather")
+result = df["$close"].groupby(level="instrument").pct_change().to_frame("momentum")
+feather.write_feather(result, "result.feather")
+"""
+
+
+@pytest.mark.offline
+class TestFeatherSourceData(unittest.TestCase):
+    def setUp(self) -> None:
+        pytest.importorskip("pyarrow")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_folder = Path(self.tmp_dir.name) / "data"
+        self.data_folder.mkdir()
+        index = pd.MultiIndex.from_product(
+            [pd.date_range("2020-01-01", periods=10), ["SH600000", "SZ000001"]], names=["datetime", "instrument"]
+        )
+        self.data = pd.DataFrame({"$close": np.arange(20.0) + 1, "$volume": np.arange(20.0)}, index=index)
+        self.data.to_hdf(self.data_folder / "daily_pv.h5", key="data")
+        self.old_settings = FACTOR_IMPLEMENT_SETTINGS.model_dump()
+        FACTOR_IMPLEMENT_SETTINGS.source_data_format = "feather"
+        FACTOR_IMPLEMENT_SETTINGS.data_folder_debug = str(self.data_folder)
+        FACTOR_IMPLEMENT_SETTINGS.enable_execution_cache = False
+        self.old_workspace_path = RD_AGENT_SETTINGS.workspace_path
+        RD_AGENT_SETTINGS.workspace_path = Path(self.tmp_dir.name) / "workspace"
+
+    def tearDown(self) -> None:
+        for name, value in self.old_settings.items():
+            setattr(FACTOR_IMPLEMENT_SETTINGS, name, value)
+        RD_AGENT_SETTINGS.workspace_path = self.old_workspace_path
+        self.tmp_dir.cleanup()
+
+    def test_convert(self) -> None:
+        (self.data_folder / "other.h5").write_bytes(b"not a hdf file")
+        prepare_source_data(self.data_folder)
+        # the source files are kept, and the files which can't be converted are skipped
+        self.assertEqual(
+            sorted(p.name for p in self.data_folder.iterdir()), ["daily_pv.feather", "daily_pv.h5", "other.h5"]
+        )
+        pd.testing.assert_frame_equal(pd.read_feather(self.data_folder / "daily_pv.feather"), self.data)
+        pd.testing.assert_frame_equal(pd.read_hdf(self.data_folder / "daily_pv.h5"), self.data)
+
+        (self.data_folder / "daily_pv.feather").unlink()
+        FACTOR_IMPLEMENT_SETTINGS.source_data_format = "hdf"
+        prepare_source_data(self.data_folder)
+        self.assertEqual(sorted(p.name for p in self.data_folder.iterdir()), ["daily_pv.h5", "other.h5"])
+
+    def test_execute(self) -> None:
+        prepare_source_data(self.data_folder)
+        workspace = FactorFBWorkspace(target_task=FactorTask("momentum", "", ""))
+        workspace.inject_code(**{"factor.py": FACTOR_CODE})
+        feedback, result = workspace.execute()
+        self.assertIn(FactorFBWorkspace.FB_OUTPUT_FILE_FOUND, feedback)
+        pd.testing.assert_frame_equal(
+            result, self.data["$close"].groupby(level="instrument").pct_change().to_frame("momentum")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
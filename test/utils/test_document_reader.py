@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import fitz
+import pytest
+
+from rdagent.components.document_reader import document_reader
+from rdagent.core.conf import RD_AGENT_SETTINGS
+
+
+@pytest.mark.offline
+class DocumentCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp_dir.name) / "reports"
+        (self.folder / "sub").mkdir(parents=True)
+        for i, name in enumerate(["a.pdf", "sub/b.pdf"]):
+            doc = fitz.open()
+            for page in range(2):
+                doc.new_page().insert_text((72, 72), f"report {i} page {page}")
+            doc.save(self.folder / name)
+        self.old_cache_path = RD_AGENT_SETTINGS.document_cache_path
+        RD_AGENT_SETTINGS.document_cache_path = str(Path(self.tmp_dir.name) / "cache")
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.document_cache_path = self.old_cache_path
+        self.tmp_dir.cleanup()
+
+    def test_parse_once(self) -> None:
+        expected = document_reader.process_documents_by_langchain(
+            document_reader.load_documents_by_langchain(str(self.folder))
+        )
+        self.assertEqual(document_reader.load_and_process_pdfs_by_langchain(str(self.folder)), expected)
+
+        with mock.patch.object(document_reader, "_extract_pdf_text", side_effect=AssertionError("parsed again")):
+            self.assertEqual(document_reader.load_and_process_pdfs_by_langchain(str(self.folder)), expected)
+            report = str(self.folder / "a.pdf")
+            self.assertEqual(document_reader.load_and_process_pdfs_by_langchain(report), {report: expected[report]})
+
+        # a single report is loaded in this process and hashed once for both the text and the screenshot
+        with mock.patch.dict(document_reader._FILE_DIGESTS, clear=True), mock.patch.object(
+            document_reader, "multiprocessing_wrapper", side_effect=AssertionError("pool started")
+        ), mock.patch.object(document_reader.hashlib, "md5", wraps=document_reader.hashlib.md5) as md5:
+            self.assertEqual(document_reader.load_and_process_pdfs_by_langchain(report), {report: expected[report]})
+            image = document_reader.extract_first_page_screenshot_from_pdf(report)
+            self.assertEqual(md5.call_count, 1)
+
+        cached_image = document_reader.extract_first_page_screenshot_from_pdf(report)
+        self.assertEqual((cached_image.mode, cached_image.size), ("RGB", image.size))
+        self.assertEqual(cached_image.tobytes(), image.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,24 @@
 import os
 import sys
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
+
+import docker
+import pytest
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import shutil
 
-from rdagent.utils.env import LocalConf, LocalEnv, QlibDockerConf, QTDockerEnv
+from rdagent.utils import env as env_module
+from rdagent.utils.env import (
+    DockerContainerPool,
+    LocalConf,
+    LocalEnv,
+    QlibDockerConf,
+    QTDockerEnv,
+)
 
 DIRNAME = Path(__file__).absolute().resolve().parent
 
@@ -53,6 +65,16 @@ class EnvUtils(unittest.TestCase):
         result = qtde.run(local_path=str(DIRNAME / "env_tpl"), entry="python read_exp_res.py")
         print(result)
 
+    def test_docker_pooled(self):
+        """The runs share one warm container and get the same output as the normal runs."""
+        qtde = QTDockerEnv(QlibDockerConf(pooled=True))
+        qtde.prepare()
+        first = qtde.run(local_path=str(DIRNAME / "env_tpl"), entry="hostname")
+        second = qtde.run(local_path=str(DIRNAME / "env_tpl"), entry="hostname")
+        self.assertEqual(first, second)
+        result = qtde.run(local_path=str(DIRNAME / "env_tpl"), entry="ls")
+        self.assertIn("conf.yaml", result)
+
     def test_docker_mem(self):
         cmd = 'python -c \'print("start"); import numpy as np;  size_mb = 500; size = size_mb * 1024 * 1024 // 8; array = np.random.randn(size).astype(np.float64); print("success")\''
 
@@ -71,5 +93,84 @@ class EnvUtils(unittest.TestCase):
         # docker run  --memory=10g  -it --rm local_qlib:latest python -c 'import numpy as np; print(123);  size_mb = 1; size = size_mb * 1024 * 1024 // 8; array = np.random.randn(size).astype(np.float64); array[0], array[-1] = 1.0, 1.0; print(321)'
 
 
+@pytest.mark.offline
+class DockerPoolTest(unittest.TestCase):
+    """The pooled runs with a mocked docker client."""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.client = mock.MagicMock()
+        self.containers = []
+
+        def run(image, command, **kwargs):
+            if command == "nvidia-smi":
+                raise docker.errors.APIError("no GPU")
+            container = mock.MagicMock(status="running", id=f"c{len(self.containers)}")
+            self.containers.append((container, kwargs))
+            return container
+
+        self.client.containers.run.side_effect = run
+        self.client.api.exec_create.return_value = {"Id": "exec"}
+        self.client.api.exec_start.side_effect = lambda *args, **kwargs: iter([b"output\n"])
+        self.client.api.exec_inspect.return_value = {"ExitCode": 0}
+        self.patches = [
+            mock.patch.object(env_module.docker, "from_env", return_value=self.client),
+            mock.patch.object(env_module, "_CONTAINER_POOL", DockerContainerPool()),
+            mock.patch.dict(env_module._GPU_AVAILABLE, clear=True),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self) -> None:
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def workspace(self, name: str) -> str:
+        path = Path(self.tmp_dir.name) / name
+        path.mkdir()
+        return str(path)
+
+    def test_pooled_runs(self) -> None:
+        qtde = QTDockerEnv(QlibDockerConf(pooled=True, extra_volumes={}, pool_max_idle=2))
+        mount_path = qtde.conf.mount_path
+        a, b = self.workspace("a"), self.workspace("b")
+        self.assertEqual(qtde.run(local_path=a, entry="qrun conf.yaml"), "output\n")
+        qtde.run(local_path=a, entry="python read_exp_res.py")
+        qtde.run(local_path=b, entry="ls")
+
+        # each workspace is mounted at `mount_path` in its own warm container, which is reused by its later runs
+        self.assertEqual(len(self.containers), 2)
+        for (container, kwargs), workspace in zip(self.containers, [a, b]):
+            self.assertEqual(kwargs["volumes"], {workspace: {"bind": mount_path, "mode": "rw"}})
+            self.assertEqual(kwargs["working_dir"], mount_path)
+        container_ids = [call.args[0] for call in self.client.api.exec_create.call_args_list]
+        self.assertEqual(container_ids, ["c0", "c0", "c1"])
+        self.assertEqual(self.client.api.exec_create.call_args.args[1], ["sh", "-c", "ls"])
+
+        # a container which is not running any more is replaced
+        container = self.containers[0][0]
+        container.status = "exited"
+        qtde.run(local_path=a, entry="ls")
+        container.remove.assert_called_once_with(force=True)
+        self.assertEqual(len(self.containers), 3)
+
+        # the least recently used idle container is removed beyond `pool_max_idle`
+        qtde.run(local_path=self.workspace("c"), entry="ls")
+        self.assertEqual(len(self.containers), 4)
+        self.containers[1][0].remove.assert_called_once_with(force=True)
+        self.containers[2][0].remove.assert_not_called()
+
+        # a non-zero exit code of the entry is raised and the container is still returned to the pool
+        self.client.api.exec_inspect.return_value = {"ExitCode": 1}
+        with self.assertRaisesRegex(RuntimeError, "exit status 1"):
+            qtde.run(local_path=a, entry="python fail.py")
+        self.assertEqual(len(self.containers), 4)
+
+        # the GPU is probed once for the image
+        probes = [call for call in self.client.containers.run.call_args_list if call.args[1:] == ("nvidia-smi",)]
+        self.assertEqual(len(probes), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from rdagent.components.coder.execution_cache import ExecutionCache
+
+
+@pytest.mark.offline
+class ExecutionCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ExecutionCache(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_or_compute(self) -> None:
+        df = pd.DataFrame({"factor": range(100)})
+        calls = []
+        compute = lambda: calls.append(1) or ("Execution succeeded without error.", df)
+        for _ in range(3):
+            feedback, value = self.cache.get_or_compute("a" * 32, compute)
+            pd.testing.assert_frame_equal(value, df)
+        self.assertEqual(len(calls), 1)
+        # the result is computed again but still cached if it is not reused
+        self.cache.get_or_compute("a" * 32, compute, reuse=False)
+        self.assertEqual(len(calls), 2)
+        self.cache.get_or_compute("b" * 32, lambda: ("from instance", None), cacheable=lambda res: res[1] is not None)
+        self.assertIsNone(self.cache.get("b" * 32))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hit"], stats["miss"], stats["entries"]), (2, 3, 1))
+
+    def test_coalesce(self) -> None:
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+
+        results = []
+        # the caches of the threads share nothing but the folder, like the caches of different processes
+        run = lambda: results.append(ExecutionCache(self.tmp_dir.name).get_or_compute("c" * 32, compute))
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["result"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_evict(self) -> None:
+        self.cache.max_bytes = 5500
+        for i in range(5):
+            self.cache.set(f"{i:032d}", os.urandom(1024))
+            time.sleep(0.01)
+        self.cache.get(f"{0:032d}")
+        self.cache.set(f"{5:032d}", os.urandom(1024))
+        stats = self.cache.get_stats()
+        self.assertLessEqual(stats["bytes"], 5500)
+        self.assertGreater(stats["evicted"], 0)
+        # the entry hit recently is kept
+        self.assertIsNotNone(self.cache.get(f"{0:032d}"))
+        self.assertIsNone(self.cache.get(f"{1:032d}"))
+
+    def test_legacy_pickle(self) -> None:
+        key = "d" * 32
+        legacy_path = Path(self.tmp_dir.name) / f"{key}.pkl"
+        legacy_path.write_bytes(pickle.dumps(("feedback", None)))
+        self.assertEqual(self.cache.get(key), ("feedback", None))
+        self.assertFalse(legacy_path.exists())
+        self.assertEqual(self.cache.get(key), ("feedback", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
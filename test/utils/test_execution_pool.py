@@ -0,0 +1,105 @@
+import subprocess
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.components.coder.factor_coder.execution_pool import FactorExecutionPool
+
+TEMPLATE = """
+import sys
+from factor import value
+
+print(value())
+"""
+
+
+@pytest.mark.offline
+class FactorExecutionPoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pool = FactorExecutionPool("python", max_workers=1, max_tasks=3, max_memory=8192)
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.tmp_dir.cleanup()
+
+    def workspace(self, name: str, factor_code: str) -> Path:
+        path = Path(self.tmp_dir.name) / name
+        path.mkdir()
+        (path / "factor.py").write_text(factor_code)
+        (path / "run.py").write_text(TEMPLATE)
+        return path
+
+    def run_script(self, path: Path, timeout: float | None = None) -> tuple[int, bytes]:
+        return self.pool.run(path / "run.py", path, timeout)
+
+    def test_isolated_runs(self) -> None:
+        a = self.workspace("a", "def value():\n    return 'a'\n")
+        b = self.workspace("b", "import os\ndef value():\n    os.system('echo from shell')\n    return 'b'\n")
+        self.assertEqual(self.run_script(a), (0, b"a\n"))
+        worker = self.pool.idle[0]
+        # the same warm worker imports the `factor.py` of the new workspace
+        returncode, output = self.run_script(b)
+        self.assertEqual(returncode, 0)
+        self.assertEqual(sorted(output.split()), [b"b", b"from", b"shell"])
+        self.assertIs(self.pool.idle[0], worker)
+        # the worker is recycled after `max_tasks` runs
+        self.assertEqual(self.run_script(a), (0, b"a\n"))
+        self.assertEqual(self.pool.idle, [])
+
+    def test_global_state(self) -> None:
+        patched = self.workspace(
+            "patched", "import pandas as pd\ndef value():\n    pd.DataFrame.patched = True\n    return 'patched'\n"
+        )
+        changed = self.workspace(
+            "changed",
+            "import os, warnings\nimport numpy as np\nimport pandas as pd\ndef value():\n"
+            "    pd.set_option('display.max_rows', 3)\n    os.environ['RD_AGENT_TEST_WORKER'] = '1'\n"
+            "    warnings.simplefilter('error')\n    np.random.seed(0)\n    return np.random.rand()\n",
+        )
+        check = self.workspace(
+            "check",
+            "import os, warnings\nimport numpy as np\nimport pandas as pd\ndef value():\n"
+            "    return (pd.get_option('display.max_rows'), 'RD_AGENT_TEST_WORKER' in os.environ,\n"
+            "            warnings.filters[0][0] == 'error', hasattr(pd.DataFrame, 'patched'), np.random.rand())\n",
+        )
+        # the worker changing the shared modules is recycled
+        self.assertEqual(self.run_script(patched), (0, b"patched\n"))
+        self.assertEqual(self.pool.idle, [])
+        # the other changes are reset for the next script in the same worker
+        returncode, seeded = self.run_script(changed)
+        self.assertEqual(returncode, 0)
+        worker = self.pool.idle[0]
+        returncode, output = self.run_script(check)
+        self.assertEqual(returncode, 0)
+        self.assertIs(self.pool.idle[0], worker)
+        self.assertTrue(output.startswith(b"(60, False, False, False, "))
+        self.assertNotIn(seeded.strip(), output)
+
+    def test_errors(self) -> None:
+        failed = self.workspace("failed", "def value():\n    raise ValueError('wrong factor')\n")
+        returncode, output = self.run_script(failed)
+        self.assertEqual(returncode, 1)
+        self.assertIn(b"ValueError: wrong factor", output)
+        self.assertNotIn(b"execution_worker", output)
+        self.assertNotIn(b"runpy", output)
+
+        exited = self.workspace("exited", "import sys\ndef value():\n    sys.exit(3)\n")
+        self.assertEqual(self.run_script(exited)[0], 3)
+
+        slow = self.workspace("slow", "import time\ndef value():\n    time.sleep(60)\n")
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_script(slow, timeout=1)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(self.pool.idle, [])
+
+        ok = self.workspace("ok", "def value():\n    return 'ok'\n")
+        self.assertEqual(self.run_script(ok), (0, b"ok\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
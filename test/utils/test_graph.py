@@ -0,0 +1,118 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rdagent.components.knowledge_management.graph import (
+    UndirectedGraph,
+    UndirectedNode,
+)
+from rdagent.oai.llm_utils import APIBackend
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from fake_embedding import fake_embedding
+
+
+
+@pytest.mark.offline
+class UndirectedGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patches = [
+            mock.patch.object(APIBackend, "__init__", lambda self, *args, **kwargs: None),
+            mock.patch.object(APIBackend, "create_embedding", fake_embedding),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.graph = UndirectedGraph()
+        components = [UndirectedNode(content=f"component {i}", label="component") for i in range(4)]
+        for i in range(8):
+            task = UndirectedNode(content=f"task {i}", label="task_description")
+            self.graph.add_nodes(task, [components[i % 4], components[(i + 1) % 4]])
+            trace = UndirectedNode(content=f"trace {i}", label="task_trace")
+            self.graph.add_nodes(trace, [task, UndirectedNode(content=f"error {i % 3}", label="error")])
+
+    def test_batch_query_by_content(self) -> None:
+        contents = ["task 1", "component 2", "error 0", "an unknown content", "task 1"]
+        kwargs_list = [
+            {"topk_k": 3, "step": 1},
+            {"topk_k": 5, "step": 2, "constraint_labels": ["task_trace"]},
+            {"topk_k": 4, "step": 3, "constraint_labels": ["task_trace", "error"], "block": True},
+            {"topk_k": 5, "similarity_threshold": 0.999},
+        ]
+        for kwargs in kwargs_list:
+            with self.subTest(**kwargs):
+                expected = []
+                for content in contents:
+                    expected.extend(
+                        node for node in self.graph.query_by_content(content, **kwargs) if node not in expected
+                    )
+                self.assertTrue(expected)
+                self.assertEqual(self.graph.query_by_content(contents, **kwargs), expected)
+
+        for topk_k in (1, 5):
+            self.assertEqual(
+                self.graph.batch_semantic_search(contents, topk_k=topk_k),
+                [self.graph.semantic_search(content, topk_k=topk_k) for content in contents],
+            )
+        self.assertEqual(
+            self.graph.get_nodes_by_content(contents),
+            [self.graph.get_node_by_content(content) for content in contents],
+        )
+        self.assertEqual(self.graph.get_nodes_by_content(["error 1"])[0].label, "error")
+
+    def assert_index_consistent(self, graph: UndirectedGraph) -> None:
+        """the indexed lookups give the same nodes as scanning all the nodes"""
+        nodes = list(graph.nodes.values())
+        labels = ["component", "task_description", "task_trace", "error", "unknown"]
+        for label in labels:
+            self.assertEqual(graph.get_all_nodes_by_label(label), [node for node in nodes if node.label == label])
+        for label_list in (labels[:1], labels[1:3], labels[::-1], ["error", "component", "error"]):
+            self.assertEqual(
+                graph.get_all_nodes_by_label_list(label_list), [node for node in nodes if node.label in label_list]
+            )
+        for content in {node.content for node in nodes} | {"unknown"}:
+            for label in labels:
+                expected = next((node for node in nodes if node.content == content and node.label == label), None)
+                self.assertIs(graph.find_node(content, label), expected)
+
+    def test_index(self) -> None:
+        self.assert_index_consistent(self.graph)
+        # the nodes with the same content and label are merged
+        size = self.graph.size()
+        self.graph.add_node(UndirectedNode(content="task 0", label="task_description"))
+        self.assertEqual(self.graph.size(), size)
+        self.assert_index_consistent(self.graph)
+
+        for content, label in [("task 0", "task_description"), ("component 1", "component"), ("error 2", "error")]:
+            self.graph.remove_node(self.graph.find_node(content, label).id)
+            self.assertIsNone(self.graph.find_node(content, label))
+            self.assert_index_consistent(self.graph)
+        # a removed node is added again after the other nodes
+        self.graph.add_nodes(
+            UndirectedNode(content="component 1", label="component"),
+            [UndirectedNode(content="task 0", label="task_description")],
+        )
+        nodes = self.graph.get_all_nodes_by_label_list(["task_description", "component"])
+        self.assertEqual(nodes[-1].content, "task 0")
+        self.assert_index_consistent(self.graph)
+
+        # the indexes are rebuilt when the graph is loaded
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.graph.path = Path(tmp_dir) / "graph.pkl"
+            self.graph.dump()
+            self.assert_index_consistent(UndirectedGraph(self.graph.path))
+
+        self.graph.clear()
+        self.assert_index_consistent(self.graph)
+        self.graph.add_node(UndirectedNode(content="task 0", label="task_description"))
+        self.assertEqual(self.graph.size(), 1)
+        self.assert_index_consistent(self.graph)
+
+
+if __name__ == "__main__":
+    unittest.main()
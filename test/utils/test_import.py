@@ -1,5 +1,7 @@
 import importlib
 import os
+import subprocess
+import sys
 import unittest
 from pathlib import Path
 
@@ -42,5 +44,35 @@ class TestRDAgentImports(unittest.TestCase):
                     self.fail(f"Failed to import {module_name}: {e}")
 
 
+@pytest.mark.offline
+class TestImportTime(unittest.TestCase):
+    # the modules which take seconds to import and are only needed by some scenarios
+    HEAVY_MODULES = ("torch", "selenium", "langchain", "langchain_community", "docker", "openai", "qlib")
+    # The budget of the cumulative import time of the CLI. It takes about 0.1s without the heavy modules and several
+    # seconds with them, so the budget is loose enough for slow machines and still catches a heavy import.
+    CLI_BUDGET_US = 2_000_000
+
+    @staticmethod
+    def import_times(module: str) -> dict[str, int]:
+        """the cumulative import time (us) of each module imported by `import {module}` in a new process"""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "cumulative" not in line:
+                _, cumulative, name = line.split("|")
+                times[name.strip()] = int(cumulative)
+        return times
+
+    def test_cli(self):
+        times = self.import_times("rdagent.app.cli")
+        self.assertEqual([m for m in self.HEAVY_MODULES if m in times], [])
+        self.assertLess(times["rdagent.app.cli"], self.CLI_BUDGET_US)
+
+    def test_kaggle_crawler(self):
+        self.assertNotIn("selenium", self.import_times("rdagent.scenarios.kaggle.kaggle_crawler"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,146 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from rdagent.components.knowledge_management.graph import (
+    UndirectedGraph,
+    UndirectedNode,
+)
+from rdagent.components.knowledge_management.storage import (
+    AppendOnlyKnowledgeBaseStorage,
+    TrackedDict,
+)
+
+
+class _KnowledgeBase:
+    def __init__(self) -> None:
+        self.graph = UndirectedGraph()
+        self.traces = TrackedDict()
+
+
+@pytest.mark.offline
+class TestAppendOnlyKnowledgeBaseStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(0)
+        self.path = tempfile.mkdtemp()
+
+    def _node(self, content: str, label: str = "test") -> UndirectedNode:
+        return UndirectedNode(content=content, label=label, embedding=self.rng.normal(size=8).tolist())
+
+    def _load(self) -> _KnowledgeBase:
+        kb = _KnowledgeBase()
+        AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"]).load(kb)
+        return kb
+
+    def test_incremental_save_and_load(self) -> None:
+        kb = _KnowledgeBase()
+        storage = AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"])
+        a, b = self._node("a"), self._node("b")
+        kb.graph.add_node(a, b)
+        kb.traces["task"] = [a]
+        storage.save(kb)
+
+        c = self._node("c")
+        kb.graph.add_node(c, a)
+        kb.graph.remove_node(b.id)
+        kb.traces["task"].append("feedback")
+        kb.traces.mark_dirty("task")
+        storage.save(kb)
+        # only the embedding of the new node is appended
+        self.assertEqual(storage._embedding_file(storage.generation).stat().st_size, 3 * 8 * 4)
+
+        loaded = self._load()
+        self.assertEqual(set(loaded.graph.nodes), {a.id, c.id})
+        loaded_a = loaded.graph.get_node(a.id)
+        self.assertEqual({n.id for n in loaded_a.neighbors}, {c.id})
+        self.assertIs(loaded.traces["task"][0], loaded_a)
+        self.assertEqual(loaded.traces["task"][1], "feedback")
+        np.testing.assert_allclose(loaded.graph.get_node(c.id).embedding, c.embedding, rtol=1e-6)
+        (docs, _), = loaded.graph.vector_base.search_by_embedding([c.embedding], topk_k=1)
+        self.assertEqual(docs[0].id, c.id)
+        # the vector base is built over the memory-mapped embeddings, without the row of the removed node
+        self.assertTrue(np.shares_memory(loaded.graph.vector_base.matrix, loaded_a.embedding))
+        (docs, _), = loaded.graph.vector_base.search_by_embedding([b.embedding], topk_k=3, similarity_threshold=-1)
+        self.assertEqual({doc.id for doc in docs}, {a.id, c.id})
+
+    def test_dirty_keys(self) -> None:
+        kb = _KnowledgeBase()
+        kb.traces = {"dict": {"x": 1}, "list": [{"y": 1}], "unchanged": [0]}
+        storage = AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"])
+        storage.save(kb)
+        # a plain dict is tracked since the first save
+        self.assertIsInstance(kb.traces, TrackedDict)
+
+        kb.traces["dict"] = {"x": 2}
+        kb.traces["list"][0]["y"] = 2
+        kb.traces["list"].append({"z": 1})
+        kb.traces.mark_dirty("list")
+        kb.traces["new"] = 1
+        del kb.traces["new"]
+        with mock.patch.object(storage, "_dumps", wraps=storage._dumps) as dumps:
+            storage.save(kb)
+        # only the values of the dirty keys are pickled
+        self.assertEqual([call.args[0] for call in dumps.call_args_list], [{"x": 2}, [{"y": 2}, {"z": 1}]])
+        self.assertEqual(
+            dict(self._load().traces), {"dict": {"x": 2}, "list": [{"y": 2}, {"z": 1}], "unchanged": [0]}
+        )
+        # nothing is written if nothing is changed
+        size = storage._log_file(storage.generation).stat().st_size
+        storage.save(kb)
+        self.assertEqual(storage._log_file(storage.generation).stat().st_size, size)
+
+    def test_lazy_load(self) -> None:
+        kb = _KnowledgeBase()
+        storage = AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"])
+        a, b = self._node("a"), self._node("b")
+        kb.graph.add_node(a, b)
+        kb.traces.update({"a": [a, "first"], "b": [b]})
+        storage.save(kb)
+        kb.graph.remove_node(b.id)
+        kb.traces["a"] = [a, "second"]
+        storage.save(kb)
+
+        loaded = self._load()
+        self.assertEqual(list(loaded.traces), ["a", "b"])
+        self.assertFalse(loaded.traces.is_loaded("a") or loaded.traces.is_loaded("b"))
+        self.assertEqual(loaded.traces["a"], [loaded.graph.get_node(a.id), "second"])
+        self.assertTrue(loaded.traces.is_loaded("a"))
+        self.assertFalse(loaded.traces.is_loaded("b"))
+        # the node removed from the graph is still referred to by the value
+        self.assertEqual(loaded.traces["b"][0].content, "b")
+
+        # the values not loaded yet are kept by the compaction
+        loaded = self._load()
+        loaded_storage = AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"])
+        loaded_storage.load(loaded)
+        loaded_storage.compact(loaded)
+        self.assertEqual(self._load().traces["a"][1], "second")
+
+    def test_truncated_tail_and_compaction(self) -> None:
+        kb = _KnowledgeBase()
+        storage = AppendOnlyKnowledgeBaseStorage(self.path, attrs=["traces"])
+        kb.graph.add_node(self._node("a"))
+        kb.traces["task"] = [1]
+        storage.save(kb)
+        kb.traces["task"].append(2)
+        kb.traces.mark_dirty("task")
+        storage.save(kb)
+        with storage._log_file(storage.generation).open("ab") as f:
+            f.write(b"\x80\x04incomplete")
+
+        loaded = self._load()
+        self.assertEqual(loaded.traces, {"task": [1, 2]})
+
+        storage.compact(kb)
+        self.assertEqual(storage.generation, 1)
+        self.assertFalse(storage._log_file(0).exists())
+        loaded = self._load()
+        self.assertEqual(loaded.traces, {"task": [1, 2]})
+        self.assertEqual(loaded.graph.size(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from rdagent.log import rdagent_logger as logger
+from rdagent.log.storage import FileStorage
+
+
+@pytest.mark.offline
+class LoggerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.old_path = logger.log_trace_path
+        logger.set_trace_path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        logger.flush()
+        logger.set_trace_path(self.old_path)
+        self.tmp_dir.cleanup()
+
+    def test_messages_in_files(self) -> None:
+        n_tags = logger._sinks.max_open + 3
+        for i in range(n_tags):
+            with logger.tag(f"t{i}"):
+                logger.info(f"message {i}")
+                logger.warning(f"warning {i}")
+        for chunk in ("stre", "amed\n"):
+            logger.info(chunk, raw=True)
+        self.assertLessEqual(len(logger._sinks.files), logger._sinks.max_open)
+        logger.flush()
+
+        msgs = list(FileStorage(self.tmp_dir.name).iter_msg())
+        self.assertEqual(len(msgs), 2 * n_tags)
+        first = [m for m in msgs if m.tag == "t0"]
+        self.assertEqual([(m.level, m.content) for m in first], [("INFO", "message 0"), ("WARNING", "warning 0")])
+        self.assertIn("test_logger:test_messages_in_files", first[0].caller)
+
+        raw_files = [p for p in Path(self.tmp_dir.name).glob("*/common_logs.log")]
+        self.assertEqual(raw_files[0].read_text(), "streamed\n")
+
+    def test_indexed_messages(self) -> None:
+        with logger.tag("loop_0"):
+            logger.info("first", tag="a")
+            logger.info("stream", tag="a")
+            logger.info(" chunk", tag="a", raw=True)
+            logger.log_object({"x": 1}, tag="a.obj")
+            logger.warning("second", tag="b")
+        logger.flush()
+        storage = FileStorage(self.tmp_dir.name)
+
+        def summary(msgs):
+            return sorted((m.tag, m.level, m.caller, m.pid_trace, str(m.content)) for m in msgs)
+
+        # the same messages as scanning all the files
+        self.assertEqual(summary(storage.iter_msg()), summary(storage._scan_msg()))
+        self.assertEqual([m.content for m in storage.iter_msg(tag="loop_0.a")], ["first", "stream\n chunk", {"x": 1}])
+        self.assertEqual([m.content for m in storage.iter_msg(tag="loop_0.a.obj")], [{"x": 1}])
+        last = list(storage.iter_msg())[-1]
+        self.assertEqual([m.content for m in storage.iter_msg(start=last.timestamp)], ["second"])
+
+        # the new messages are yielded when watching
+        watching = storage.iter_msg(watch=True, poll_interval=0.01)
+        for _ in range(4):
+            next(watching)
+        logger.info("new")
+        logger.flush()
+        self.assertEqual(next(watching).content, "new")
+
+    def test_watch_last_message(self) -> None:
+        """the last message of a file doesn't take in the messages written after the index is read"""
+        logger.info("message A1", tag="a")
+        logger.info("message A2", tag="a")
+        logger.flush()
+        watching = FileStorage(self.tmp_dir.name).iter_msg(watch=True, poll_interval=0.01)
+        self.assertEqual(next(watching).content, "message A1")
+        logger.info("message B", tag="a")
+        logger.flush()
+        self.assertEqual(next(watching).content, "message A2")
+        self.assertEqual(next(watching).content, "message B")
+        logger.info("message C", tag="a")
+        logger.flush()
+        self.assertEqual(next(watching).content, "message C")
+
+    def test_truncate(self) -> None:
+        for indexed in (True, False):
+            with self.subTest(indexed=indexed):
+                path = Path(self.tmp_dir.name) / str(indexed)
+                logger.set_trace_path(path)
+                logger.info("kept", tag="a")
+                logger.log_object("kept object", tag="a")
+                logger.info("untouched", tag="b")
+                logger.flush()
+                time.sleep(0.01)
+                cut = datetime.now(timezone.utc)
+                time.sleep(0.01)
+                logger.info("removed", tag="a")
+                logger.log_object("removed object", tag="a")
+                logger.flush()
+                storage = FileStorage(path)
+                if not indexed:
+                    storage.index_path.unlink()
+                untouched = next(path.glob("b/*/common_logs.log"))
+                mtime = untouched.stat().st_mtime_ns
+
+                storage.truncate(cut)
+                self.assertEqual(
+                    sorted(str(m.content) for m in storage.iter_msg()), ["kept", "kept object", "untouched"]
+                )
+                self.assertEqual(len(list(path.glob("**/*.pkl"))), 1)
+                self.assertEqual(untouched.stat().st_mtime_ns, mtime)
+
+    def test_pid_chain_cached(self) -> None:
+        self.assertEqual(logger.get_pids(), logger.get_pids())
+        self.assertEqual(logger._pid_chain[1], logger.get_pids())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.kaggle.experiment.template_shared import model_runner
+
+SELECT_CODE = """
+def select(X):
+    X.columns = [f"selected_{c}" for c in X.columns]
+    return X
+"""
+
+MODEL_CODE = """
+import numpy as np
+
+
+def fit(X_train, y_train, X_valid, y_valid):
+    assert list(X_train.columns) == ["selected_a", "selected_b"]
+    return {scale}
+
+
+def predict(model, X):
+    return model * np.asarray(X["selected_a"])
+"""
+
+
+@pytest.mark.offline
+class TestModelRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = Path(tempfile.mkdtemp())
+        for name, scale in [("model_a", 1), ("model_b", 2)]:
+            (self.path / f"{name}.py").write_text(MODEL_CODE.format(scale=scale))
+            (self.path / f"{name.replace('model', 'select')}.py").write_text(SELECT_CODE)
+        self.X = pd.DataFrame({"a": np.arange(5.0), "b": np.ones(5)})
+        self.y = pd.Series(np.zeros(5))
+
+    def _data(self) -> tuple:
+        return self.X, self.y, self.X.copy(), self.y, self.X.copy()
+
+    def test_run_models(self) -> None:
+        results = model_runner.run_models(self.path.glob("model_*.py"), *self._data())
+        self.assertEqual([r.name for r in results], ["model_a", "model_b"])
+        np.testing.assert_array_equal(results[1].y_test_pred, 2 * np.arange(5.0))
+        # `select` modifies the data in the forked processes only
+        self.assertEqual(list(self.X.columns), ["a", "b"])
+
+        model_runner.save_score("RMSE", 0.5, results, path=self.path / "submission_score.csv")
+        score = pd.read_csv(self.path / "submission_score.csv", index_col=0)
+        self.assertEqual(score.iloc[:, 0].to_dict(), {"RMSE": 0.5})
+        self.assertEqual(list(score.columns[1:]), ["model_a_wall_time", "model_b_wall_time"])
+
+    def test_failed_model(self) -> None:
+        (self.path / "model_b.py").write_text("def fit(*args):\n    raise ValueError('bad model')\n")
+        with self.assertRaisesRegex(RuntimeError, "bad model"):
+            model_runner.run_models(self.path.glob("model_*.py"), *self._data())
+
+
+if __name__ == "__main__":
+    unittest.main()
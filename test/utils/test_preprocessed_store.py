@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.kaggle.experiment.template_shared import preprocessed_store
+
+
+@pytest.mark.offline
+class TestPreprocessedStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = Path(tempfile.mkdtemp()) / "preprocessed"
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(
+            {
+                "a": rng.normal(size=10),
+                "b": np.arange(10),
+                "c": list("abcdefghij"),
+                "d": rng.normal(size=10).astype(np.float32),
+            },
+            index=np.arange(100, 110),
+        )
+        self.y = pd.Series(np.arange(10) % 2, name="target")
+
+    def test_save_and_load(self) -> None:
+        preprocessed_store.save_preprocessed(self.path, self.X, self.X, self.y, self.y.to_numpy(), self.X, ["c"])
+        self.assertTrue(preprocessed_store.exists(self.path))
+
+        X_train, X_valid, y_train, y_valid, X_test, others = preprocessed_store.load_preprocessed(self.path)
+        pd.testing.assert_frame_equal(X_train, self.X)
+        pd.testing.assert_series_equal(y_train, self.y)
+        np.testing.assert_array_equal(y_valid, self.y.to_numpy())
+        self.assertEqual(others, ["c"])
+
+        # the loaded data is copy-on-write
+        X_valid.iloc[0, 0] = 1e6
+        pd.testing.assert_frame_equal(preprocessed_store.load_frame(self.path / "X_valid"), self.X)
+
+    def test_load_rows(self) -> None:
+        preprocessed_store.save_frame(self.X, self.path / "X_valid")
+        pd.testing.assert_frame_equal(
+            preprocessed_store.load_frame(self.path / "X_valid", rows=slice(2, 5)), self.X.iloc[2:5]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rdagent.components.knowledge_management.graph import (
+    UndirectedGraph,
+    UndirectedNode,
+)
+from rdagent.core.experiment import Experiment, Task
+from rdagent.core.proposal import Hypothesis
+from rdagent.utils import snapshot
+from rdagent.utils.snapshot import (
+    SnapshotCycleError,
+    dump_snapshot,
+    load_snapshot,
+    wait_for_snapshots,
+)
+
+
+class _Task(Task):
+    def get_task_information(self) -> str:
+        return self.name
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.hist = []
+        self.prev_out = {}
+
+
+def _n_objects(session_folder: Path) -> int:
+    return len(list((session_folder / "objects").glob("*/*")))
+
+
+@pytest.mark.offline
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session_folder = Path(tempfile.mkdtemp())
+
+    def _add_loop(self, session: _Session, i: int) -> Experiment:
+        task = _Task(f"task_{i}")
+        exp = Experiment([task])
+        exp.result = "x" * 10000
+        session.hist.append((Hypothesis(f"h{i}", "", "", "", "", ""), exp))
+        session.prev_out = {"task": task}
+        return exp
+
+    def test_incremental_dump_and_load(self) -> None:
+        session = _Session()
+        self._add_loop(session, 0)
+        dump_snapshot(session, self.session_folder / "0" / "0_step")
+        wait_for_snapshots()
+        n_objects = _n_objects(self.session_folder)
+
+        self._add_loop(session, 1)
+        dump_snapshot(session, self.session_folder / "1" / "0_step")
+        wait_for_snapshots()
+        # only the hypothesis, the experiment and the task of the new loop are written
+        self.assertEqual(_n_objects(self.session_folder), n_objects + 3)
+
+        loaded = load_snapshot(self.session_folder / "1" / "0_step")
+        self.assertEqual([h.hypothesis for h, _ in loaded.hist], ["h0", "h1"])
+        # the objects shared by different places are still the same object
+        self.assertIs(loaded.prev_out["task"], loaded.hist[1][1].sub_tasks[0])
+        self.assertEqual(load_snapshot(self.session_folder / "0" / "0_step").hist[0][1].result, "x" * 10000)
+
+    def test_unchanged_objects_not_pickled(self) -> None:
+        session = _Session()
+        exps = [self._add_loop(session, i) for i in range(3)]
+        session.graph = UndirectedGraph()
+        session.graph.add_node(UndirectedNode(content="a", embedding=[1.0, 0.0]))
+
+        def dump(loop: int) -> list:
+            path = self.session_folder / str(loop) / "0_step"
+            with mock.patch.object(snapshot._Dumper, "dumps", autospec=True, side_effect=snapshot._Dumper.dumps) as m:
+                dump_snapshot(session, path)
+            wait_for_snapshots()
+            # the pickled objects except the session itself
+            return [call.args[1] for call in m.call_args_list if call.args[1] is not session]
+
+        # the hypotheses, experiments and tasks, the graph and its vector base
+        self.assertEqual(len(dump(0)), 11)
+        self.assertEqual(dump(1), [])
+        # the changed objects are pickled again, together with the objects referring to them
+        exps[0].sub_tasks[0].name = "changed"
+        exps[1].sub_workspace_list.append(None)
+        session.graph.add_node(UndirectedNode(content="b", embedding=[0.0, 1.0]))
+        self.assertEqual(
+            {id(obj) for obj in dump(2)},
+            {id(obj) for obj in (exps[0], exps[0].sub_tasks[0], exps[1], session.graph, session.graph.vector_base)},
+        )
+
+        loaded = load_snapshot(self.session_folder / "2" / "0_step")
+        self.assertEqual(loaded.hist[0][1].sub_tasks[0].name, "changed")
+        self.assertEqual(len(loaded.hist[1][1].sub_workspace_list), 2)
+        self.assertEqual(loaded.graph.size(), 2)
+        self.assertEqual(load_snapshot(self.session_folder / "1" / "0_step").hist[0][1].sub_tasks[0].name, "task_0")
+
+    def test_load_single_pickle(self) -> None:
+        session = _Session()
+        self._add_loop(session, 0)
+        path = self.session_folder / "0" / "0_step"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(pickle.dumps(session))
+        self.assertEqual(load_snapshot(path).hist[0][1].sub_tasks[0].name, "task_0")
+
+    def test_cycle(self) -> None:
+        session = _Session()
+        exp = self._add_loop(session, 0)
+        exp.sub_tasks[0].experiment = exp
+        with self.assertRaises(SnapshotCycleError):
+            dump_snapshot(session, self.session_folder / "0" / "0_step")
+
+
+if __name__ == "__main__":
+    unittest.main()
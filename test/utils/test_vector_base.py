@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rdagent.components.knowledge_management.vector_base import (
+    Document,
+    NPVectorBase,
+    PDVectorBase,
+)
+
+
+@pytest.mark.offline
+class TestNPVectorBase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.normal(size=(200, 16))
+        self.queries = rng.normal(size=(4, 16))
+        self.docs = [
+            Document(content=f"content_{i}", label="test", embedding=e.tolist()) for i, e in enumerate(self.embeddings)
+        ]
+
+    def test_same_result_as_pd_vector_base(self) -> None:
+        np_vb, pd_vb = NPVectorBase(), PDVectorBase()
+        np_vb.add(self.docs)
+        pd_vb.add(self.docs)
+        results = np_vb.search_by_embedding(self.queries.tolist(), topk_k=5, similarity_threshold=0.1)
+        for query, (docs, similarities) in zip(self.queries, results):
+            pd_similarities = pd_vb.vector_df["embedding"].apply(
+                lambda x, query=query: float(np.dot(x, query) / np.linalg.norm(x) / np.linalg.norm(query)),
+            )
+            expected = pd_similarities[pd_similarities > 0.1].nlargest(5)
+            assert [doc.content for doc in docs] == pd_vb.vector_df.loc[expected.index, "content"].to_list()
+            np.testing.assert_allclose(similarities, expected.to_list(), atol=1e-5)
+
+    def test_remove(self) -> None:
+        vb = NPVectorBase()
+        vb.add(self.docs)
+        nearest = {docs[0].id for docs, _ in vb.search_by_embedding(self.queries.tolist(), topk_k=1)}
+        for removed in (nearest, nearest | {doc.id for doc in self.docs[:150]}):
+            vb.remove(list(removed))
+            expected_vb = NPVectorBase()
+            expected_vb.add([doc for doc in self.docs if doc.id not in removed])
+            results = vb.search_by_embedding(self.queries.tolist(), topk_k=5)
+            expected = expected_vb.search_by_embedding(self.queries.tolist(), topk_k=5)
+            for (docs, similarities), (expected_docs, expected_similarities) in zip(results, expected):
+                assert len(docs) == 5
+                assert [doc.id for doc in docs] == [doc.id for doc in expected_docs]
+                np.testing.assert_allclose(similarities, expected_similarities, atol=1e-6)
+        # the removed rows are dropped when they are more than half of the matrix
+        assert vb.shape() == expected_vb.shape()
+
+    def test_dump_and_load(self) -> None:
+        vb = NPVectorBase()
+        vb.add(self.docs[:100])
+        vb.add(self.docs[100:])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            vb.path = Path(tmp_dir) / "vector_base.pkl"
+            vb.dump()
+            loaded_vb = NPVectorBase(path=vb.path)
+            assert loaded_vb.shape() == vb.shape() == (200, 16)
+            docs, _ = loaded_vb.search_by_embedding([self.embeddings[3].tolist()], topk_k=1)[0]
+            assert docs[0].content == "content_3"
+            np.testing.assert_allclose(docs[0].embedding, self.embeddings[3], rtol=1e-5)
+
+            # the memory-mapped base is still appendable.
+            loaded_vb.add(Document(content="new", embedding=(-self.embeddings[3]).tolist()))
+            assert loaded_vb.shape() == (201, 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.log import rdagent_logger as logger
+from rdagent.utils.snapshot import wait_for_snapshots
+from rdagent.utils.workflow import LoopBase, LoopMeta
+
+
+class _Stop(Exception):
+    pass
+
+
+def _record(loop: "_Loop", event: str) -> None:
+    with loop.lock:
+        loop.events.append(event)
+
+
+class _Loop(LoopBase, metaclass=LoopMeta):
+    skip_loop_error = ()
+
+    def __init__(self, n_loops: int) -> None:
+        super().__init__()
+        self.session_folder = Path(tempfile.mkdtemp()) / "__session__"
+        self.n_loops = n_loops
+        self.n_proposed = 0
+        self.hist = []
+        self.events = []
+        self.tags = []
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if k != "lock"}
+
+    def propose(self, prev_out: dict[str, Any]):
+        if self.n_proposed == self.n_loops:
+            raise _Stop
+        self.n_proposed += 1
+        # the proposal is based on the trace at that time
+        return (self.n_proposed - 1, len(self.hist))
+
+    def running(self, prev_out: dict[str, Any]):
+        _record(self, f"start running {prev_out['propose'][0]}")
+        self.tags.append(logger._tag)
+        time.sleep(0.2)
+        _record(self, f"end running {prev_out['propose'][0]}")
+        return prev_out["propose"][0]
+
+    def feedback(self, prev_out: dict[str, Any]):
+        self.hist.append(prev_out["running"])
+
+
+@pytest.mark.offline
+class TestPipelinedLoop(unittest.TestCase):
+    def setUp(self) -> None:
+        self.max_inflight_loops = RD_AGENT_SETTINGS.workflow_max_inflight_loops
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.workflow_max_inflight_loops = self.max_inflight_loops
+
+    def test_pipelined_run(self) -> None:
+        RD_AGENT_SETTINGS.workflow_max_inflight_loops = 2
+        loop = _Loop(n_loops=4)
+        with self.assertRaises(_Stop), logger.tag("session"):
+            loop.run()
+        # wait for the loops in flight
+        for thread in threading.enumerate():
+            if thread.name.startswith("loop_"):
+                thread.join()
+        wait_for_snapshots()
+
+        self.assertEqual(loop.hist, [0, 1, 2, 3])
+        # the next loop is running before the former one ends
+        self.assertLess(loop.events.index("start running 1"), loop.events.index("end running 0"))
+        self.assertEqual(loop.loop_idx, 4)
+        self.assertTrue(all((loop.session_folder / f"{i}" / "2_feedback").exists() for i in range(4)))
+        # the loop threads keep the log tag of the caller
+        self.assertEqual(loop.tags, ["session"] * 4)
+
+    def test_serial_run(self) -> None:
+        loop = _Loop(n_loops=2)
+        loop.run(step_n=6)
+        self.assertEqual(loop.hist, [0, 1])
+        self.assertEqual(loop.events.index("end running 0") + 1, loop.events.index("start running 1"))
+
+
+if __name__ == "__main__":
+    unittest.main()